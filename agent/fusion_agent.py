@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Deklan Fusion node agent (jalan di VPS, stdlib saja).
+
+Tail `swarm_launcher.log` secara lokal dan simpan ringkasan terkini
+(status, peer, score, reward, points, error) ke satu file JSON kecil:
+
+    /var/lib/fusion-agent/summary.json
+
+Bot cukup `cat` file itu (1 perintah SSH, ukuran konstan) alih-alih
+grep seluruh log berkali-kali. Opsional: ringkasan juga di-push ke
+collector bot (`bot/collector.py`) sehingga bot tidak perlu SSH sama sekali.
+Token push khusus untuk host ini (ditulis `/deployagent`), tidak berlaku
+untuk host lain.
+
+Log hanya dibaca dari offset terakhir → biaya per interval sebanding
+dengan baris baru, bukan ukuran log. Rotasi / truncate dideteksi dari
+inode dan ukuran file.
+
+Jalankan:
+    python3 fusion_agent.py [--log PATH] [--summary PATH] [--interval 5]
+                            [--collector URL --token TOKEN --host IP]
+    python3 fusion_agent.py --once        # satu kali scan lalu keluar
+"""
+import os
+import re
+import sys
+import json
+import time
+import signal
+import logging
+import argparse
+import subprocess
+import urllib.request
+
+logger = logging.getLogger("fusion-agent")
+
+VERSION = 1
+
+DEFAULT_LOG = "/root/rl-swarm/logs/swarm_launcher.log"
+DEFAULT_SUMMARY = "/var/lib/fusion-agent/summary.json"
+DEFAULT_SERVICE = "rl-swarm.service"
+
+# Push ke collector minimal sekali per HEARTBEAT walau tidak ada perubahan
+HEARTBEAT = 60
+
+# Baca log maksimal sebanyak ini per interval (log baru yang besar
+# diproses bertahap, bukan sekaligus)
+MAX_READ = 4 * 1024 * 1024
+
+# Pola sama dengan reward_checker (grep) supaya hasil identik
+SCORE_RE = re.compile(r"score: ([0-9.]*)")
+REWARD_RE = re.compile(r"reward: ([0-9.]*)")
+POINTS_RE = re.compile(r"points: ([0-9.]*)")
+PEER_RE = re.compile(r"(Qm[a-zA-Z0-9]{44,})")
+ERROR_RE = re.compile(r"ConnectionRefusedError|FileNotFoundError|uvloop|Traceback|\bERROR\b|Exception")
+
+
+# ============================================================
+# LOG TAIL STATE
+# ============================================================
+class Summary:
+    __slots__ = ("status", "peer", "score", "reward", "points",
+                 "errors", "last_error", "last_error_at",
+                 "inode", "offset", "updated")
+
+    def __init__(self):
+        self.status = "offline"
+        self.peer = None
+        self.score = None
+        self.reward = None
+        self.points = None
+        self.errors = 0
+        self.last_error = None
+        self.last_error_at = None
+        self.inode = None
+        self.offset = 0
+        self.updated = 0.0
+
+    @classmethod
+    def load(cls, path: str) -> "Summary":
+        """Lanjutkan dari summary sebelumnya (offset ikut) setelah restart agent."""
+        s = cls()
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return s
+        for name in cls.__slots__:
+            if name in data:
+                setattr(s, name, data[name])
+        return s
+
+    def to_dict(self) -> dict:
+        d = {name: getattr(self, name) for name in self.__slots__}
+        d["v"] = VERSION
+        return d
+
+    def public(self) -> dict:
+        """Yang dikirim ke collector (tanpa state tail)."""
+        d = self.to_dict()
+        d.pop("inode")
+        d.pop("offset")
+        return d
+
+    # --------------------------------------------------------
+    # Parse baris log baru
+    # --------------------------------------------------------
+    def feed(self, line: str):
+        m = SCORE_RE.search(line)
+        if m and m.group(1):
+            self.score = m.group(1)
+        m = REWARD_RE.search(line)
+        if m and m.group(1):
+            self.reward = m.group(1)
+        m = POINTS_RE.search(line)
+        if m and m.group(1):
+            self.points = m.group(1)
+        m = PEER_RE.search(line)
+        if m:
+            self.peer = m.group(1)
+        if ERROR_RE.search(line):
+            self.errors += 1
+            self.last_error = line.strip()[:300]
+            self.last_error_at = time.time()
+
+
+def scan_log(state: Summary, path: str) -> int:
+    """Baca baris baru sejak offset terakhir. Return jumlah byte yang dibaca."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return 0
+
+    # Rotasi (inode beda) atau truncate (ukuran mengecil) → mulai dari awal
+    if st.st_ino != state.inode or st.st_size < state.offset:
+        state.inode = st.st_ino
+        state.offset = 0
+        state.errors = 0
+
+    if st.st_size == state.offset:
+        return 0
+
+    with open(path, "rb") as f:
+        f.seek(state.offset)
+        chunk = f.read(MAX_READ)
+
+    # Hanya proses baris lengkap; sisa baris setengah jadi dibaca lagi nanti
+    end = chunk.rfind(b"\n") + 1
+    if end == 0:
+        if len(chunk) < MAX_READ:
+            return 0
+        end = len(chunk)
+
+    for line in chunk[:end].decode("utf-8", errors="ignore").splitlines():
+        state.feed(line)
+
+    state.offset += end
+    return end
+
+
+def service_status(service: str) -> str:
+    try:
+        out = subprocess.run(
+            ["systemctl", "is-active", service],
+            capture_output=True, text=True, timeout=10
+        ).stdout.strip()
+    except (OSError, subprocess.TimeoutExpired):
+        return "offline"
+    return "online" if out == "active" else "offline"
+
+
+def write_summary(state: Summary, path: str):
+    """Atomic write: tmp + rename, bot tidak pernah baca file setengah jadi."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(state.to_dict(), f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+# ============================================================
+# PUSH KE COLLECTOR
+# ============================================================
+def push(state: Summary, url: str, token: str, host: str) -> bool:
+    payload = state.public()
+    if host:
+        payload["host"] = host
+    req = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json", "X-Fusion-Agent-Token": token},
+        method="POST"
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=10) as resp:
+            return 200 <= resp.status < 300
+    except Exception as e:
+        logger.warning(f"Push ke collector gagal: {e}")
+        return False
+
+
+# ============================================================
+# MAIN LOOP
+# ============================================================
+def run(args):
+    state = Summary.load(args.summary)
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+
+    last_pushed = None
+    last_push_at = 0.0
+
+    while not stopping:
+        while scan_log(state, args.log) >= MAX_READ:
+            pass
+        state.status = service_status(args.service)
+        state.updated = time.time()
+        write_summary(state, args.summary)
+
+        if args.collector:
+            now = time.time()
+            current = (state.status, state.peer, state.score, state.reward,
+                       state.points, state.errors)
+            if current != last_pushed or now - last_push_at >= HEARTBEAT:
+                if push(state, args.collector, args.token, args.host):
+                    last_pushed = current
+                    last_push_at = now
+
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+def main():
+    logging.basicConfig(
+        format="%(asctime)s — %(name)s — %(levelname)s — %(message)s",
+        level=logging.INFO
+    )
+
+    parser = argparse.ArgumentParser(description="Deklan Fusion node agent")
+    parser.add_argument("--log", default=os.getenv("FUSION_AGENT_LOG", DEFAULT_LOG))
+    parser.add_argument("--summary", default=os.getenv("FUSION_AGENT_SUMMARY", DEFAULT_SUMMARY))
+    parser.add_argument("--service", default=os.getenv("FUSION_AGENT_SERVICE", DEFAULT_SERVICE))
+    parser.add_argument("--interval", type=float, default=float(os.getenv("FUSION_AGENT_INTERVAL", "5")))
+    parser.add_argument("--collector", default=os.getenv("FUSION_AGENT_COLLECTOR", ""))
+    parser.add_argument("--token", default=os.getenv("FUSION_AGENT_TOKEN", ""))
+    parser.add_argument("--host", default=os.getenv("FUSION_AGENT_HOST", ""))
+    parser.add_argument("--once", action="store_true", help="Scan sekali lalu keluar")
+    args = parser.parse_args()
+
+    if args.collector and not args.token:
+        logger.error("--collector butuh --token")
+        sys.exit(1)
+
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
 import os
 import sys
 import json
+import time
+import shlex
+from itertools import islice
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes
 
@@ -8,41 +11,34 @@ from telegram.ext import ContextTypes
 sys.path.insert(0, os.path.dirname(__file__))
 
 from bot.ssh_client import SSHClient   # FIXED PATH
+from bot.config import (
+    VPS_PAGE_SIZE, AGENT_SUMMARY_PATH, AGENT_COLLECTOR_URL, AGENT_TOKEN
+)
+from bot.db import load_db, transaction, add_host, remove_host, owners_of, hosts_with_tag
+from bot.snapshot import get_reader
+from bot.models import VPSRecord, KeyMeta
+from bot.reward_checker import check_nodes, invalidate_peers
+from bot.models import split_node, DEFAULT_INSTANCE
+from bot import logviewer, nodes
+from bot.importer import import_hosts
+from bot.collector import agent_token
 
-DB_PATH = "/opt/deklan-fusion/fusion_db.json"
 KEY_DIR = "/opt/deklan-fusion/keys"
 
 
 # ======================================================
 # DATABASE HANDLING
 # ======================================================
-def load_db():
-    """Load DB dengan struktur terbaru (per-user VPS & per-user keys)."""
-    if not os.path.exists(DB_PATH):
-        return {"users": {}}
-
-    try:
-        with open(DB_PATH, "r") as f:
-            db = json.load(f)
-            if "users" not in db:
-                db["users"] = {}
-            return db
-    except:
-        return {"users": {}}
-
-
-def save_db(data):
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    with open(DB_PATH, "w") as f:
-        json.dump(data, f, indent=2)
-
-
 def ensure_user(db, user_id):
-    """Pastikan user punya struktur lengkap."""
+    """Pastikan user punya struktur lengkap (user baru dibuat lewat transaction)."""
     uid = str(user_id)
 
     if uid not in db["users"]:
-        db["users"][uid] = {"vps": {}, "keys": {}}
+        # Jangan ubah dict bersama di luar transaction: bisa balapan dengan
+        # json.dump thread flusher. Re-entrant kalau dipanggil di dalam transaction.
+        with transaction(("users", uid)) as tx:
+            tx["users"].setdefault(uid, {"vps": {}, "keys": {}})
+            return tx["users"][uid]
 
     return db["users"][uid]
 
@@ -56,74 +52,200 @@ def get_user_keys(db, user_id):
 
 
 def is_vps_owner(db, ip, user_id):
-    return ip in get_user_vps_list(db, user_id)
+    return str(user_id) in owners_of(db, ip)
 
 
 # ======================================================
 # ADD VPS
 # ======================================================
 async def add_vps(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # /addvps multi-baris → bulk import (validasi SSH paralel, 1 transaksi)
+    first, _, rest = update.message.text.partition("\n")
+    if rest.strip():
+        # Baris pertama boleh sudah berisi host: "/addvps IP USER PASS"
+        await import_hosts(update, "\n".join(first.split(None, 1)[1:] + [rest]))
+        return
+
     args = update.message.text.split()
-    if len(args) != 4:
+    if len(args) not in (4, 5):
         await update.message.reply_text(
-            "❌ Format salah.\nGunakan:\n`/addvps IP USER PASS`",
+            "❌ Format salah.\nGunakan:\n`/addvps IP USER PASS [tag1,tag2]`\n\n"
+            "Banyak VPS sekaligus: satu VPS per baris setelah `/addvps`, "
+            "atau kirim file `.csv` / `.txt`.",
             parse_mode="Markdown"
         )
         return
 
-    _, ip, username, passwd = args
+    _, ip, username, passwd = args[:4]
+    tags = args[4].split(",") if len(args) == 5 else []
     user_id = update.effective_user.id
 
-    db = load_db()
-    vps_list = get_user_vps_list(db, user_id)
+    # Read-modify-write dalam satu transaksi → aman walau ada beberapa bot worker
+    with transaction(("users", str(user_id)), ("index",)) as db:
+        vps_list = get_user_vps_list(db, user_id)
+
+        exists = ip in vps_list
+        if not exists:
+            entry = add_host(db, user_id, ip, VPSRecord(username, passwd), tags)
 
-    if ip in vps_list:
+    if exists:
         await update.message.reply_text(
             f"⚠️ VPS `{ip}` sudah ada.", parse_mode="Markdown"
         )
         return
 
-    vps_list[ip] = {"user": username, "password": passwd}
-    save_db(db)
-
+    tag_line = f"\n• Tags: `{', '.join(entry.tags)}`" if entry.tags else ""
     await update.message.reply_text(
-        f"🟢 VPS ditambahkan:\n• IP: `{ip}`\n• User: `{username}`",
+        f"🟢 VPS ditambahkan:\n• Label: `#{entry.label}`\n• IP: `{ip}`\n• User: `{username}`{tag_line}",
         parse_mode="Markdown"
     )
 
 
 # ======================================================
-# LIST VPS
+# LIST VPS (PAGINATED)
 # ======================================================
-async def list_vps(update: Update, context: ContextTypes.DEFAULT_TYPE):
+STATUS_BADGE = {
+    "online": "🟢",
+    "offline": "🔴",
+}
+
+
+def vps_badge(ip, db):
+    """Badge status dari cache (snapshot monitor / check terakhir), tanpa SSH."""
+    rec = get_reader().get(ip)
+    if rec is None:
+        rec = db.get("vps", {}).get(ip, {}).get("last")
+    return STATUS_BADGE.get(rec.status if rec else None, "⚪")
+
+
+def _match_filter(ip, label, query):
+    """Filter: prefix IP atau label (case-insensitive)."""
+    if not query:
+        return True
+    q = query.lower()
+    return ip.startswith(q) or str(label).lower().startswith(q.lstrip("#"))
+
+
+def paginate_vps(vps_list, page=0, query=None, page_size=VPS_PAGE_SIZE, tag_hosts=None):
+    """
+    Ambil satu halaman VPS.
+
+    Tanpa filter hanya iterasi sampai akhir halaman (islice),
+    sehingga biaya render tidak bergantung pada total fleet.
+    Filter `tag:xxx` memakai `tag_hosts` dari index tag (hanya host bertag).
+
+    Returns:
+        (items: list[(ip, label, vps)], page, total_matches, has_next)
+    """
+    page = max(0, int(page))
+    start = page * page_size
+
+    if not query:
+        total = len(vps_list)
+        if start >= total and total:
+            page = (total - 1) // page_size
+            start = page * page_size
+        items = [
+            (ip, vps.label or start + i + 1, vps)
+            for i, (ip, vps) in enumerate(
+                islice(vps_list.items(), start, start + page_size)
+            )
+        ]
+        return items, page, total, start + page_size < total
+
+    if tag_hosts is not None:
+        matches = [
+            (ip, vps_list[ip].label or 0, vps_list[ip])
+            for ip in tag_hosts
+            if ip in vps_list and query[4:].strip().lower() in vps_list[ip].tags
+        ]
+    else:
+        matches = [
+            (ip, vps.label or i + 1, vps)
+            for i, (ip, vps) in enumerate(vps_list.items())
+            if _match_filter(ip, vps.label or i + 1, query)
+        ]
+    total = len(matches)
+    if start >= total and total:
+        page = (total - 1) // page_size
+        start = page * page_size
+    return matches[start:start + page_size], page, total, start + page_size < total
+
+
+async def list_vps(update: Update, context: ContextTypes.DEFAULT_TYPE, page=None):
     user_id = update.effective_user.id
     db = load_db()
     vps_list = get_user_vps_list(db, user_id)
 
+    user_data = context.user_data if context.user_data is not None else {}
+
+    # /listvps <query> → set filter, /listvps saja → reset filter
+    if update.message and update.message.text and update.message.text.startswith("/listvps"):
+        parts = update.message.text.split(maxsplit=1)
+        user_data["vps_filter"] = parts[1].strip() if len(parts) > 1 else None
+        page = 0
+
+    query = user_data.get("vps_filter")
+    if page is None:
+        page = user_data.get("vps_page", 0)
+
+    reply = update.message.reply_text if update.message else update.callback_query.message.reply_text
+
     if not vps_list:
         msg = (
             "❌ Tidak ada VPS tersimpan.\n\n"
             "Gunakan `/addvps IP USER PASS` untuk menambahkan."
         )
-        if update.message:
-            await update.message.reply_text(msg)
-        else:
-            await update.callback_query.message.reply_text(msg)
+        await reply(msg)
+        return
+
+    tag_hosts = None
+    if query and query.lower().startswith("tag:"):
+        tag_hosts = hosts_with_tag(db, query[4:])
+
+    items, page, total, has_next = paginate_vps(vps_list, page, query, tag_hosts=tag_hosts)
+    user_data["vps_page"] = page
+
+    if not items:
+        await reply(
+            f"🔍 Tidak ada VPS yang cocok dengan `{query}`.\n"
+            "Gunakan `/listvps` tanpa argumen untuk reset filter.",
+            parse_mode="Markdown"
+        )
         return
 
     keyboard = [
-        [InlineKeyboardButton(f"🖥 {ip}", callback_data=f"vps_select_{ip}")]
-        for ip in vps_list
+        [InlineKeyboardButton(f"{vps_badge(ip, db)} #{label} {ip}", callback_data=f"vps_select_{ip}")]
+        for ip, label, vps in items
     ]
+
+    nav = []
+    if page > 0:
+        nav.append(InlineKeyboardButton("◀️ Prev", callback_data=f"vps_page_{page - 1}"))
+    if has_next:
+        nav.append(InlineKeyboardButton("Next ▶️", callback_data=f"vps_page_{page + 1}"))
+    if nav:
+        keyboard.append(nav)
     keyboard.append([InlineKeyboardButton("⬅️ Back", callback_data="back_to_menu")])
 
-    text = f"📋 *Daftar VPS Anda ({len(vps_list)}):*\n\nPilih VPS untuk kontrol:"
-    if update.message:
-        await update.message.reply_text(text, parse_mode="Markdown",
-                                        reply_markup=InlineKeyboardMarkup(keyboard))
-    else:
-        await update.callback_query.message.reply_text(text, parse_mode="Markdown",
-                                                       reply_markup=InlineKeyboardMarkup(keyboard))
+    pages = (total + VPS_PAGE_SIZE - 1) // VPS_PAGE_SIZE
+    text = f"📋 *Daftar VPS Anda ({total}):*\n"
+    if query:
+        text += f"🔍 Filter: `{query}`\n"
+    text += f"Halaman {page + 1}/{pages}\n\nPilih VPS untuk kontrol:"
+
+    if update.callback_query and not update.message:
+        # Navigasi halaman → edit pesan yang sama, tidak spam chat
+        try:
+            await update.callback_query.edit_message_text(
+                text, parse_mode="Markdown",
+                reply_markup=InlineKeyboardMarkup(keyboard)
+            )
+            return
+        except Exception:
+            pass
+
+    await reply(text, parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(keyboard))
 
 
 # ======================================================
@@ -138,22 +260,90 @@ async def remove_vps(update: Update, context: ContextTypes.DEFAULT_TYPE):
     _, ip = args
     user_id = update.effective_user.id
 
-    db = load_db()
-    vps_list = get_user_vps_list(db, user_id)
+    with transaction(("users", str(user_id)), ("index",)) as db:
+        found = remove_host(db, user_id, ip)
 
-    if ip not in vps_list:
+    if not found:
         await update.message.reply_text("❌ VPS tidak ditemukan.")
         return
 
-    del vps_list[ip]
-    save_db(db)
-
     await update.message.reply_text(
         f"🗑 VPS `{ip}` dihapus dari daftar Anda.",
         parse_mode="Markdown"
     )
 
 
+# ======================================================
+# NODE INSTANCES (BEBERAPA RL-SWARM PER VPS)
+# ======================================================
+NODES_USAGE = (
+    "Gunakan:\n"
+    "`/nodes IP` - daftar instance\n"
+    "`/nodes IP add NAMA [SERVICE] [DIR]` - default `rl-swarm-NAMA.service` + `/root/rl-swarm-NAMA`\n"
+    "`/nodes IP remove NAMA`"
+)
+
+
+async def nodes_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/nodes IP [add NAMA [SERVICE] [DIR] | remove NAMA]"""
+    args = update.message.text.split()[1:]
+    if not args:
+        await update.message.reply_text(NODES_USAGE, parse_mode="Markdown")
+        return
+
+    ip, action = args[0], args[1:2]
+    user_id = update.effective_user.id
+    db = load_db()
+    vps = get_user_vps_list(db, user_id).get(ip)
+    if vps is None:
+        await update.message.reply_text("❌ VPS bukan milik Anda.")
+        return
+
+    if not action:
+        await update.message.reply_text(
+            f"🧩 *Instance node* `{ip}`\n{nodes.describe(vps.nodes())}", parse_mode="Markdown"
+        )
+        return
+
+    if action[0] == "add" and len(args) in (3, 4, 5):
+        inst, error = nodes.validate(*args[2:5])
+        if inst is None:
+            await update.message.reply_text(f"❌ {error}")
+            return
+        if vps.node(inst.name) is not None:
+            await update.message.reply_text(f"⚠️ Instance `{inst.name}` sudah ada.", parse_mode="Markdown")
+            return
+        instances = vps.nodes() + [inst]
+    elif action[0] == "remove" and len(args) == 3:
+        instances = [n for n in vps.nodes() if n.name != args[2]]
+        if len(instances) == len(vps.nodes()):
+            await update.message.reply_text("❌ Instance tidak ditemukan.")
+            return
+        if not instances:
+            await update.message.reply_text("❌ Minimal satu instance per VPS.")
+            return
+    else:
+        await update.message.reply_text(NODES_USAGE, parse_mode="Markdown")
+        return
+
+    # Hanya instance bawaan → simpan format lama (field instances kosong)
+    if [n.name for n in instances] == [DEFAULT_INSTANCE.name]:
+        instances = []
+
+    # Semua owner host ini ikut diperbarui (monitor memakai entry owner pertama)
+    owners = owners_of(db, ip)
+    with transaction(*[("users", o) for o in owners]) as db:
+        for o in owners:
+            entry = db["users"].get(o, {}).get("vps", {}).get(ip)
+            if entry is not None:
+                entry.instances = list(instances)
+
+    await update.message.reply_text(
+        f"✅ Instance node `{ip}` diperbarui:\n{nodes.describe(instances or [DEFAULT_INSTANCE])}",
+        parse_mode="Markdown"
+    )
+
+
 # ======================================================
 # FILE UPLOAD (3 KEYS)
 # ======================================================
@@ -179,49 +369,229 @@ async def handle_file_upload(update: Update, context: ContextTypes.DEFAULT_TYPE)
     await bot_file.download_to_drive(save_path)
 
     # SAVE KEYS PER USER
-    keys[filename] = save_path
-    save_db(db)
+    with transaction(("users", str(user_id))) as db:
+        get_user_keys(db, user_id)[filename] = KeyMeta(save_path, document.file_size, time.time())
 
     await update.message.reply_text(f"🟢 `{filename}` tersimpan!", parse_mode="Markdown")
 
 
 # ======================================================
-# SYNC KEYS KE VPS
+# DEPLOY NODE AGENT
 # ======================================================
-async def sync_keys_to_all_vps(update: Update, context: ContextTypes.DEFAULT_TYPE):
+AGENT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "agent")
+AGENT_REMOTE_DIR = "/opt/fusion-agent"
+
+
+def _agent_env(ip):
+    """Isi /etc/default/fusion-agent (push ke collector kalau dikonfigurasi)."""
+    lines = [f"FUSION_AGENT_SUMMARY={AGENT_SUMMARY_PATH}"]
+    if AGENT_COLLECTOR_URL and AGENT_TOKEN:
+        lines += [
+            f"FUSION_AGENT_COLLECTOR={AGENT_COLLECTOR_URL}",
+            f"FUSION_AGENT_TOKEN={agent_token(ip)}",
+            f"FUSION_AGENT_HOST={ip}",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+async def deploy_agent(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Upload + enable fusion-agent di semua VPS milik user."""
     user_id = update.effective_user.id
     db = load_db()
-
-    keys = get_user_keys(db, user_id)
     vps_list = get_user_vps_list(db, user_id)
 
-    if not keys:
-        await update.message.reply_text("⚠ Belum ada keys diupload.")
-        return
-
     if not vps_list:
         await update.message.reply_text("⚠ Tidak ada VPS tersimpan.")
         return
 
-    await update.message.reply_text("🔄 Menyebarkan keys ke semua VPS…")
+    await update.message.reply_text("🛰 Deploy node agent ke semua VPS…")
 
     for ip, vps in vps_list.items():
-        u = vps["user"]
-        p = vps["password"]
+        u = vps.user
+        p = vps.password
+
+        ok, msg = SSHClient.upload_file(
+            ip, u, p, os.path.join(AGENT_DIR, "fusion_agent.py"), f"{AGENT_REMOTE_DIR}/fusion_agent.py"
+        )
+        if ok:
+            ok, msg = SSHClient.upload_file(
+                ip, u, p, os.path.join(AGENT_DIR, "fusion-agent.service"),
+                "/etc/systemd/system/fusion-agent.service"
+            )
+        if ok:
+            ok, msg = SSHClient.execute(
+                ip, u, p,
+                f"printf %s {shlex.quote(_agent_env(ip))} > /etc/default/fusion-agent && "
+                "chmod 600 /etc/default/fusion-agent && "
+                "systemctl daemon-reload && systemctl enable fusion-agent >/dev/null 2>&1 && "
+                "systemctl restart fusion-agent && systemctl is-active fusion-agent"
+            )
+            ok = ok and "active" in msg
+
+        if ok:
+            await update.message.reply_text(f"🛰 Agent `{ip}` aktif", parse_mode="Markdown")
+        else:
+            await update.message.reply_text(f"❌ Agent `{ip}` gagal: {msg}", parse_mode="Markdown")
+
+    await update.message.reply_text("✅ Deploy agent selesai!")
+
+
+# ======================================================
+# NODE CONTROLS (PER VPS, DARI INLINE KEYBOARD)
+# ======================================================
+async def _node_target(update: Update, prefix: str):
+    """(ip, vps) dari callback `<prefix><ip>` kalau milik user, selain itu None."""
+    ip = update.callback_query.data.replace(prefix, "", 1)
+    db = load_db()
+    vps = get_user_vps_list(db, update.effective_user.id).get(ip)
+    if vps is None:
+        await update.callback_query.message.reply_text("❌ VPS bukan milik Anda.")
+        return None
+    return ip, vps
+
+
+async def node_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    target = await _node_target(update, "node_status_")
+    if target is None:
+        return
+    ip, vps = target
+
+    # Semua instance di VPS ini dalam 1 perintah SSH
+    blocks = [
+        f"🖥 `{r.ip}`\n"
+        f"Status: {'🟢 online' if r.online else '🔴 offline'}\n"
+        f"Score: {r.fmt('score')}\n"
+        f"Reward: {r.fmt('reward')}\n"
+        f"Points: {r.fmt('points')}\n"
+        f"Peer: `{r.peer_str}`"
+        for r in check_nodes(ip, vps)
+    ]
+    await update.callback_query.message.reply_text("\n\n".join(blocks), parse_mode="Markdown")
+
+
+async def _node_systemctl(update: Update, prefix: str, verb: str, done: str):
+    target = await _node_target(update, prefix)
+    if target is None:
+        return None
+    ip, vps = target
+
+    ok, out = SSHClient.execute(ip, vps.user, vps.password, nodes.systemctl_command(vps.nodes(), verb))
+    if ok:
+        await update.callback_query.message.reply_text(f"{done} `{ip}`", parse_mode="Markdown")
+    else:
+        await update.callback_query.message.reply_text(
+            f"❌ {verb} `{ip}` gagal: {out.strip()[:300]}", parse_mode="Markdown"
+        )
+    return ip if ok else None
 
-        # Directory yang benar untuk gensyn
-        SSHClient.execute(ip, u, p, "mkdir -p /root/.config/gensyn")
 
-        for fn, path in keys.items():
-            remote = f"/root/.config/gensyn/{fn}"
-            ok, msg = SSHClient.upload_file(ip, u, p, path, remote)
+async def node_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await _node_systemctl(update, "node_start_", "start", "▶️ Node berjalan di")
 
-            if ok:
-                await update.message.reply_text(f"📤 `{fn}` → `{ip}` OK", parse_mode="Markdown")
-            else:
-                await update.message.reply_text(f"❌ `{fn}` → `{ip}` gagal: {msg}", parse_mode="Markdown")
 
-    await update.message.reply_text("✅ Sync selesai!")
+async def node_restart(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    ip = await _node_systemctl(update, "node_restart_", "restart", "🔄 Node direstart di")
+    if ip:
+        invalidate_peers([ip], "restart")
+
+
+async def node_stop(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    target = await _node_target(update, "node_stop_")
+    if target is None:
+        return
+    ip, vps = target
+
+    ok, out = SSHClient.execute(ip, vps.user, vps.password, nodes.systemctl_command(vps.nodes(), "stop"))
+    if ok:
+        await update.callback_query.message.reply_text(f"🛑 Node dihentikan di `{ip}`", parse_mode="Markdown")
+    else:
+        await update.callback_query.message.reply_text(
+            f"❌ stop `{ip}` gagal: {out.strip()[:300]}", parse_mode="Markdown"
+        )
+
+
+def _log_target(update: Update, nid):
+    """(vps, instance) untuk node `ip` / `ip/name` milik user, selain itu None."""
+    ip, name = split_node(nid)
+    vps = get_user_vps_list(load_db(), update.effective_user.id).get(ip)
+    inst = vps.node(name) if vps is not None else None
+    return (vps, inst) if inst is not None else None
+
+
+async def node_logs(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """📄 Logs → halaman terbaru (filter terakhir dari /logs untuk node ini)."""
+    nid = update.callback_query.data.replace("node_logs_", "", 1)
+    target = _log_target(update, nid)
+    if target is None:
+        await update.callback_query.message.reply_text("❌ VPS bukan milik Anda.")
+        return
+    await _send_log_page(update, context, nid, *target)
+
+
+async def logs_page(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Navigasi ◀️/▶️: callback `logs_o_<node>_<byte>` / `logs_n_<node>_<byte>`."""
+    data = update.callback_query.data
+    direction = "newer" if data.startswith("logs_n_") else "older"
+    nid, _, cursor = data[len("logs_o_"):].rpartition("_")
+
+    target = _log_target(update, nid)
+    if target is None or not cursor.isdigit():
+        await update.callback_query.message.reply_text("❌ VPS bukan milik Anda.")
+        return
+    await _send_log_page(update, context, nid, *target, int(cursor), direction, edit=True)
+
+
+async def logs_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/logs IP[/instance] [level=error|warn] [grep=regex] [since=2h] [until=30m] | /logs IP reset"""
+    args = update.message.text.split()[1:]
+    if not args:
+        await update.message.reply_text(
+            "Gunakan: `/logs IP[/instance] [level=error|warn] [grep=regex] [since=2h] [until=30m]`\n"
+            "`/logs IP reset` untuk hapus filter.",
+            parse_mode="Markdown"
+        )
+        return
+
+    nid = args[0]
+    target = _log_target(update, nid)
+    if target is None:
+        await update.message.reply_text("❌ VPS / instance bukan milik Anda.")
+        return
+
+    filters = context.user_data.setdefault("log_filters", {}) if context.user_data is not None else {}
+    if args[1:] == ["reset"]:
+        filters.pop(nid, None)
+    elif args[1:]:
+        flt, error = logviewer.parse_filter(args[1:])
+        if flt is None:
+            await update.message.reply_text(f"❌ {error}")
+            return
+        filters[nid] = flt
+    await _send_log_page(update, context, nid, *target)
+
+
+async def _send_log_page(update: Update, context: ContextTypes.DEFAULT_TYPE, nid, vps, inst,
+                         cursor=None, direction="older", edit=False):
+    user_data = context.user_data if context.user_data is not None else {}
+    flt = user_data.get("log_filters", {}).get(nid)
+    message = update.message or update.callback_query.message
+    ip, _ = split_node(nid)
+
+    ok, page = logviewer.fetch_page(ip, vps.user, vps.password, flt, cursor, direction, path=inst.log)
+    if not ok:
+        await message.reply_text(f"❌ Gagal baca log `{nid}`: {page}", parse_mode="Markdown")
+        return
+
+    text = logviewer.render(nid, page, flt)
+    keyboard = logviewer.page_keyboard(nid, page)
+    if edit:
+        # Navigasi halaman → edit pesan yang sama
+        try:
+            await update.callback_query.edit_message_text(text, parse_mode="Markdown", reply_markup=keyboard)
+            return
+        except Exception:
+            pass
+    await message.reply_text(text, parse_mode="Markdown", reply_markup=keyboard)
 
 
 # ======================================================
@@ -7,7 +7,7 @@ from typing import List
 from telegram import Update
 
 # Load config
-from bot.config import ADMIN_ID, ADMIN_CHAT_ID
+from bot.config import ADMIN_IDS, ADMIN_CHAT_ID
 
 
 # ============================================================
@@ -31,7 +31,7 @@ def _parse_admin_list(value: str) -> List[int]:
 def get_admin_ids() -> List[int]:
     """
     Ambil daftar admin dari:
-    - config.ADMIN_ID (lama)
+    - config.ADMIN_IDS (ADMIN_IDS / ADMIN_ID dari .env)
     - config.ADMIN_CHAT_ID (opsional)
     - ENV ADMIN_ID, ADMIN_IDS
     - Bisa diperluas nanti dari DB
@@ -43,8 +43,7 @@ def get_admin_ids() -> List[int]:
     admin_ids = []
 
     # 1. From config.py
-    if ADMIN_ID and str(ADMIN_ID).isdigit():
-        admin_ids.append(int(ADMIN_ID))
+    admin_ids += ADMIN_IDS
 
     if ADMIN_CHAT_ID and str(ADMIN_CHAT_ID).isdigit():
         admin_ids.append(int(ADMIN_CHAT_ID))
@@ -1,6 +1,7 @@
 import logging
 import argparse
 import os
+import secrets
 from telegram.ext import (
     ApplicationBuilder,
     CommandHandler,
@@ -9,7 +10,11 @@ from telegram.ext import (
     filters
 )
 
-from bot.config import BOT_TOKEN
+from bot.config import (
+    BOT_TOKEN, BOT_MODE, CONCURRENT_UPDATES,
+    WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_LISTEN, WEBHOOK_PORT,
+    WEBHOOK_SECRET, WEBHOOK_MAX_CONNECTIONS, BOT_WORKERS
+)
 from bot.handlers import start_handler, message_handler, callback_handler
 from bot.utils import ensure_dirs
 
@@ -25,22 +30,21 @@ logger = logging.getLogger("DeklanFusionBot")
 
 
 # ============================================================
-# MAIN BOT STARTER
+# APPLICATION BUILDER
 # ============================================================
-def main(token=None):
+def build_application(bot_token, concurrent_updates=CONCURRENT_UPDATES, updater=True):
+    """Build Application + register semua handler."""
+    # Request Bot API dengan span tracing + metrics latency
+    from bot.tracing import traced_request
+    builder = ApplicationBuilder().token(bot_token).request(traced_request())
 
-    ensure_dirs()  # Create keys, logs, tmp if not exist
-
-    # Token handling
-    bot_token = token or os.getenv("BOT_TOKEN") or BOT_TOKEN
-    if not bot_token:
-        logger.error("❌ BOT_TOKEN tidak ditemukan! Set di .env atau argumen.")
-        return
+    if concurrent_updates and concurrent_updates > 1:
+        builder = builder.concurrent_updates(concurrent_updates)
 
-    logger.info("🔄 Initializing Telegram Bot…")
+    if not updater:
+        builder = builder.updater(None)
 
-    # Build Application
-    app = ApplicationBuilder().token(bot_token).build()
+    app = builder.build()
 
     # --------------------------------------------------------
     # COMMAND HANDLERS
@@ -50,6 +54,14 @@ def main(token=None):
     app.add_handler(CommandHandler("removevps", message_handler))
     app.add_handler(CommandHandler("listvps", message_handler))
     app.add_handler(CommandHandler("menu", message_handler))
+    app.add_handler(CommandHandler("deployagent", message_handler))
+    app.add_handler(CommandHandler("metrics", message_handler))
+    app.add_handler(CommandHandler("trace", message_handler))
+    app.add_handler(CommandHandler("profile", message_handler))
+    app.add_handler(CommandHandler("logs", message_handler))
+    app.add_handler(CommandHandler("resources", message_handler))
+    app.add_handler(CommandHandler("nodes", message_handler))
+    app.add_handler(CommandHandler("provision", message_handler))
 
     # --------------------------------------------------------
     # CALLBACK QUERY (BUTTON HANDLER)
@@ -65,11 +77,100 @@ def main(token=None):
     # Normal text messages
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, message_handler))
 
+    return app
+
+
+# ============================================================
+# RUN (POLLING / WEBHOOK)
+# ============================================================
+def run_application(app, mode=None, webhook_url=None, listen=None, port=None,
+                    secret_token=None, max_connections=None):
+    """Jalankan Application dengan polling atau webhook (blocking)."""
+    mode = (mode or BOT_MODE).lower()
+
+    if mode == "webhook":
+        base_url = (webhook_url or WEBHOOK_URL).rstrip("/")
+        if not base_url:
+            logger.error("❌ Mode webhook butuh WEBHOOK_URL / --webhook-url.")
+            return
+
+        secret = secret_token or WEBHOOK_SECRET
+        if not secret:
+            secret = secrets.token_urlsafe(32)
+            logger.warning("⚠️ WEBHOOK_SECRET kosong, pakai secret random untuk sesi ini.")
+
+        listen = listen or WEBHOOK_LISTEN
+        port = port or WEBHOOK_PORT
+
+        logger.info(
+            f"🔥 Deklan Fusion Bot started (webhook) on {listen}:{port}{WEBHOOK_PATH} "
+            f"→ {base_url}{WEBHOOK_PATH}"
+        )
+        app.run_webhook(
+            listen=listen,
+            port=port,
+            url_path=WEBHOOK_PATH.lstrip("/"),
+            webhook_url=f"{base_url}{WEBHOOK_PATH}",
+            secret_token=secret,
+            max_connections=max_connections or WEBHOOK_MAX_CONNECTIONS,
+            close_loop=False
+        )
+        return
+
+    logger.info("🔥 Deklan Fusion Bot started and running!")
+    app.run_polling(close_loop=False)  # prevent asyncio loop breaking
+
+
+# ============================================================
+# MAIN BOT STARTER
+# ============================================================
+def main(token=None, mode=None, webhook_url=None, listen=None, port=None,
+         secret_token=None, concurrent_updates=None, max_connections=None,
+         workers=None):
+
+    ensure_dirs()  # Create keys, logs, tmp if not exist
+
+    # Token handling
+    bot_token = token or os.getenv("BOT_TOKEN") or BOT_TOKEN
+    if not bot_token:
+        logger.error("❌ BOT_TOKEN tidak ditemukan! Set di .env atau argumen.")
+        return
+
+    if concurrent_updates is None:
+        concurrent_updates = CONCURRENT_UPDATES
+
+    if workers is None:
+        workers = BOT_WORKERS
+
+    # Multi-process: 1 ingress + N worker (sharded by user_id)
+    if workers and workers > 1:
+        from bot.cluster import build_ingress
+        logger.info(f"🔄 Initializing ingress for {workers} bot workers…")
+        app = build_ingress(bot_token, workers, concurrent_updates)
+    else:
+        logger.info("🔄 Initializing Telegram Bot…")
+        app = build_application(bot_token, concurrent_updates)
+
+    # Collector push node agent (opsional, hanya di proses utama)
+    from bot.collector import start_collector
+    start_collector()
+
+    # Metrics: snapshot proses ini + endpoint Prometheus (opsional)
+    from bot import metrics
+    metrics.start_dumper("bot-ingress" if workers and workers > 1 else "bot")
+    metrics.start_exporter()
+
     # --------------------------------------------------------
     # BOT ONLINE
     # --------------------------------------------------------
-    logger.info("🔥 Deklan Fusion Bot started and running!")
-    app.run_polling(close_loop=False)  # prevent asyncio loop breaking
+    run_application(
+        app, mode,
+        webhook_url=webhook_url,
+        listen=listen,
+        port=port,
+        secret_token=secret_token,
+        max_connections=max_connections
+    )
 
 
 # ============================================================
@@ -82,6 +183,18 @@ if __name__ == "__main__":
     parser.add_argument("--admin-id", type=str, default=None)
     parser.add_argument("--admin-chat-id", type=str, default=None)
 
+    # Update ingestion
+    parser.add_argument("--mode", choices=["polling", "webhook"], default=None)
+    parser.add_argument("--webhook-url", type=str, default=None)
+    parser.add_argument("--listen", type=str, default=None)
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--secret-token", type=str, default=None)
+    parser.add_argument("--concurrent-updates", type=int, default=None)
+    parser.add_argument("--max-connections", type=int, default=None)
+
+    # Multi-process workers (sharded by user_id)
+    parser.add_argument("--workers", type=int, default=None)
+
     args = parser.parse_args()
 
     # Override environment if provided
@@ -95,4 +208,14 @@ if __name__ == "__main__":
         os.environ["ADMIN_CHAT_ID"] = args.admin_chat_id
 
     # Start
-    main(token=args.token)
+    main(
+        token=args.token,
+        mode=args.mode,
+        webhook_url=args.webhook_url,
+        listen=args.listen,
+        port=args.port,
+        secret_token=args.secret_token,
+        concurrent_updates=args.concurrent_updates,
+        max_connections=args.max_connections,
+        workers=args.workers
+    )
@@ -0,0 +1,317 @@
+"""
+Multi-process bot: 1 ingress + N worker, di-shard per user_id.
+
+    ┌──────────┐   unix socket (JSON per baris)   ┌──────────┐
+    │ ingress  │ ───────────────────────────────▶ │ worker 0 │
+    │ polling/ │ ◀─────────── ack update_id ───── │ worker 1 │
+    │ webhook  │ ───────────────────────────────▶ │   ...    │
+    └──────────┘                                  └──────────┘
+
+- Ingress hanya menerima update (polling / webhook) lalu meneruskan
+  `update.to_json()` ke worker `user_id % N`. Satu user selalu ke worker
+  yang sama → rate limiter & user_data tetap konsisten.
+- Tiap worker menjalankan Application lengkap (tanpa Updater) dengan
+  semua handler biasa. DB dibagi lewat bot.db (flock + merge per user).
+- Ingress mengawasi worker: kalau satu crash, di-restart; update untuk
+  shard itu tertahan di queue sampai worker hidup lagi, shard lain
+  tetap jalan.
+- Worker meng-ack `update_id` setelah update masuk update_queue-nya.
+  Update yang sudah terkirim tapi belum di-ack (write sukses tepat
+  sebelum worker mati) dikirim ulang setelah reconnect. Update yang
+  sudah di-ack lalu worker mati sebelum selesai memprosesnya TIDAK
+  diulang: handler bisa punya efek samping (create swap) dan update
+  yang bikin crash tidak boleh bikin crash-loop.
+
+Jalankan:
+    python3 -m bot.bot --workers 4 [--mode webhook ...]
+"""
+import os
+import sys
+import json
+import signal
+import asyncio
+import logging
+import argparse
+
+from telegram import Update
+from telegram.ext import ApplicationBuilder, TypeHandler
+
+from bot.config import TMP_DIR, MAX_SSH_SESSIONS, CONCURRENT_UPDATES
+from bot import metrics
+
+logger = logging.getLogger(__name__)
+
+SOCKET_DIR = os.path.join(TMP_DIR, "cluster")
+
+# Update yang boleh tertahan per shard selama worker restart
+SHARD_QUEUE_SIZE = 10000
+# Update terkirim yang belum di-ack per shard sebelum sender menunggu
+SHARD_INFLIGHT = 1000
+
+RESTART_DELAY = 2.0
+RESTART_DELAY_MAX = 60.0
+
+
+def socket_path(shard: int) -> str:
+    return os.path.join(SOCKET_DIR, f"shard-{shard}.sock")
+
+
+def shard_for(update: Update, workers: int) -> int:
+    """Pilih shard dari user_id (fallback chat_id)."""
+    if update.effective_user:
+        key = update.effective_user.id
+    elif update.effective_chat:
+        key = update.effective_chat.id
+    else:
+        key = update.update_id
+    return abs(int(key)) % workers
+
+
+# ============================================================
+# INGRESS
+# ============================================================
+class Ingress:
+    """Forward update ke worker + supervisi proses worker."""
+
+    def __init__(self, token: str, workers: int, concurrent_updates: int):
+        self.token = token
+        self.workers = workers
+        self.concurrent_updates = concurrent_updates
+        self.queues = []
+        self.unacked = []           # per shard: update_id → baris terkirim
+        self.procs = {}
+        self.tasks = []
+        self.stopping = False
+
+    # --------------------------------------------------------
+    # Forward
+    # --------------------------------------------------------
+    async def forward(self, update: Update, context):
+        shard = shard_for(update, self.workers)
+        try:
+            self.queues[shard].put_nowait((update.update_id, update.to_json()))
+        except asyncio.QueueFull:
+            logger.error(f"Shard {shard} queue penuh, update {update.update_id} dibuang")
+
+    async def _read_acks(self, shard: int, reader, acked: asyncio.Event):
+        """Hapus update yang di-ack worker dari unacked. Selesai = koneksi putus."""
+        unacked = self.unacked[shard]
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    unacked.pop(int(line), None)
+                except ValueError:
+                    logger.warning(f"Shard {shard}: ack rusak {line[:40]!r}")
+                acked.set()
+        except (ConnectionError, OSError):
+            pass
+        acked.set()
+
+    async def _sender(self, shard: int):
+        """Kirim isi queue shard ke socket worker, kirim ulang yang belum di-ack setelah reconnect."""
+        queue = self.queues[shard]
+        unacked = self.unacked[shard]
+        acked = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        writer = acks = None
+        resend = []
+
+        while not self.stopping:
+            if writer is not None and acks.done():
+                logger.warning(f"Shard {shard} koneksi putus, reconnect…")
+                writer.close()
+                writer = None
+
+            if writer is None:
+                try:
+                    reader, writer = await asyncio.open_unix_connection(socket_path(shard))
+                except (FileNotFoundError, ConnectionRefusedError, OSError):
+                    await asyncio.sleep(0.5)
+                    continue
+                acks = loop.create_task(self._read_acks(shard, reader, acked))
+                resend = list(unacked.values())
+                if resend:
+                    logger.warning(f"Shard {shard}: kirim ulang {len(resend)} update yang belum di-ack")
+
+            try:
+                if resend:
+                    writer.writelines(resend)
+                    resend = []
+                    await writer.drain()
+
+                if len(unacked) >= SHARD_INFLIGHT:
+                    acked.clear()
+                    await acked.wait()
+                    continue
+
+                # Tunggu update baru, atau koneksi putus (resend tanpa menunggu update)
+                get = loop.create_task(queue.get())
+                await asyncio.wait({get, acks}, return_when=asyncio.FIRST_COMPLETED)
+                if not get.done():
+                    get.cancel()
+                    continue
+
+                update_id, data = get.result()
+                line = data.encode("utf-8") + b"\n"
+                unacked[update_id] = line
+                writer.write(line)
+                await writer.drain()
+            except (ConnectionError, OSError) as e:
+                logger.warning(f"Shard {shard} koneksi putus ({e}), reconnect…")
+                writer.close()
+                writer = None
+
+    # --------------------------------------------------------
+    # Supervisor
+    # --------------------------------------------------------
+    def _worker_env(self) -> dict:
+        env = dict(os.environ)
+        env["BOT_TOKEN"] = self.token
+        env["BOT_WORKERS"] = "1"
+        # Budget SSH global dibagi rata ke semua worker
+        env["MAX_SSH_SESSIONS"] = str(max(1, MAX_SSH_SESSIONS // self.workers))
+        return env
+
+    async def _supervise(self, shard: int):
+        delay = RESTART_DELAY
+        while not self.stopping:
+            proc = await asyncio.create_subprocess_exec(
+                sys.executable, "-m", "bot.cluster",
+                "--shard", str(shard),
+                "--socket", socket_path(shard),
+                "--concurrent-updates", str(self.concurrent_updates),
+                env=self._worker_env()
+            )
+            self.procs[shard] = proc
+            logger.info(f"👷 Worker {shard} started (pid {proc.pid})")
+
+            code = await proc.wait()
+            if self.stopping:
+                break
+
+            logger.error(f"💥 Worker {shard} exit code {code}, restart dalam {delay:.0f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RESTART_DELAY_MAX)
+
+    async def start(self, app):
+        os.makedirs(SOCKET_DIR, exist_ok=True)
+        self.queues = [asyncio.Queue(SHARD_QUEUE_SIZE) for _ in range(self.workers)]
+        self.unacked = [{} for _ in range(self.workers)]
+        loop = asyncio.get_running_loop()
+        for shard in range(self.workers):
+            self.tasks.append(loop.create_task(self._supervise(shard)))
+            self.tasks.append(loop.create_task(self._sender(shard)))
+
+    async def stop(self, app):
+        self.stopping = True
+        for proc in self.procs.values():
+            if proc.returncode is None:
+                proc.terminate()
+        for proc in self.procs.values():
+            try:
+                await asyncio.wait_for(proc.wait(), 10)
+            except asyncio.TimeoutError:
+                proc.kill()
+        for task in self.tasks:
+            task.cancel()
+
+    def queue_depths(self):
+        """Update yang belum diterima worker (antri + belum di-ack) per shard."""
+        return [q.qsize() + len(u) for q, u in zip(self.queues, self.unacked)]
+
+
+def build_ingress(token: str, workers: int, concurrent_updates: int = CONCURRENT_UPDATES):
+    """Application ringan yang hanya meneruskan update ke worker."""
+    ingress = Ingress(token, workers, concurrent_updates)
+    metrics.REGISTRY.gauge(
+        "fusion_shard_queue_depth", "Update tertahan per shard di ingress", ("shard",),
+        fn=lambda: {(str(i),): n for i, n in enumerate(ingress.queue_depths())}
+    )
+    app = (
+        ApplicationBuilder()
+        .token(token)
+        .post_init(ingress.start)
+        .post_shutdown(ingress.stop)
+        .build()
+    )
+    app.add_handler(TypeHandler(Update, ingress.forward))
+    app.bot_data["ingress"] = ingress
+    return app
+
+
+# ============================================================
+# WORKER
+# ============================================================
+async def run_worker(token: str, shard: int, path: str, concurrent_updates: int):
+    from bot.bot import build_application
+
+    app = build_application(token, concurrent_updates, updater=False)
+    metrics.start_dumper(f"bot-worker-{shard}")
+    await app.initialize()
+    await app.start()
+
+    async def on_connection(reader, writer):
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                data = json.loads(line)
+                update_id = data["update_id"]
+            except (ValueError, KeyError, TypeError) as e:
+                logger.error(f"Worker {shard}: update rusak: {e}")
+                continue
+            try:
+                await app.update_queue.put(Update.de_json(data, app.bot))
+            except Exception as e:
+                # Tetap di-ack: kirim ulang tidak akan memperbaikinya
+                logger.error(f"Worker {shard}: update {update_id} rusak: {e}")
+            try:
+                writer.write(f"{update_id}\n".encode("utf-8"))
+                await writer.drain()
+            except (ConnectionError, OSError):
+                break   # ingress kirim ulang yang belum di-ack setelah reconnect
+        writer.close()
+
+    if os.path.exists(path):
+        os.unlink(path)
+    server = await asyncio.start_unix_server(on_connection, path=path)
+    os.chmod(path, 0o600)
+    logger.info(f"👷 Worker {shard} listening on {path}")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    await stop.wait()
+
+    server.close()
+    await server.wait_closed()
+    await app.stop()
+    await app.shutdown()
+    if os.path.exists(path):
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        format="%(asctime)s — %(name)s — %(levelname)s — %(message)s",
+        level=logging.INFO
+    )
+
+    parser = argparse.ArgumentParser(description="Deklan Fusion bot worker")
+    parser.add_argument("--shard", type=int, required=True)
+    parser.add_argument("--socket", type=str, required=True)
+    parser.add_argument("--concurrent-updates", type=int, default=CONCURRENT_UPDATES)
+    args = parser.parse_args()
+
+    token = os.getenv("BOT_TOKEN", "")
+    if not token:
+        logger.error("❌ BOT_TOKEN tidak ditemukan untuk worker.")
+        sys.exit(1)
+
+    asyncio.run(run_worker(token, args.shard, args.socket, args.concurrent_updates))
@@ -0,0 +1,130 @@
+"""
+Collector untuk push dari node agent (`agent/fusion_agent.py`).
+
+Agent POST ringkasan JSON ke:
+
+    POST /agent
+    X-Fusion-Agent-Token: <agent_token(ip)>
+    {"host": "1.2.3.4", "status": "online", "score": "800", ...}
+
+Token per host = HMAC-SHA256(AGENT_TOKEN, ip); `/deployagent` hanya
+menulis token host itu ke VPS-nya. `"host"` di payload cuma klaim: push
+ditolak (403) kalau token tidak cocok dengan host tersebut, jadi token
+yang dibaca tenant dari VPS-nya sendiri tidak bisa dipakai untuk host lain.
+
+Ringkasan disimpan ke `db["vps"][ip]["agent"]`; selama masih fresh
+(AGENT_MAX_AGE) check_nodes memakai data ini tanpa SSH sama sekali.
+Host yang tidak terdaftar di DB ditolak.
+
+Jalan sebagai thread di proses bot (AGENT_COLLECTOR_PORT > 0) atau
+standalone:
+    python3 -m bot.collector [--listen 0.0.0.0] [--port 8780]
+"""
+import hmac
+import json
+import hashlib
+import logging
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bot.config import AGENT_COLLECTOR_LISTEN, AGENT_COLLECTOR_PORT, AGENT_TOKEN
+from bot.db import load_db, transaction, find_host
+from bot.reward_checker import agent_state
+
+logger = logging.getLogger(__name__)
+
+COLLECTOR_PATH = "/agent"
+
+# Ringkasan agent kecil; tolak body yang tidak masuk akal
+MAX_BODY = 64 * 1024
+
+
+def agent_token(ip: str) -> str:
+    """Token push khusus satu host (diturunkan dari AGENT_TOKEN)."""
+    return hmac.new(AGENT_TOKEN.encode("utf-8"), ip.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+class AgentHandler(BaseHTTPRequestHandler):
+    server_version = "FusionCollector/1"
+
+    def _reply(self, code: int, body: str = ""):
+        data = body.encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        if self.path.rstrip("/") != COLLECTOR_PATH:
+            return self._reply(404, "not found")
+
+        token = self.headers.get("X-Fusion-Agent-Token", "")
+        if not AGENT_TOKEN or not token:
+            return self._reply(403, "forbidden")
+
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0 or length > MAX_BODY:
+            return self._reply(413, "bad length")
+
+        try:
+            summary = json.loads(self.rfile.read(length))
+        except ValueError:
+            return self._reply(400, "bad json")
+        if not isinstance(summary, dict):
+            return self._reply(400, "bad json")
+
+        # Host dari payload (VPS di belakang NAT), fallback IP pengirim.
+        # Hanya dipercaya kalau token memang milik host itu.
+        ip = str(summary.get("host") or self.client_address[0])
+        if not hmac.compare_digest(token, agent_token(ip)):
+            logger.warning(f"Push agent ditolak: token bukan milik {ip} ({self.client_address[0]})")
+            return self._reply(403, "forbidden")
+
+        _, entry = find_host(load_db(), ip)
+        if entry is None:
+            logger.warning(f"Push agent dari host tidak dikenal: {ip}")
+            return self._reply(404, "unknown host")
+
+        with transaction(("vps", ip)) as db:
+            db.setdefault("vps", {}).setdefault(ip, {})["agent"] = agent_state(summary, "push")
+
+        self._reply(204)
+
+    def log_message(self, fmt, *args):
+        logger.debug(f"{self.address_string()} {fmt % args}")
+
+
+def start_collector(listen: str = AGENT_COLLECTOR_LISTEN, port: int = AGENT_COLLECTOR_PORT):
+    """Start collector di daemon thread. Return server (atau None kalau nonaktif)."""
+    if not port:
+        return None
+    if not AGENT_TOKEN:
+        logger.error("❌ AGENT_COLLECTOR_PORT di-set tapi AGENT_TOKEN kosong, collector tidak dijalankan.")
+        return None
+
+    server = ThreadingHTTPServer((listen, port), AgentHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="agent-collector", daemon=True).start()
+    logger.info(f"🛰 Agent collector listening on {listen}:{port}{COLLECTOR_PATH}")
+    return server
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        format="%(asctime)s — %(name)s — %(levelname)s — %(message)s",
+        level=logging.INFO
+    )
+
+    parser = argparse.ArgumentParser(description="Deklan Fusion agent collector")
+    parser.add_argument("--listen", type=str, default=AGENT_COLLECTOR_LISTEN)
+    parser.add_argument("--port", type=int, default=AGENT_COLLECTOR_PORT or 8780)
+    args = parser.parse_args()
+
+    server = start_collector(args.listen, args.port)
+    if server is not None:
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
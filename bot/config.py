@@ -51,6 +51,20 @@ TMP_DIR = os.path.join(BASE_DIR, "tmp")
 
 DB_PATH = os.path.join(BASE_DIR, "fusion_db.json")
 
+# Write-behind DB: flush tiap N detik atau setelah N mutasi
+try:
+    DB_FLUSH_INTERVAL = float(os.getenv("DB_FLUSH_INTERVAL", "2"))
+except ValueError:
+    DB_FLUSH_INTERVAL = 2.0
+
+try:
+    DB_FLUSH_THRESHOLD = int(os.getenv("DB_FLUSH_THRESHOLD", "50"))
+except ValueError:
+    DB_FLUSH_THRESHOLD = 50
+
+# Snapshot biner hasil probe monitor (dibaca bot via mmap)
+SNAPSHOT_PATH = os.path.join(BASE_DIR, "fleet_snapshot.bin")
+
 
 # ============================================================
 # 🔑 GENSYN REQUIRED FILES
@@ -70,6 +84,278 @@ MAX_FILE_SIZE_MB = 5
 ALLOWED_EXT = ["pem", "json"]
 
 
+# ============================================================
+# 🚦 RATE LIMIT & SSH FAN-OUT BUDGET
+# ============================================================
+
+def _env_int(name, default):
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _env_float(name, default):
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+# Token bucket per user (1 token = 1 VPS yang disentuh)
+RATE_LIMIT_BURST = _env_int("RATE_LIMIT_BURST", 30)
+RATE_LIMIT_REFILL = _env_float("RATE_LIMIT_REFILL", 0.5)   # token per detik
+
+# Batas global sesi SSH bersamaan (semua user)
+MAX_SSH_SESSIONS = _env_int("MAX_SSH_SESSIONS", 32)
+
+# Berapa lama request boleh antri menunggu slot SSH (detik)
+SSH_QUEUE_TIMEOUT = _env_float("SSH_QUEUE_TIMEOUT", 60)
+
+
+# ============================================================
+# 📥 BULK IMPORT VPS
+# ============================================================
+# Validasi login SSH bersamaan saat import (juga jumlah slot SSH yang dipakai)
+IMPORT_CONCURRENCY = max(1, _env_int("IMPORT_CONCURRENCY", 16))
+
+# Timeout login per host (detik)
+IMPORT_TIMEOUT = max(1, _env_int("IMPORT_TIMEOUT", 10))
+
+# Maks host per import (file / /addvps multi-baris)
+IMPORT_MAX_HOSTS = max(1, _env_int("IMPORT_MAX_HOSTS", 500))
+
+
+# ============================================================
+# 📋 VPS LIST PAGINATION
+# ============================================================
+# Jumlah VPS per halaman inline keyboard (Telegram limit ±100 tombol)
+VPS_PAGE_SIZE = max(1, _env_int("VPS_PAGE_SIZE", 10))
+
+
+# ============================================================
+# 📡 UPDATE INGESTION (POLLING / WEBHOOK)
+# ============================================================
+# polling (default) atau webhook
+BOT_MODE = os.getenv("BOT_MODE", "polling").strip().lower() or "polling"
+
+# URL publik yang didaftarkan ke Telegram, contoh: https://bot.example.com
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "").strip().rstrip("/")
+WEBHOOK_PATH = "/" + os.getenv("WEBHOOK_PATH", "telegram").strip().strip("/")
+
+# HTTP server lokal (biasanya di belakang nginx/caddy)
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "127.0.0.1").strip()
+WEBHOOK_PORT = _env_int("WEBHOOK_PORT", 8443)
+
+# Header X-Telegram-Bot-Api-Secret-Token (kosong → random per start)
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "").strip()
+
+# Maks koneksi paralel dari Telegram ke webhook (1-100)
+WEBHOOK_MAX_CONNECTIONS = _env_int("WEBHOOK_MAX_CONNECTIONS", 40)
+
+# Jumlah update yang diproses bersamaan oleh Application
+# (1 = berurutan seperti sebelumnya; naikkan untuk webhook / traffic tinggi)
+CONCURRENT_UPDATES = _env_int("CONCURRENT_UPDATES", 1)
+
+# >1 → 1 proses ingress + N proses worker, update di-shard per user_id
+BOT_WORKERS = _env_int("BOT_WORKERS", 1)
+
+
+# ============================================================
+# 🗂 FLEET SNAPSHOT
+# ============================================================
+# Data snapshot lebih tua dari ini dianggap basi → fallback ke SSH
+SNAPSHOT_MAX_AGE = _env_int("SNAPSHOT_MAX_AGE", 4 * 3600)
+
+
+# ============================================================
+# 🛰 NODE AGENT (OPSIONAL)
+# ============================================================
+# Lokasi ringkasan yang ditulis agent di VPS (dibaca bot 1x SSH `cat`)
+AGENT_SUMMARY_PATH = os.getenv("AGENT_SUMMARY_PATH", "/var/lib/fusion-agent/summary.json")
+
+# Ringkasan agent lebih tua dari ini → fallback ke grep log via SSH
+AGENT_MAX_AGE = _env_int("AGENT_MAX_AGE", 300)
+
+# Collector push dari agent (0 = nonaktif)
+AGENT_COLLECTOR_LISTEN = os.getenv("AGENT_COLLECTOR_LISTEN", "0.0.0.0").strip()
+AGENT_COLLECTOR_PORT = _env_int("AGENT_COLLECTOR_PORT", 0)
+
+# URL collector yang diberikan ke agent saat deploy, contoh: http://bot.example.com:8780/agent
+AGENT_COLLECTOR_URL = os.getenv("AGENT_COLLECTOR_URL", "").strip()
+
+# Header X-Fusion-Agent-Token (wajib kalau collector aktif)
+AGENT_TOKEN = os.getenv("AGENT_TOKEN", "").strip()
+
+
+# ============================================================
+# 🚨 MONITOR ALERTS
+# ============================================================
+# Alert yang masih aktif dikirim ulang paling cepat tiap N detik
+ALERT_REPEAT_INTERVAL = _env_int("ALERT_REPEAT_INTERVAL", 6 * 3600)
+
+# Alert dianggap pulih setelah N siklus monitor berturut-turut tidak muncul
+ALERT_RESOLVE_CYCLES = max(1, _env_int("ALERT_RESOLVE_CYCLES", 1))
+
+# Alert yang muncul lagi < N detik setelah pulih = flapping → tidak dikirim ulang
+ALERT_FLAP_WINDOW = _env_int("ALERT_FLAP_WINDOW", 6 * 3600)
+
+# Maks host yang ditulis per grup alert (sisanya "+N lainnya")
+ALERT_GROUP_MAX_HOSTS = max(1, _env_int("ALERT_GROUP_MAX_HOSTS", 20))
+
+
+# ============================================================
+# 📊 CHANGE REPORT
+# ============================================================
+# full (7 baris per node) / compact (1 baris per node) / changed (hanya yang berubah)
+REPORT_MODE = os.getenv("REPORT_MODE", "full").strip().lower() or "full"
+
+# Mode changed: node masuk report kalau |delta| score/reward/points >= nilai ini
+# (status berubah / error baru selalu masuk)
+REPORT_CHANGE_THRESHOLD = _env_float("REPORT_CHANGE_THRESHOLD", 0.0)
+
+
+# ============================================================
+# 🧮 MONITOR WORKERS
+# ============================================================
+# >1 → host di-shard (consistent hash) ke N proses worker per siklus
+MONITOR_WORKERS = max(1, _env_int("MONITOR_WORKERS", 1))
+
+# Probe (SSH) bersamaan per worker
+MONITOR_CONCURRENCY = max(1, _env_int("MONITOR_CONCURRENCY", 8))
+
+# Titik virtual per worker di hash ring (makin banyak makin rata)
+MONITOR_RING_VNODES = max(1, _env_int("MONITOR_RING_VNODES", 64))
+
+
+# ============================================================
+# 📈 METRICS
+# ============================================================
+# Endpoint Prometheus lokal di proses bot (0 = nonaktif), contoh 9108
+METRICS_LISTEN = os.getenv("METRICS_LISTEN", "127.0.0.1").strip()
+METRICS_PORT = _env_int("METRICS_PORT", 0)
+
+# Interval tiap proses menulis snapshot metrics ke tmp/metrics (detik)
+METRICS_DUMP_INTERVAL = max(1.0, _env_float("METRICS_DUMP_INTERVAL", 15))
+
+
+# ============================================================
+# 🧭 TRACING
+# ============================================================
+# Fraksi update Telegram yang di-trace (0 = mati, 1 = semua)
+TRACE_SAMPLE_RATE = min(1.0, max(0.0, _env_float("TRACE_SAMPLE_RATE", 1.0)))
+
+# Export trace ke LOG_DIR: "" (hanya memory), jsonl, chrome
+TRACE_EXPORT = os.getenv("TRACE_EXPORT", "").strip().lower()
+
+# Trace terakhir yang disimpan di memory untuk /trace last
+TRACE_KEEP = max(1, _env_int("TRACE_KEEP", 200))
+
+# Maks span per trace (sisanya hanya dihitung)
+TRACE_MAX_SPANS = max(1, _env_int("TRACE_MAX_SPANS", 500))
+
+# File export di-rotate (.1) setelah ukuran ini
+TRACE_MAX_BYTES = _env_int("TRACE_MAX_BYTES", 20 * 1024 * 1024)
+
+
+# ============================================================
+# 🔬 PROFILER (/profile)
+# ============================================================
+# Batas atas sesi profile on-demand
+PROFILE_MAX_CALLS = max(1, _env_int("PROFILE_MAX_CALLS", 500))
+PROFILE_MAX_SECONDS = max(1, _env_int("PROFILE_MAX_SECONDS", 600))
+
+# Jumlah fungsi teratas (cumulative time) di ringkasan
+PROFILE_TOP = max(5, _env_int("PROFILE_TOP", 25))
+
+
+# ============================================================
+# 🗄 LOG ARCHIVE (monitor/archiver.py)
+# ============================================================
+ARCHIVE_DIR = os.path.join(BASE_DIR, "archive")
+
+# Interval tarik log baru dari semua VPS (mode loop, detik)
+ARCHIVE_INTERVAL = max(60, _env_int("ARCHIVE_INTERVAL", 900))
+
+# Maks byte log yang ditarik per host per putaran (sisanya putaran berikutnya)
+ARCHIVE_PULL_BYTES = max(65536, _env_int("ARCHIVE_PULL_BYTES", 16 * 1024 * 1024))
+
+# Segment gzip di-rotate setelah ukuran (terkompresi) ini
+ARCHIVE_SEGMENT_BYTES = max(65536, _env_int("ARCHIVE_SEGMENT_BYTES", 8 * 1024 * 1024))
+
+# Batas total arsip per host (segment tertua dihapus), 0 = tanpa batas
+ARCHIVE_MAX_BYTES = _env_int("ARCHIVE_MAX_BYTES", 256 * 1024 * 1024)
+
+# Segment lebih tua dari N hari dihapus (juga host yang sudah tidak ada), 0 = simpan
+ARCHIVE_RETENTION_DAYS = _env_int("ARCHIVE_RETENTION_DAYS", 0)
+
+# Host yang ditarik bersamaan
+ARCHIVE_CONCURRENCY = max(1, _env_int("ARCHIVE_CONCURRENCY", 8))
+
+
+# ============================================================
+# 📄 LOG VIEWER (/logs)
+# ============================================================
+# Maks karakter log per halaman (pesan Telegram maks 4096)
+LOG_PAGE_CHARS = min(3600, max(500, _env_int("LOG_PAGE_CHARS", 3300)))
+
+# Baris log dipotong di VPS sebelum dikirim
+LOG_LINE_WIDTH = max(40, _env_int("LOG_LINE_WIDTH", 300))
+
+# Maks byte log yang di-scan filter per halaman (di VPS)
+LOG_SCAN_BYTES = max(65536, _env_int("LOG_SCAN_BYTES", 8 * 1024 * 1024))
+
+
+# ============================================================
+# 🧮 RESOURCE VPS (/resources, rekomendasi swap)
+# ============================================================
+RESOURCE_DIR = os.path.join(BASE_DIR, "resources")
+
+# Jumlah sampel time series yang disimpan per host (1 sampel per siklus monitor)
+RESOURCE_HISTORY = max(10, _env_int("RESOURCE_HISTORY", 500))
+
+# Target RAM + swap per node (GB), dasar rekomendasi ukuran swap
+RESOURCE_MEM_TARGET_GB = max(1, _env_int("RESOURCE_MEM_TARGET_GB", 64))
+
+# Disk yang tetap dibiarkan kosong setelah swap dibuat (GB)
+RESOURCE_DISK_RESERVE_GB = max(0, _env_int("RESOURCE_DISK_RESERVE_GB", 20))
+
+# Ambang overload: load5 per core, CPU %, RAM tersedia %, swap terpakai %, disk kosong %
+RESOURCE_LOAD_MAX = _env_float("RESOURCE_LOAD_MAX", 1.5)
+RESOURCE_CPU_MAX = _env_float("RESOURCE_CPU_MAX", 95)
+RESOURCE_MEM_MIN_PCT = _env_float("RESOURCE_MEM_MIN_PCT", 10)
+RESOURCE_SWAP_MAX_PCT = _env_float("RESOURCE_SWAP_MAX_PCT", 80)
+RESOURCE_DISK_MIN_PCT = _env_float("RESOURCE_DISK_MIN_PCT", 10)
+
+
+# ============================================================
+# 🛠 PROVISIONING VPS (/provision, step + checkpoint)
+# ============================================================
+# Host yang di-provision bersamaan (juga jumlah slot SSH yang dipakai)
+PROVISION_CONCURRENCY = max(1, _env_int("PROVISION_CONCURRENCY", 8))
+
+# Maks detik tanpa output per gelombang step (apt upgrade / dd swap bisa lama)
+PROVISION_TIMEOUT = max(60, _env_int("PROVISION_TIMEOUT", 3600))
+
+# Baris terakhir log step yang gagal yang ikut dikirim ke Telegram
+PROVISION_LOG_TAIL = max(0, _env_int("PROVISION_LOG_TAIL", 5))
+
+
+# ============================================================
+# 🔁 RETRY OPERASI REMOTE (start node, create swap, sync keys)
+# ============================================================
+# Total percobaan per host (1 = tanpa retry)
+RETRY_ATTEMPTS = max(1, _env_int("RETRY_ATTEMPTS", 3))
+
+# Jeda sebelum retry ke-n: acak 0..min(MAX, BASE × 2^(n-1)) detik
+RETRY_BASE_DELAY = max(0.0, _env_float("RETRY_BASE_DELAY", 2.0))
+RETRY_MAX_DELAY = max(0.0, _env_float("RETRY_MAX_DELAY", 30.0))
+
+# Budget retry per operasi fleet: maks RATIO × jumlah host percobaan ulang (min MIN)
+RETRY_BUDGET_RATIO = max(0.0, _env_float("RETRY_BUDGET_RATIO", 0.5))
+RETRY_BUDGET_MIN = max(0, _env_int("RETRY_BUDGET_MIN", 3))
+
+
 # ============================================================
 # 🌐 DASHBOARD CONFIG (WEB PANEL)
 # ============================================================
@@ -0,0 +1,454 @@
+"""
+Repository DB process-wide (write-behind cache untuk fusion_db.json).
+
+- DB disimpan di memory; `load_db()` = lookup dict + 1x os.stat untuk
+  mendeteksi perubahan dari proses lain (inode/mtime/size).
+- Mutasi ditandai dirty per path (`("users", uid)`, `("vps", ip)`, …)
+  dan di-flush terkumpul: tiap DB_FLUSH_INTERVAL detik, atau langsung
+  kalau sudah DB_FLUSH_THRESHOLD mutasi, dan saat proses exit.
+- Flush: tulis ke file tmp → fsync → rename (atomic, crash-safe).
+- `transaction()` write-through: path yang diubah ditulis ke disk
+  sebelum file lock dilepas, jadi proses lain yang bertransaksi di path
+  yang sama selalu membaca hasilnya (tidak ada lost update antar proses,
+  mis. bot invalidate peer vs monitor menulis cursor error di host yang
+  sama). `save_db()` / `mark_dirty()` tetap write-behind.
+- Kalau file di disk berubah (proses lain menulis) sementara kita punya
+  perubahan, data disk di-merge ke memory kecuali path yang dirty milik
+  kita. Dengan shard per user_id (bot.cluster) setiap user hanya ditulis
+  satu proses, jadi merge per path ini tidak kehilangan update.
+- Secondary index (`db["index"]`) ikut dipersist:
+    owners : ip  → [user_id, …]
+    tags   : tag → [ip, …]
+  plus label stabil per VPS (`users[uid].vps[ip].label`, counter
+  `users[uid].next_label`). Index di-update saat add/remove dan
+  dibangun ulang hanya kalau hilang / versi beda / habis merge.
+"""
+import os
+import json
+import time
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Optional, Tuple
+
+from bot.config import DB_PATH, DB_FLUSH_INTERVAL, DB_FLUSH_THRESHOLD
+from bot.utils import file_lock
+from bot.tracing import span
+from bot.models import VPSRecord, hydrate, encode
+
+logger = logging.getLogger(__name__)
+
+
+INDEX_VERSION = 1
+
+
+def _empty():
+    return {"users": {}}
+
+
+# ============================================================
+# SECONDARY INDEX
+# ============================================================
+def _index_valid(db: dict) -> bool:
+    index = db.get("index")
+    return (
+        isinstance(index, dict)
+        and index.get("version") == INDEX_VERSION
+        and isinstance(index.get("owners"), dict)
+        and isinstance(index.get("tags"), dict)
+    )
+
+
+def build_index(db: dict):
+    """
+    Bangun ulang index dari `users`. Sekaligus kasih label ke VPS lama
+    yang belum punya. Return set user_id yang datanya ikut berubah.
+    """
+    owners = {}
+    tags = {}
+    touched = set()
+
+    for uid, user in db.get("users", {}).items():
+        vps_map = user.setdefault("vps", {})
+        next_label = user.get("next_label", 1)
+        used = [v.label for v in vps_map.values() if isinstance(v.label, int)]
+        if used:
+            next_label = max(next_label, max(used) + 1)
+
+        for ip, vps in vps_map.items():
+            if not isinstance(vps.label, int):
+                vps.label = next_label
+                next_label += 1
+                touched.add(uid)
+
+            owners.setdefault(ip, []).append(uid)
+            for tag in vps.tags:
+                tags.setdefault(tag, []).append(ip)
+
+        if user.get("next_label") != next_label:
+            user["next_label"] = next_label
+            touched.add(uid)
+
+    db["index"] = {"version": INDEX_VERSION, "owners": owners, "tags": tags}
+    return touched
+
+
+class Repository:
+    def __init__(self, path: str = DB_PATH,
+                 flush_interval: float = DB_FLUSH_INTERVAL,
+                 flush_threshold: int = DB_FLUSH_THRESHOLD):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+
+        self.data = _empty()
+        self._ident = None          # (ino, mtime_ns, size) terakhir yang kita lihat/tulis
+        self._loaded = False
+        self._dirty = set()         # path yang berubah di memory
+        self._all_dirty = False     # save_db() tanpa path → overwrite seluruh dokumen
+        self._mutations = 0
+        self._depth = 0             # kedalaman transaction bersarang (thread pemegang _lock)
+
+        self._lock = threading.RLock()
+        self._flusher = None
+        self._wakeup = threading.Event()
+
+    # --------------------------------------------------------
+    # Disk helpers
+    # --------------------------------------------------------
+    def _stat(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def _read(self) -> dict:
+        try:
+            with span("db.read"), open(self.path, "r") as f:
+                db = json.load(f)
+        except FileNotFoundError:
+            return _empty()
+        except Exception as e:
+            logger.error(f"DB {self.path} rusak, pakai DB kosong: {e}")
+            return _empty()
+        if not isinstance(db, dict):
+            return _empty()
+        db.setdefault("users", {})
+        return hydrate(db)
+
+    def _write(self):
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+
+        tmp = f"{self.path}.tmp.{os.getpid()}"
+        with span("db.write"), open(tmp, "w") as f:
+            json.dump(self.data, f, indent=2, default=encode)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+        # fsync direktori supaya rename-nya juga durable
+        try:
+            dir_fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        except OSError:
+            pass
+
+        self._ident = self._stat()
+
+    # --------------------------------------------------------
+    # Merge (in-place, supaya referensi dict yang dipegang caller tetap valid)
+    # --------------------------------------------------------
+    def _replace_all(self, disk: dict):
+        self.data.clear()
+        self.data.update(disk)
+
+    def _merge(self, disk: dict):
+        dirty_top = {p[0] for p in self._dirty if len(p) == 1}
+        dirty_sub = {}
+        for p in self._dirty:
+            if len(p) >= 2:
+                dirty_sub.setdefault(p[0], set()).add(p[1])
+
+        for key in set(self.data) | set(disk):
+            if key in dirty_top:
+                continue
+
+            if key not in dirty_sub:
+                if key in disk:
+                    self.data[key] = disk[key]
+                else:
+                    self.data.pop(key, None)
+                continue
+
+            ours = self.data.setdefault(key, {})
+            theirs = disk.get(key, {})
+            if not isinstance(ours, dict) or not isinstance(theirs, dict):
+                continue
+            for sub in set(ours) | set(theirs):
+                if sub in dirty_sub[key]:
+                    continue
+                if sub in theirs:
+                    ours[sub] = theirs[sub]
+                else:
+                    ours.pop(sub, None)
+
+    def _refresh_locked(self):
+        """Sinkron dengan disk kalau file diubah proses lain."""
+        ident = self._stat()
+        if self._loaded and ident == self._ident:
+            return
+
+        if not self._loaded:
+            self._replace_all(self._read())
+            self._loaded = True
+        elif ident is None:
+            # File dihapus dari luar → biarkan memory, flush berikutnya menulis ulang
+            pass
+        elif self._dirty or self._all_dirty:
+            if not self._all_dirty:
+                self._merge(self._read())
+                self._reindex(force=True)
+        else:
+            self._replace_all(self._read())
+        self._ident = ident
+        self._reindex()
+
+    def _reindex(self, force: bool = False):
+        if not force and _index_valid(self.data):
+            return
+        touched = build_index(self.data)
+        self._dirty.add(("index",))
+        for uid in touched:
+            self._dirty.add(("users", uid))
+        self._ensure_flusher()
+
+    # --------------------------------------------------------
+    # Public API
+    # --------------------------------------------------------
+    def get(self) -> dict:
+        with span("db.load"), self._lock:
+            self._refresh_locked()
+            return self.data
+
+    def mark_dirty(self, *paths):
+        """Tandai path berubah. Tanpa path → seluruh dokumen."""
+        with self._lock:
+            if paths:
+                for p in paths:
+                    self._dirty.add(tuple(str(x) for x in (p if isinstance(p, (tuple, list)) else (p,))))
+            else:
+                self._all_dirty = True
+            self._mutations += 1
+
+            if self._mutations >= self.flush_threshold:
+                self.flush()
+            else:
+                self._ensure_flusher()
+
+    @contextmanager
+    def transaction(self, *paths):
+        """
+        Read-modify-write atomic lintas proses:
+
+            with transaction(("users", uid)) as db:
+                db["users"][uid]["vps"][ip] = {...}
+
+        Refresh dari disk → blok → tulis ke disk, semuanya di bawah satu
+        file lock. Transaction bersarang ditulis sekali oleh yang terluar.
+
+        JANGAN await di dalam blok ini.
+        """
+        with span("db.transaction"), self._lock:
+            with file_lock(self.path):
+                self._depth += 1
+                try:
+                    self._refresh_locked()
+                    yield self.data
+                    self.mark_dirty(*paths)
+                finally:
+                    self._depth -= 1
+                if self._depth == 0:
+                    self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty and not self._all_dirty:
+                return
+            with file_lock(self.path):
+                self._flush_locked()
+
+    def _flush_locked(self):
+        """Tulis perubahan ke disk. Pemanggil sudah memegang _lock + file_lock."""
+        if not self._dirty and not self._all_dirty:
+            return
+        ident = self._stat()
+        if ident is not None and ident != self._ident and not self._all_dirty:
+            self._merge(self._read())
+            build_index(self.data)
+        self._write()
+        self._dirty.clear()
+        self._all_dirty = False
+        self._mutations = 0
+
+    # --------------------------------------------------------
+    # Background flusher
+    # --------------------------------------------------------
+    def _ensure_flusher(self):
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        self._flusher = threading.Thread(target=self._flush_loop, name="db-flusher", daemon=True)
+        self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"DB flush gagal: {e}")
+                time.sleep(self.flush_interval)
+
+    def close(self):
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"DB flush saat exit gagal: {e}")
+
+
+repo = Repository()
+atexit.register(repo.close)
+
+
+# ============================================================
+# MODULE-LEVEL HELPERS (dipakai actions / handlers / monitor)
+# ============================================================
+def load_db() -> dict:
+    """DB in-memory (selalu punya key `users`)."""
+    return repo.get()
+
+
+def save_db(db=None, *paths):
+    """
+    Tandai DB berubah (flush terkumpul di background).
+
+    `paths` membatasi bagian yang berubah, contoh ("users", "123").
+    """
+    repo.mark_dirty(*paths)
+
+
+def transaction(*paths):
+    return repo.transaction(*paths)
+
+
+def flush_db():
+    repo.flush()
+
+
+# ============================================================
+# INDEXED OPERATIONS
+# ============================================================
+def _index(db: dict) -> dict:
+    if not _index_valid(db):
+        build_index(db)
+    return db["index"]
+
+
+def add_host(db: dict, user_id, ip: str, record: VPSRecord, tags=()) -> VPSRecord:
+    """
+    Tambah VPS ke user + update index. Panggil di dalam
+    `transaction(("users", uid), ("index",))`.
+    """
+    uid = str(user_id)
+    user = db["users"].setdefault(uid, {"vps": {}, "keys": {}})
+    index = _index(db)
+
+    label = user.get("next_label", 1)
+    user["next_label"] = label + 1
+
+    record.label = label
+    tags = sorted({t.strip().lower() for t in tags if t and t.strip()})
+    record.tags = tags
+    user.setdefault("vps", {})[ip] = record
+
+    owners = index["owners"].setdefault(ip, [])
+    if uid not in owners:
+        owners.append(uid)
+    for tag in tags:
+        hosts = index["tags"].setdefault(tag, [])
+        if ip not in hosts:
+            hosts.append(ip)
+    return record
+
+
+def remove_host(db: dict, user_id, ip: str) -> bool:
+    """Hapus VPS dari user + index. Label lain tidak bergeser."""
+    uid = str(user_id)
+    vps_map = db["users"].get(uid, {}).get("vps", {})
+    entry = vps_map.pop(ip, None)
+    if entry is None:
+        return False
+
+    index = _index(db)
+    owners = index["owners"].get(ip, [])
+    if uid in owners:
+        owners.remove(uid)
+    if not owners:
+        index["owners"].pop(ip, None)
+
+    for tag in entry.tags:
+        # Host masih punya tag ini lewat owner lain?
+        still = any(
+            ip in db["users"][o]["vps"] and tag in db["users"][o]["vps"][ip].tags
+            for o in index["owners"].get(ip, [])
+        )
+        hosts = index["tags"].get(tag, [])
+        if not still and ip in hosts:
+            hosts.remove(ip)
+        if not hosts:
+            index["tags"].pop(tag, None)
+    return True
+
+
+def owners_of(db: dict, ip: str) -> list:
+    return _index(db)["owners"].get(ip, [])
+
+
+def find_host(db: dict, ip: str):
+    """(user_id, entry) milik owner pertama, atau (None, None)."""
+    for uid in owners_of(db, ip):
+        entry = db["users"].get(uid, {}).get("vps", {}).get(ip)
+        if entry is not None:
+            return uid, entry
+    return None, None
+
+
+def hosts_with_tag(db: dict, tag: str) -> list:
+    return _index(db)["tags"].get(tag.strip().lower(), [])
+
+
+def fleet(db: dict) -> dict:
+    """
+    Semua VPS unik di DB: ip → entry (owner pertama).
+
+    Jalan di atas index owners, tanpa merge ulang dict per user.
+    Entry format lama (`db["vps"][ip]` dengan kredensial) ikut disertakan.
+    """
+    users = db["users"]
+    result = {}
+    for ip, owners in _index(db)["owners"].items():
+        entry = users.get(owners[0], {}).get("vps", {}).get(ip) if owners else None
+        if entry is not None:
+            result[ip] = entry
+    for ip, legacy in db.get("vps", {}).items():
+        if "user" in legacy and ip not in result:
+            result[ip] = VPSRecord.from_dict(
+                {k: v for k, v in legacy.items() if k != "last"}
+            )
+    return result
@@ -1,6 +1,8 @@
 import os
 import sys
 import json
+import time
+import shlex
 import logging
 from telegram import Update
 from telegram.ext import ContextTypes
@@ -8,9 +10,14 @@ from telegram.ext import ContextTypes
 # ===============================================================
 #  FIX: PAKAI IMPORT BENAR (bot.config, bot.utils, bot.ssh_client)
 # ===============================================================
-from bot.config import KEY_DIR, NODE_KEYS_REQUIRED, DB_PATH, MAX_FILE_SIZE_MB
+from bot.config import KEY_DIR, NODE_KEYS_REQUIRED, MAX_FILE_SIZE_MB
 from bot.utils import ensure_dirs
+from bot.db import load_db, transaction
 from bot.ssh_client import SSHClient
+from bot.models import KeyMeta
+from bot.reward_checker import invalidate_peers
+from bot.importer import IMPORT_EXT, import_hosts
+from bot import retry
 
 logger = logging.getLogger(__name__)
 
@@ -31,28 +38,6 @@ REMOTE_PATHS = {
 }
 
 
-# ===============================================================
-#  DATABASE HANDLER
-# ===============================================================
-def load_db():
-    if not os.path.exists(DB_PATH):
-        return {"users": {}}
-    try:
-        with open(DB_PATH, "r") as f:
-            db = json.load(f)
-            if "users" not in db:
-                db["users"] = {}
-            return db
-    except:
-        return {"users": {}}
-
-
-def save_db(data):
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    with open(DB_PATH, "w") as f:
-        json.dump(data, f, indent=2)
-
-
 # ===============================================================
 #  MAIN HANDLER UNTUK FILE UPLOAD
 # ===============================================================
@@ -71,6 +56,13 @@ async def handle_file(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = str(update.effective_user.id)
     chat_id = update.effective_chat.id
 
+    # ===========================================================
+    # BULK IMPORT VPS (.csv / .txt)
+    # ===========================================================
+    if filename and filename.lower().endswith(IMPORT_EXT):
+        await handle_import_file(update, context)
+        return
+
     # ===========================================================
     # VALIDASI NAMA FILE
     # ===========================================================
@@ -78,7 +70,8 @@ async def handle_file(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(
             f"❌ File *{filename}* tidak valid.\n\n"
             "Hanya file berikut yang diizinkan:\n"
-            "• swarm.pem\n• userApiKey.json\n• userData.json",
+            "• swarm.pem\n• userApiKey.json\n• userData.json\n"
+            "• daftar VPS `.csv` / `.txt` (IP USER PASS per baris)",
             parse_mode="Markdown"
         )
         return
@@ -110,12 +103,11 @@ async def handle_file(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # ===========================================================
     # UPDATE DATABASE
     # ===========================================================
-    db = load_db()
-    if user_id not in db["users"]:
-        db["users"][user_id] = {"vps": {}, "keys": {}}
+    with transaction(("users", user_id)) as db:
+        if user_id not in db["users"]:
+            db["users"][user_id] = {"vps": {}, "keys": {}}
 
-    db["users"][user_id]["keys"][filename] = file_path
-    save_db(db)
+        db["users"][user_id]["keys"][filename] = KeyMeta(file_path, document.file_size, time.time())
 
     await update.message.reply_text(
         f"✅ *{filename}* berhasil disimpan!\n"
@@ -126,7 +118,11 @@ async def handle_file(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # ===========================================================
     # AUTO-SYNC KE SEMUA VPS USER
     # ===========================================================
-    await sync_keys_to_all_vps(update, context, filename, file_path)
+    synced = await sync_keys_to_all_vps(update, context, filename, file_path)
+
+    # Peer ID diturunkan dari swarm.pem → cache peer host yang menerima key baru dibuang
+    if filename == "swarm.pem" and synced:
+        invalidate_peers(synced, "upload swarm.pem")
 
     # ===========================================================
     # CEK KELENGKAPAN SEMUA 3 FILE
@@ -148,10 +144,28 @@ async def handle_file(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
 
 
+# ===============================================================
+#  BULK IMPORT VPS DARI FILE
+# ===============================================================
+async def handle_import_file(update, context):
+    """File berisi daftar VPS → import (dibaca di memory, tidak disimpan ke disk)."""
+    document = update.message.document
+
+    if document.file_size and document.file_size > MAX_FILE_SIZE_MB * 1024 * 1024:
+        await update.message.reply_text(f"❌ File terlalu besar.\nMaks: {MAX_FILE_SIZE_MB}MB")
+        return
+
+    tg_file = await context.bot.get_file(document.file_id)
+    data = await tg_file.download_as_bytearray()
+    # admit() hanya menagih 1 token (jumlah host baru diketahui di sini)
+    await import_hosts(update, bytes(data).decode("utf-8-sig", errors="replace"), prepaid=1)
+
+
 # ===============================================================
 #  SYNC KE SEMUA VPS USER
 # ===============================================================
 async def sync_keys_to_all_vps(update, context, filename, local_path):
+    """Kirim satu key ke semua VPS user. Return list IP yang berhasil."""
     user_id = str(update.effective_user.id)
     db = load_db()
 
@@ -163,41 +177,45 @@ async def sync_keys_to_all_vps(update, context, filename, local_path):
             "⚠ Tidak ada VPS tersimpan.\nTambah VPS dengan /addvps",
             parse_mode="Markdown"
         )
-        return
+        return []
 
     remote_path = REMOTE_PATHS.get(filename)
     if not remote_path:
-        return
+        return []
 
     await update.message.reply_text(
         f"🔄 Mengirim *{filename}* ke seluruh VPS…",
         parse_mode="Markdown"
     )
 
-    success_count = 0
-
-    for ip, vps in vps_list.items():
-        username = vps["user"]
-        password = vps["password"]
-
-        # Pastikan folder remote ada
-        SSHClient.execute(ip, username, password, f"mkdir -p {os.path.dirname(remote_path)}")
+    def sync(ip, vps):
+        # Pastikan folder remote ada (gagal di sini → upload pasti gagal juga)
+        ok, msg = SSHClient.execute(
+            ip, vps.user, vps.password, f"mkdir -p {shlex.quote(os.path.dirname(remote_path))}"
+        )
+        if not ok:
+            return ok, msg
+        # Retry menimpa file yang sama → aman diulang
+        return SSHClient.upload_file(ip, vps.user, vps.password, local_path, remote_path)
 
-        ok, msg = SSHClient.upload_file(ip, username, password, local_path, remote_path)
+    results = await retry.fleet(retry.KEY_SYNC, vps_list, sync)
+    synced = [ip for ip, (ok, _, _) in results.items() if ok]
 
+    for ip, (ok, msg, attempts) in results.items():
+        note = f" (percobaan ke-{attempts})" if attempts > 1 else ""
         if ok:
-            success_count += 1
             await update.message.reply_text(
-                f"📤 {filename} → `{ip}` ✓",
+                f"📤 {filename} → `{ip}` ✓{note}",
                 parse_mode="Markdown"
             )
         else:
             await update.message.reply_text(
-                f"❌ Gagal kirim ke `{ip}`: {msg}",
+                f"❌ Gagal kirim ke `{ip}`{note}: {msg}",
                 parse_mode="Markdown"
             )
 
     await update.message.reply_text(
-        f"✅ Sync selesai! ({success_count}/{len(vps_list)} VPS berhasil)",
+        f"✅ Sync selesai! ({len(synced)}/{len(vps_list)} VPS berhasil)",
         parse_mode="Markdown"
     )
+    return synced
@@ -5,9 +5,10 @@ Telegram Bot Handlers untuk Deklan Fusion.
 """
 
 import os
+import re
 import sys
 import logging
-from telegram import Update
+from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes
 
 # Pastikan path lokal ke-import
@@ -15,17 +16,26 @@ sys.path.insert(0, os.path.dirname(__file__))
 
 # Import dari package lokal
 from .config import KEY_DIR, TMP_DIR  # saat ini belum dipakai, tapi keep untuk future use
-from .utils import ensure_dirs
+from .config import IMPORT_CONCURRENCY, PROVISION_CONCURRENCY
+from .utils import ensure_dirs, reply_lines
 from .auth import is_admin, require_admin
 from .actions import (
     add_vps, remove_vps, list_vps,
-    node_status, node_start, node_restart, node_stop, node_logs,
-    sync_keys_to_all_vps, vps_control_kb, get_user_vps_list, is_vps_owner
+    node_status, node_start, node_restart, node_stop, node_logs, logs_page, logs_command, nodes_command,
+    deploy_agent, vps_control_kb, get_user_vps_list, is_vps_owner
 )
-from .file_receiver import handle_file
+from .file_receiver import handle_file, VALID_FILES
+from .importer import IMPORT_EXT
+from .provision import provision_command
 from .keyboard import main_menu
-from .reward_checker import check_all_rewards, load_db, check_reward
+from .reward_checker import check_nodes, cached_peer, fetch_peers, invalidate_peers
+from .db import load_db
 from .ssh_client import SSHClient
+from .throttle import admit
+from .snapshot import get_reader
+from .models import node_id
+from . import metrics, tracing, profiler, resources, nodes, retry
+from monitor.report import chunk
 
 logger = logging.getLogger(__name__)
 
@@ -40,10 +50,15 @@ async def start_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "🔥 *Deklan Fusion Bot*\n\n"
         "Multi-VPS Manager untuk Gensyn RL-Swarm Nodes\n\n"
         "📋 *Commands:*\n"
-        "/addvps IP USER PASS - Tambah VPS\n"
+        "/addvps IP USER PASS [tag1,tag2] - Tambah VPS\n"
         "/removevps IP - Hapus VPS\n"
-        "/listvps - List VPS Anda\n"
-        "/menu - Tampilkan menu\n\n"
+        "/listvps [IP/label/tag:x] - List VPS Anda\n"
+        "/menu - Tampilkan menu\n"
+        "/deployagent - Pasang node agent di semua VPS\n"
+        "/resources [IP/label] - CPU, RAM, disk & saran swap\n"
+        "/logs IP [level=error] [grep=x] [since=2h] - Lihat log node\n"
+        "/nodes IP [add NAMA | remove NAMA] - Instance node per VPS\n"
+        "/provision 50G [IP/label] - Setup VPS per step (resume / status)\n\n"
         "📤 *Upload Keys*\n"
         "• swarm.pem\n"
         "• userApiKey.json\n"
@@ -58,21 +73,157 @@ async def start_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
 
 
+# ==========================
+# THROTTLE COST
+# ==========================
+# Tombol yang fan-out SSH ke SEMUA VPS milik user
+FLEET_ACTIONS = {
+    "🟢 Node Status",
+    "📈 Check Reward",
+    "❌ Remove Swap",
+    "✨ Auto Swap",
+    "🧹 Clean VPS",
+    "⚙ Update Node",
+    "🚀 Start Node",
+    "🔄 Restart Node",
+    "📡 Peer Checker",
+    "📊 Node Info",
+}
+
+
+def _user_vps_count(update: Update) -> int:
+    db = load_db()
+    uid = str(update.effective_user.id)
+    return len(db.get("users", {}).get(uid, {}).get("vps", {}))
+
+
+def _uncached_peer_count(update: Update) -> int:
+    """Host yang masih punya instance tanpa peer ID di cache (1 SSH per host)."""
+    db = load_db()
+    vps_list = db.get("users", {}).get(str(update.effective_user.id), {}).get("vps", {})
+    return sum(
+        1 for ip, vps in vps_list.items()
+        if any(cached_peer(db, nid) is None for nid in nodes.node_ids(ip, vps))
+    )
+
+
+def _message_cost(update: Update, text: str):
+    """Return (token cost, jumlah sesi SSH) untuk satu pesan."""
+    if update.message and update.message.document:
+        name = update.message.document.file_name or ""
+        if name.lower().endswith(IMPORT_EXT):
+            # Bulk import: jumlah host belum diketahui sebelum file diunduh →
+            # 1 token di sini, sisanya ditagih importer setelah parse
+            return 1, IMPORT_CONCURRENCY
+        if name not in VALID_FILES:
+            # Ditolak file_receiver tanpa SSH
+            return 1, 0
+        # Upload keys → auto-sync ke semua VPS
+        n = _user_vps_count(update)
+        return max(1, n), n
+
+    if text.startswith("/addvps") and "\n" in text:
+        # Bulk import multi-baris: 1 token per host, sesi = paralel validasi
+        n = sum(1 for line in text.splitlines()[1:] if line.strip())
+        return max(1, n), min(max(1, n), IMPORT_CONCURRENCY)
+
+    if text == "📡 Peer Checker":
+        # Dijawab dari cache peer ID; SSH hanya untuk host yang belum ada
+        n = _uncached_peer_count(update)
+        return max(1, n), n
+
+    if text.startswith("/logs"):
+        return 1, 1
+
+    if text.startswith("/nodes"):
+        return 1, 0
+
+    if text.startswith("/provision"):
+        if text.split()[1:2] == ["status"]:
+            return 1, 0
+        # Maksimal semua VPS user, sesi = host yang di-provision bersamaan
+        n = _user_vps_count(update)
+        return max(1, n), min(max(1, n), PROVISION_CONCURRENCY)
+
+    if (text in FLEET_ACTIONS or text.startswith("/deployagent")
+            or (text.startswith("Create ") and "Swap" in text)):
+        n = _user_vps_count(update)
+        return max(1, n), n
+
+    return 1, 0
+
+
+def _callback_cost(update: Update, data: str):
+    """Return (token cost, jumlah sesi SSH) untuk satu callback inline."""
+    if data == "peer_refresh":
+        n = _user_vps_count(update)
+        return max(1, n), n
+    if data.startswith(("node_", "logs_")):
+        return 1, 1
+    return 1, 0
+
+
+# ==========================
+# METRICS ROUTE
+# ==========================
+# Label route untuk metrics: hanya nama yang dikenal, teks bebas user
+# (bisa berisi password) tidak pernah jadi label
+KNOWN_COMMANDS = {"/addvps", "/removevps", "/listvps", "/menu", "/deployagent", "/metrics", "/trace",
+                  "/profile", "/logs", "/resources", "/nodes", "/provision"}
+KNOWN_BUTTONS = FLEET_ACTIONS | {"🖥 VPS Connect", "🔑 Upload Keys", "💾 Swap Menu", "⬅️ Back to Menu"}
+
+# Argumen callback: IP / node "IP/instance" / byte offset
+_CALLBACK_ARG = re.compile(r"(_[0-9.]+(/[a-z0-9-]+)?)+$")
+
+
+def _message_route(update: Update, text: str) -> str:
+    if update.message.document:
+        return "document"
+    command = text.split()[0].split("@")[0] if text.startswith("/") else None
+    if command in KNOWN_COMMANDS:
+        return command
+    if text in KNOWN_BUTTONS:
+        return text
+    if text.startswith("Create ") and "Swap" in text:
+        return "create_swap"
+    return "other"
+
+
+def _callback_route(data: str) -> str:
+    return _CALLBACK_ARG.sub("", data) or "other"
+
+
 # ==========================
 # MESSAGE HANDLER
 # ==========================
 async def message_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handler utama untuk semua pesan TEXT & Document."""
-
-    # Kalau ini document → dianggap upload keys
-    if update.message and update.message.document:
-        await handle_file(update, context)
+    if not update.message or not update.effective_user:
         return
 
-    if not update.message or not update.message.text:
+    text = (update.message.text or "").strip()
+    if not text and not update.message.document:
         return
 
-    text = update.message.text.strip()
+    route = _message_route(update, text)
+    with tracing.trace(f"message {route}", user=update.effective_user.id):
+        cost, sessions = _message_cost(update, text)
+        async with admit(update, cost, sessions) as allowed:
+            if not allowed:
+                return
+            with metrics.HANDLER_SECONDS.time("message", route), profiler.hook():
+                try:
+                    await _dispatch_message(update, context, text)
+                except Exception:
+                    metrics.HANDLER_ERRORS.inc("message", route)
+                    raise
+
+
+async def _dispatch_message(update: Update, context: ContextTypes.DEFAULT_TYPE, text: str):
+    # Kalau ini document → dianggap upload keys
+    if update.message.document:
+        await handle_file(update, context)
+        return
 
     # Commands
     if text.startswith("/addvps"):
@@ -84,6 +235,30 @@ async def message_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     elif text.startswith("/listvps"):
         await list_vps(update, context)
 
+    elif text.startswith("/deployagent"):
+        await deploy_agent(update, context)
+
+    elif text.startswith("/logs"):
+        await logs_command(update, context)
+
+    elif text.startswith("/nodes"):
+        await nodes_command(update, context)
+
+    elif text.startswith("/resources"):
+        await handle_resources(update, context)
+
+    elif text.startswith("/provision"):
+        await provision_command(update, context)
+
+    elif text.startswith("/metrics"):
+        await handle_metrics(update, context)
+
+    elif text.startswith("/trace"):
+        await handle_trace(update, context)
+
+    elif text.startswith("/profile"):
+        await handle_profile(update, context)
+
     elif text.startswith("/menu"):
         await update.message.reply_text(
             "📋 *Main Menu*",
@@ -118,6 +293,9 @@ async def message_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     elif text == "❌ Remove Swap":
         await handle_remove_swap(update, context)
 
+    elif text == "✨ Auto Swap":
+        await handle_auto_swap(update, context)
+
     elif text == "🧹 Clean VPS":
         await handle_clean_vps(update, context)
 
@@ -159,8 +337,27 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not query:
         return
 
-    await query.answer()
     data = query.data or ""
+    route = _callback_route(data)
+    user_id = update.effective_user.id if update.effective_user else 0
+
+    with tracing.trace(f"callback {route}", user=user_id):
+        await query.answer()
+
+        cost, sessions = _callback_cost(update, data)
+        async with admit(update, cost, sessions) as allowed:
+            if not allowed:
+                return
+            with metrics.HANDLER_SECONDS.time("callback", route), profiler.hook():
+                try:
+                    await _dispatch_callback(update, context, data)
+                except Exception:
+                    metrics.HANDLER_ERRORS.inc("callback", route)
+                    raise
+
+
+async def _dispatch_callback(update: Update, context: ContextTypes.DEFAULT_TYPE, data: str):
+    query = update.callback_query
 
     # Node controls
     if data.startswith("node_status_"):
@@ -178,10 +375,20 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     elif data.startswith("node_logs_"):
         await node_logs(update, context)
 
+    elif data.startswith(("logs_o_", "logs_n_")):
+        await logs_page(update, context)
+
+    elif data == "peer_refresh":
+        await handle_peer_checker(update, context, refresh=True)
+
     # VPS list/menu
     elif data == "vps_list" or data == "back_to_menu":
         await list_vps(update, context)
 
+    elif data.startswith("vps_page_"):
+        page = data.replace("vps_page_", "")
+        await list_vps(update, context, page=int(page) if page.isdigit() else 0)
+
     elif data.startswith("vps_select_"):
         ip = data.replace("vps_select_", "")
         await show_vps_control(update, context, ip)
@@ -190,11 +397,97 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await query.message.reply_text("❓ Action tidak dikenali.")
 
 
+# ==========================
+# METRICS / TRACE (ADMIN)
+# ==========================
+async def _reply_blocks(update: Update, text: str):
+    """Kirim teks Markdown, dipecah di baris kosong supaya muat pesan Telegram."""
+    for part in chunk(text.split("\n\n")):
+        await update.message.reply_text(part, parse_mode="Markdown")
+
+
+@require_admin
+async def handle_metrics(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Ringkasan metrics semua proses (bot, worker, monitor)."""
+    await _reply_blocks(update, metrics.summary(metrics.collect()))
+
+
+@require_admin
+async def handle_trace(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/trace last [N] → N request paling lambat + breakdown per tahap."""
+    args = update.message.text.split()[1:]
+    if args and args[0] != "last":
+        await update.message.reply_text("Format: /trace last [jumlah]")
+        return
+    top = int(args[1]) if len(args) > 1 and args[1].isdigit() else 5
+
+    await _reply_blocks(update, tracing.summary(tracing.recent(), top=max(1, min(top, 20))))
+
+
+PROFILE_USAGE = (
+    "🔬 *Profile*\n\n"
+    "/profile 20 - 20 handler berikutnya\n"
+    "/profile 30s - event loop selama 30 detik\n"
+    "/profile 20 file - sekaligus kirim file .prof\n"
+    "/profile status\n"
+    "/profile stop"
+)
+
+
+@require_admin
+async def handle_profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Profiling cProfile on-demand untuk handler berikutnya / T detik."""
+    args = update.message.text.split()[1:]
+    if not args:
+        await update.message.reply_text(PROFILE_USAGE, parse_mode="Markdown")
+        return
+
+    session = profiler.current()
+    if args[0] == "status":
+        await update.message.reply_text(
+            f"🔬 Aktif: {session.describe()}" if session else "ℹ️ Tidak ada sesi profile aktif."
+        )
+        return
+    if args[0] == "stop":
+        if not session:
+            await update.message.reply_text("ℹ️ Tidak ada sesi profile aktif.")
+            return
+        profiler.finish()
+        return
+
+    spec = args[0].lower()
+    as_file = "file" in args[1:]
+    try:
+        if spec.endswith("s"):
+            seconds, calls = float(spec[:-1]), 0
+        else:
+            seconds, calls = 0, int(spec)
+    except ValueError:
+        await update.message.reply_text(PROFILE_USAGE, parse_mode="Markdown")
+        return
+    if seconds <= 0 and calls <= 0:
+        await update.message.reply_text(PROFILE_USAGE, parse_mode="Markdown")
+        return
+
+    try:
+        session = profiler.start(
+            context.bot, update.effective_chat.id,
+            calls=calls, seconds=seconds, as_file=as_file
+        )
+    except ValueError as e:
+        await update.message.reply_text(f"❌ {e} Pakai /profile stop dulu.")
+        return
+
+    await update.message.reply_text(
+        f"🔬 Profiling dimulai ({session.describe()}). Hasil dikirim otomatis."
+    )
+
+
 # ==========================
 # STATUS ALL VPS
 # ==========================
 async def handle_node_status_all(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Cek status rl-swarm.service di semua VPS milik user."""
+    """Cek status semua instance node di semua VPS milik user."""
     user_id = update.effective_user.id
     db = load_db()
     vps_list = get_user_vps_list(db, user_id)
@@ -207,24 +500,37 @@ async def handle_node_status_all(update: Update, context: ContextTypes.DEFAULT_T
 
     results = []
     for ip, vps_data in vps_list.items():
-        username = vps_data.get("user", "root")
-        password = vps_data.get("password", "")
-
+        # Semua instance di host ini dalam 1 perintah SSH
+        instances = vps_data.nodes()
         success, output = SSHClient.execute(
-            ip, username, password,
-            "systemctl is-active rl-swarm.service 2>/dev/null || echo 'inactive'"
+            ip, vps_data.user, vps_data.password, nodes.status_command(instances)
         )
 
-        status = "🟢 active" if (success and "active" in (output or "")) else "🔴 inactive"
-        results.append(f"`{ip}` → {status}")
+        active = nodes.parse_status(instances, output if success else "")
+        for inst in instances:
+            status = "🟢 active" if active[inst.name] else "🔴 inactive"
+            results.append(f"`{node_id(ip, inst.name)}` → {status}")
 
-    msg = "📊 *Status Semua VPS:*\n\n" + "\n".join(results)
-    await update.message.reply_text(msg, parse_mode="Markdown")
+    await reply_lines(update.message, "📊 *Status Semua VPS:*\n", results)
 
 
 # ==========================
 # CHECK REWARD (ALL VPS)
 # ==========================
+def _probe_blocks(results):
+    """Satu blok per node (tidak dipecah antar pesan) + baris kosong pemisah."""
+    lines = []
+    for r in results:
+        lines += ["", (
+            f"IP: `{r.ip}`\n"
+            f"Status: {r.status}\n"
+            f"Score: {r.fmt('score')}\n"
+            f"Reward: {r.fmt('reward')}\n"
+            f"Peer: `{r.peer_str}`"
+        )]
+    return lines
+
+
 async def handle_check_reward(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Cek reward semua node milik user."""
     user_id = update.effective_user.id
@@ -239,101 +545,142 @@ async def handle_check_reward(update: Update, context: ContextTypes.DEFAULT_TYPE
 
     results = []
     for ip, data in vps_list.items():
-        username = data.get("user", "root")
-        password = data.get("password", "")
-        res = check_reward(ip, username, password)
-        # Pastikan minimal ada ip di result
-        if isinstance(res, dict):
-            res.setdefault("ip", ip)
-        results.append(res)
-
-    msg_lines = ["🔥 *REWARD REPORT*\n"]
-    for r in results:
-        if not isinstance(r, dict):
-            msg_lines.append("❌ Gagal baca data reward.\n")
-            continue
+        results.extend(check_nodes(ip, data))
 
-        ip = r.get("ip", "N/A")
-        status = r.get("status", "N/A")
-        score = r.get("score", "N/A")
-        reward = r.get("reward", "N/A")
-        peer = r.get("peer", "N/A")
-
-        msg_lines.append(
-            f"IP: `{ip}`\n"
-            f"Status: {status}\n"
-            f"Score: {score}\n"
-            f"Reward: {reward}\n"
-            f"Peer: `{peer}`\n"
-        )
-
-    await update.message.reply_text("\n\n".join(msg_lines), parse_mode="Markdown")
+    await reply_lines(update.message, "🔥 *REWARD REPORT*", _probe_blocks(results))
 
 
 # ==========================
 # SWAP MENU
 # ==========================
 async def handle_swap_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Tampilkan menu swap."""
+    """Tampilkan menu swap + saran ukuran per VPS (dari probe monitor terakhir)."""
     from .keyboard import swap_menu
+    db = load_db()
+    lines = ["💾 *Swap Menu*"]
+    for ip, data in get_user_vps_list(db, update.effective_user.id).items():
+        suggest = (resources.latest(db, ip) or {}).get("swap_suggest")
+        if not suggest:
+            hint = "belum ada data"
+        elif suggest["size"]:
+            hint = f"saran *{suggest['size']}*"
+        else:
+            hint = suggest["reason"]
+        lines.append(f"#{data.label} `{ip}` — {hint}")
+    if len(lines) > 1:
+        lines.append("\n✨ Auto Swap = buat swap sesuai saran di tiap VPS")
+
+    # Keyboard ikut di pesan terakhir
+    *head, last = chunk(lines, sep="\n")
+    for part in head:
+        await update.message.reply_text(part, parse_mode="Markdown")
     await update.message.reply_text(
-        "💾 *Swap Menu*",
+        last,
         parse_mode="Markdown",
         reply_markup=swap_menu()
     )
 
 
+def _retried(recovered: int) -> str:
+    """Baris tambahan summary: host yang berhasil setelah retry."""
+    return f"\n🔁 {recovered} berhasil setelah retry" if recovered else ""
+
+
+# ==========================
+# RESOURCES
+# ==========================
+async def handle_resources(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/resources [IP/label] — sampel resource terakhir per VPS (tanpa SSH)."""
+    db = load_db()
+    vps_list = get_user_vps_list(db, update.effective_user.id)
+    query = update.message.text.split()[1:]
+    if query:
+        q = query[0].lstrip("#")
+        vps_list = {ip: d for ip, d in vps_list.items() if ip == q or str(d.label) == q}
+
+    if not vps_list:
+        await update.message.reply_text("❌ Tidak ada VPS.")
+        return
+
+    blocks = [resources.render_host(data.label, ip, resources.latest(db, ip))
+              for ip, data in vps_list.items()]
+    # Flag overload dulu
+    blocks.sort(key=lambda b: not b.startswith("🔴"))
+
+    for part in chunk(["🧮 *Resource VPS*"] + blocks):
+        await update.message.reply_text(part, parse_mode="Markdown")
+
+
 # ==========================
 # CREATE SWAP
 # ==========================
-async def handle_create_swap(update: Update, context: ContextTypes.DEFAULT_TYPE, size: str):
-    """Create swap di semua VPS user."""
+async def handle_create_swap(update: Update, context: ContextTypes.DEFAULT_TYPE, size: str,
+                             sizes: dict = None):
+    """Create swap di semua VPS user (atau `sizes` ip → ukuran per VPS)."""
     user_id = update.effective_user.id
     db = load_db()
     vps_list = get_user_vps_list(db, user_id)
+    if sizes is not None:
+        vps_list = {ip: d for ip, d in vps_list.items() if ip in sizes}
 
     if not vps_list:
         await update.message.reply_text("❌ Tidak ada VPS tersimpan.")
         return
 
-    await update.message.reply_text(f"💾 Membuat swap {size} di semua VPS...")
+    if sizes is None:
+        await update.message.reply_text(f"💾 Membuat swap {size} di semua VPS...")
 
     script_path = os.path.join(os.path.dirname(__file__), "..", "scripts", "create_swap.sh")
 
-    success_count = 0
-    fail_count = 0
-
-    for ip, data in vps_list.items():
-        username = data.get("user", "root")
-        password = data.get("password", "")
-
-        # Upload script
+    def create(ip, data):
+        # Upload aman diulang; eksekusi hanya diulang kalau gagal sebelum jalan
         up, msg = SSHClient.upload_file(
-            ip, username, password,
+            ip, data.user, data.password,
             script_path, "/tmp/create_swap.sh"
         )
         if not up:
-            fail_count += 1
-            continue
-
-        ok, out = SSHClient.execute(
-            ip, username, password,
-            f"chmod +x /tmp/create_swap.sh && bash /tmp/create_swap.sh {size}"
+            return up, msg
+        return SSHClient.execute(
+            ip, data.user, data.password,
+            f"chmod +x /tmp/create_swap.sh && bash /tmp/create_swap.sh {sizes[ip] if sizes else size}"
         )
 
-        if ok:
-            success_count += 1
-        else:
-            fail_count += 1
+    success_count, fail_count, recovered = retry.summary(
+        await retry.fleet(retry.CREATE_SWAP, vps_list, create)
+    )
 
     await update.message.reply_text(
         f"📊 Summary:\n"
         f"✅ {success_count} VPS\n"
-        f"❌ {fail_count} VPS",
+        f"❌ {fail_count} VPS" + _retried(recovered),
         parse_mode="Markdown"
     )
 
 
+async def handle_auto_swap(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Create swap sesuai saran resources.suggest_swap di tiap VPS."""
+    db = load_db()
+    vps_list = get_user_vps_list(db, update.effective_user.id)
+    sizes, skipped = {}, []
+    for ip, data in vps_list.items():
+        suggest = (resources.latest(db, ip) or {}).get("swap_suggest")
+        if suggest and suggest["size"]:
+            sizes[ip] = suggest["size"]
+        else:
+            skipped.append(f"#{data.label} `{ip}` — {suggest['reason'] if suggest else 'belum ada data'}")
+
+    lines = [f"✨ Auto swap di {len(sizes)} VPS"]
+    lines += [f"#{vps_list[ip].label} `{ip}` → {size}" for ip, size in sizes.items()]
+    if skipped:
+        lines.append("\nDilewati:")
+        lines += skipped
+    for part in chunk(lines, sep="\n"):
+        await update.message.reply_text(part, parse_mode="Markdown")
+
+    if sizes:
+        await handle_create_swap(update, context, None, sizes=sizes)
+
+
 # ==========================
 # REMOVE SWAP
 # ==========================
@@ -354,7 +701,7 @@ async def handle_remove_swap(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
     for ip, data in vps_list.items():
         ok, out = SSHClient.execute(
-            ip, data.get("user", "root"), data.get("password", ""),
+            ip, data.user, data.password,
             "swapoff -a && rm -f /swapfile && sed -i '/swapfile/d' /etc/fstab"
         )
         if ok:
@@ -390,7 +737,7 @@ async def handle_clean_vps(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     for ip, data in vps_list.items():
         ok, out = SSHClient.execute(
-            ip, data.get("user", "root"), data.get("password", ""),
+            ip, data.user, data.password,
             "apt-get clean && apt-get autoremove -y && journalctl --vacuum-time=1d"
         )
         if ok:
@@ -425,10 +772,11 @@ async def handle_update_node(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
     success_count = 0
     fail_count = 0
+    updated = []
 
     for ip, vps_data in vps_list.items():
-        username = vps_data.get("user", "root")
-        password = vps_data.get("password", "")
+        username = vps_data.user
+        password = vps_data.password
 
         upload_ok, msg = SSHClient.upload_file(
             ip, username, password,
@@ -450,6 +798,7 @@ async def handle_update_node(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
         if exec_ok:
             success_count += 1
+            updated.append(ip)
             await update.message.reply_text(
                 f"✅ Node di `{ip}` updated",
                 parse_mode="Markdown"
@@ -461,6 +810,7 @@ async def handle_update_node(update: Update, context: ContextTypes.DEFAULT_TYPE)
                 parse_mode="Markdown"
             )
 
+    invalidate_peers(updated, "update node")
     await update.message.reply_text(
         f"📊 Summary:\n"
         f"✅ {success_count}\n"
@@ -493,7 +843,7 @@ async def show_vps_control(update: Update, context: ContextTypes.DEFAULT_TYPE, i
 # START NODE ALL
 # ==========================
 async def handle_start_node_all(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Start rl-swarm.service di semua VPS user."""
+    """Start semua instance node di semua VPS user."""
     user_id = update.effective_user.id
     db = load_db()
     vps_list = get_user_vps_list(db, user_id)
@@ -504,23 +854,15 @@ async def handle_start_node_all(update: Update, context: ContextTypes.DEFAULT_TY
 
     await update.message.reply_text("🚀 Menjalankan node di semua VPS...")
 
-    s = 0
-    f = 0
+    def start(ip, vps):
+        return SSHClient.execute(ip, vps.user, vps.password, nodes.systemctl_command(vps.nodes(), "start"))
 
-    for ip, vps in vps_list.items():
-        ok, out = SSHClient.execute(
-            ip, vps.get("user", "root"), vps.get("password", ""),
-            "systemctl start rl-swarm.service"
-        )
-        if ok:
-            s += 1
-        else:
-            f += 1
+    s, f, recovered = retry.summary(await retry.fleet(retry.NODE_START, vps_list, start))
 
     await update.message.reply_text(
         f"📊 Summary:\n"
         f"✅ {s}\n"
-        f"❌ {f}",
+        f"❌ {f}" + _retried(recovered),
         parse_mode="Markdown"
     )
 
@@ -529,7 +871,7 @@ async def handle_start_node_all(update: Update, context: ContextTypes.DEFAULT_TY
 # RESTART NODE ALL
 # ==========================
 async def handle_restart_node_all(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Restart rl-swarm.service di semua VPS user."""
+    """Restart semua instance node di semua VPS user."""
     user_id = update.effective_user.id
     db = load_db()
     vps_list = get_user_vps_list(db, user_id)
@@ -542,17 +884,21 @@ async def handle_restart_node_all(update: Update, context: ContextTypes.DEFAULT_
 
     s = 0
     f = 0
+    restarted = []
 
     for ip, vps_data in vps_list.items():
         ok, out = SSHClient.execute(
-            ip, vps_data.get("user", "root"), vps_data.get("password", ""),
-            "systemctl restart rl-swarm.service"
+            ip, vps_data.user, vps_data.password,
+            nodes.systemctl_command(vps_data.nodes(), "restart")
         )
         if ok:
             s += 1
+            restarted.append(ip)
         else:
             f += 1
 
+    invalidate_peers(restarted, "restart")
+
     await update.message.reply_text(
         f"📊 Summary:\n"
         f"✅ {s}\n"
@@ -564,29 +910,43 @@ async def handle_restart_node_all(update: Update, context: ContextTypes.DEFAULT_
 # ==========================
 # PEER CHECKER
 # ==========================
-async def handle_peer_checker(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Ambil Peer ID dari log di semua VPS user."""
+async def handle_peer_checker(update: Update, context: ContextTypes.DEFAULT_TYPE, refresh: bool = False):
+    """
+    Peer ID semua VPS user dari cache DB; SSH (grep log) hanya untuk host
+    yang belum ada di cache. refresh=True (tombol 🔄) → invalidate dulu.
+    """
     user_id = update.effective_user.id
     db = load_db()
     vps_list = get_user_vps_list(db, user_id)
+    message = update.message or update.callback_query.message
 
     if not vps_list:
-        await update.message.reply_text("❌ Tidak ada VPS.")
+        await message.reply_text("❌ Tidak ada VPS.")
         return
 
-    await update.message.reply_text("📡 Mengecek Peer ID...")
+    if refresh:
+        invalidate_peers(vps_list, "refresh")
+
+    db = load_db()
+    missing = [
+        ip for ip, vps in vps_list.items()
+        if any(cached_peer(db, nid) is None for nid in nodes.node_ids(ip, vps))
+    ]
+    if missing:
+        await message.reply_text(f"📡 Mengecek Peer ID ({len(missing)} VPS via SSH)...")
 
     results = []
     for ip, vps in vps_list.items():
-        ok, out = SSHClient.execute(
-            ip, vps.get("user", "root"), vps.get("password", ""),
-            "grep -o 'Qm[a-zA-Z0-9]\\{44,\\}' /root/rl-swarm/logs/swarm_launcher.log 2>/dev/null | tail -1 || echo 'N/A'"
-        )
-        peer = (out or "").strip() if ok else "N/A"
-        results.append(f"`{ip}`: `{peer}`")
-
-    msg = "📡 *Peer ID Semua VPS:*\n\n" + "\n".join(results)
-    await update.message.reply_text(msg, parse_mode="Markdown")
+        # Semua instance satu host diambil sekaligus (1 SSH)
+        fetched = fetch_peers(ip, vps) if ip in missing else {}
+        for nid in nodes.node_ids(ip, vps):
+            peer = cached_peer(db, nid) or fetched.get(nid)
+            results.append(f"`{nid}`: `{peer or 'N/A'}`")
+
+    await reply_lines(
+        message, "📡 *Peer ID Semua VPS:*\n", results,
+        reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔄 Refresh", callback_data="peer_refresh")]])
+    )
 
 
 # ==========================
@@ -604,31 +964,15 @@ async def handle_node_info_all(update: Update, context: ContextTypes.DEFAULT_TYP
 
     await update.message.reply_text("📊 Mengambil info semua node...")
 
+    # Pakai snapshot monitor kalau masih fresh, SSH hanya untuk yang tidak ada
+    reader = get_reader()
     results = []
     for ip, vps in vps_list.items():
-        r = check_reward(ip, vps.get("user", "root"), vps.get("password", ""))
-        if isinstance(r, dict):
-            r.setdefault("ip", ip)
-        results.append(r)
-
-    msg_lines = ["📊 *Node Info:*\n"]
-    for r in results:
-        if not isinstance(r, dict):
-            msg_lines.append("❌ Gagal baca info node.\n")
+        recs = [reader.get(nid) for nid in nodes.node_ids(ip, vps)]
+        if all(rec is not None for rec in recs):
+            results.extend(rec.to_probe() for rec in recs)
             continue
 
-        ip = r.get("ip", "N/A")
-        status = r.get("status", "N/A")
-        score = r.get("score", "N/A")
-        reward = r.get("reward", "N/A")
-        peer = r.get("peer", "N/A")
-
-        msg_lines.append(
-            f"IP: `{ip}`\n"
-            f"Status: {status}\n"
-            f"Score: {score}\n"
-            f"Reward: {reward}\n"
-            f"Peer: `{peer}`\n"
-        )
+        results.extend(check_nodes(ip, vps))
 
-    await update.message.reply_text("\n\n".join(msg_lines), parse_mode="Markdown")
+    await reply_lines(update.message, "📊 *Node Info:*", _probe_blocks(results))
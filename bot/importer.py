@@ -0,0 +1,196 @@
+"""
+Bulk import VPS: file CSV/TXT (upload document) atau /addvps multi-baris.
+
+    /addvps
+    1.2.3.4 root pass1 tag1,tag2
+    5.6.7.8 root pass2
+
+    # vps.csv
+    ip,user,password,tags
+    1.2.3.4,root,pass1,tag1;tag2
+
+- Semua host divalidasi login SSH bersamaan (IMPORT_CONCURRENCY) di
+  thread pool, event loop tidak ikut terblokir.
+- Host yang lolos di-commit dalam SATU transaksi DB (label berurutan,
+  index ikut), yang gagal dirangkum di satu pesan.
+"""
+import csv
+import asyncio
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+from bot.ssh_client import SSHClient
+from bot.config import IMPORT_CONCURRENCY, IMPORT_TIMEOUT, IMPORT_MAX_HOSTS
+from bot.db import load_db, transaction, add_host
+from bot.models import VPSRecord
+from bot.utils import plain, reply_lines
+from bot.throttle import charge
+
+logger = logging.getLogger(__name__)
+
+IMPORT_EXT = (".csv", ".txt")
+
+_HEADER = {"ip", "host", "address"}
+
+
+# ============================================================
+# PARSE
+# ============================================================
+def _split_tags(value: str) -> list:
+    return [t for t in value.replace(";", ",").replace("|", ",").split(",") if t.strip()]
+
+
+def parse_hosts(text: str) -> Tuple[List[tuple], List[str]]:
+    """
+    Parse daftar host. Baris kosong / diawali # diabaikan.
+
+    Per baris: `IP USER PASS [tag1,tag2]` (spasi) atau
+    `ip,user,password[,tag1;tag2]` (CSV, header opsional).
+
+    Returns:
+        (entries [(ip, user, password, tags)], errors ["baris N: ..."])
+    """
+    entries, errors, seen = [], [], set()
+    for no, raw in enumerate(text.splitlines(), 1):
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        if "," in line.split()[0]:
+            fields = [f.strip() for f in next(csv.reader([line]))]
+            if fields[0].lower() in _HEADER:
+                continue
+            tags = _split_tags(",".join(fields[3:])) if len(fields) > 3 else []
+        else:
+            fields = line.split()
+            tags = _split_tags(fields[3]) if len(fields) > 3 else []
+            if len(fields) > 4:
+                errors.append(f"baris {no}: kolom berlebih")
+                continue
+
+        if len(fields) < 3 or not all(fields[:3]):
+            errors.append(f"baris {no}: format harus IP USER PASS [tags]")
+            continue
+
+        ip, user, password = fields[:3]
+        if ip in seen:
+            errors.append(f"baris {no}: {ip} duplikat")
+            continue
+        seen.add(ip)
+        entries.append((ip, user, password, tags))
+
+    if len(entries) > IMPORT_MAX_HOSTS:
+        errors.append(f"maks {IMPORT_MAX_HOSTS} host per import, {len(entries) - IMPORT_MAX_HOSTS} sisanya diabaikan")
+        entries = entries[:IMPORT_MAX_HOSTS]
+    return entries, errors
+
+
+# ============================================================
+# VALIDATE + COMMIT
+# ============================================================
+def validate_hosts(entries, concurrency: int = IMPORT_CONCURRENCY) -> List[Tuple[bool, str]]:
+    """test_connection semua host, maksimal `concurrency` bersamaan. Urut sesuai entries."""
+    if not entries:
+        return []
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(entries)),
+                            thread_name_prefix="import") as pool:
+        # Context per task → span ssh.test tetap masuk trace request ini
+        futures = [
+            pool.submit(contextvars.copy_context().run,
+                        SSHClient.test_connection, ip, user, password, IMPORT_TIMEOUT)
+            for ip, user, password, _ in entries
+        ]
+        return [f.result() for f in futures]
+
+
+def commit_hosts(user_id, entries) -> Tuple[list, list]:
+    """
+    Tambah semua host dalam satu transaksi.
+
+    Returns:
+        (added [VPSRecord], exists [ip])
+    """
+    uid = str(user_id)
+    added, exists = [], []
+    with transaction(("users", uid), ("index",)) as db:
+        vps_list = db["users"].setdefault(uid, {"vps": {}, "keys": {}}).setdefault("vps", {})
+        for ip, user, password, tags in entries:
+            if ip in vps_list:
+                exists.append(ip)
+                continue
+            added.append(add_host(db, user_id, ip, VPSRecord(user, password), tags))
+    return added, exists
+
+
+# ============================================================
+# TELEGRAM
+# ============================================================
+async def import_hosts(update, text: str, concurrency: int = IMPORT_CONCURRENCY, prepaid: int = None):
+    """
+    Parse → validasi paralel → commit 1 transaksi → satu ringkasan.
+
+    `prepaid` = token yang sudah dibayar di admit() (upload file: jumlah
+    host belum diketahui). Sisanya, 1 token per host baru, ditagih setelah
+    parse. None = biaya sudah dihitung penuh (/addvps per baris).
+    """
+    message = update.message
+    uid = str(update.effective_user.id)
+    entries, errors = parse_hosts(text)
+    if not entries:
+        await reply_lines(message, "❌ Tidak ada VPS valid untuk di-import.", [f"• {plain(e)}" for e in errors])
+        return
+
+    # Yang sudah ada tidak perlu dites login lagi
+    current = load_db().get("users", {}).get(uid, {}).get("vps", {})
+    exists = [e[0] for e in entries if e[0] in current]
+    entries = [e for e in entries if e[0] not in current]
+
+    if prepaid is not None and not await charge(update, len(entries) - prepaid):
+        return
+
+    if entries:
+        await message.reply_text(
+            f"🔎 Memvalidasi login SSH {len(entries)} VPS (paralel {min(concurrency, len(entries))})…"
+        )
+    checks = await asyncio.to_thread(validate_hosts, entries, concurrency)
+
+    ok_entries = [e for e, (ok, _) in zip(entries, checks) if ok]
+    failed = [(e[0], msg) for e, (ok, msg) in zip(entries, checks) if not ok]
+    added, raced = commit_hosts(uid, ok_entries)
+    exists += raced
+
+    logger.info(
+        f"Import VPS user {uid}: {len(added)} ditambah, "
+        f"{len(exists)} sudah ada, {len(failed)} gagal"
+    )
+
+    header = (
+        f"📥 *Import selesai*\n"
+        f"✅ Ditambahkan: {len(added)}\n"
+        f"⚠️ Sudah ada: {len(exists)}\n"
+        f"❌ Gagal login: {len(failed)}"
+    )
+    if errors:
+        header += f"\n📝 Baris dilewati: {len(errors)}"
+
+    lines = []
+    if added:
+        lines.append("")
+        lines.append(f"🟢 Label: `#{added[0].label}`–`#{added[-1].label}`" if len(added) > 1
+                     else f"🟢 Label: `#{added[0].label}`")
+    if failed:
+        lines.append("")
+        lines.append("*Gagal:*")
+        lines += [f"• `{ip}` {plain(msg)[:120]}" for ip, msg in failed]
+    if exists:
+        lines.append("")
+        lines.append("*Sudah ada:*")
+        lines += [f"• `{ip}`" for ip in exists]
+    if errors:
+        lines.append("")
+        lines.append("*Dilewati:*")
+        lines += [f"• {plain(e)}" for e in errors]
+
+    await reply_lines(message, header, lines)
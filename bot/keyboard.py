@@ -22,7 +22,7 @@ def swap_menu():
     keyboard = [
         [KeyboardButton("Create 32G Swap"), KeyboardButton("Create 50G Swap")],
         [KeyboardButton("Create 80G Swap"), KeyboardButton("Create 100G Swap")],
-        [KeyboardButton("❌ Remove Swap")],
+        [KeyboardButton("✨ Auto Swap"), KeyboardButton("❌ Remove Swap")],
         [KeyboardButton("⬅️ Back to Menu")]
     ]
     return ReplyKeyboardMarkup(keyboard, resize_keyboard=True)
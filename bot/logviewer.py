@@ -0,0 +1,232 @@
+"""
+Log viewer node (swarm_launcher.log) dengan filter di sisi VPS.
+
+    /logs IP level=error grep=timeout since=2h until=30m
+    /logs IP/n2 level=warn        (instance selain bawaan, lihat bot/nodes.py)
+
+- Filter (level, regex, rentang waktu) dan paging jalan di VPS lewat
+  script python3 kecil; yang dikirim balik hanya baris untuk satu
+  halaman (≤ LOG_PAGE_CHARS), jadi bandwidth sebanding dengan yang
+  tampil di layar, bukan ukuran log.
+- Halaman = rentang byte [start, end) di file. Cursor byte dibawa di
+  callback_data: ◀️ scan mundur dari `start`, ▶️ scan maju dari `end`.
+- Transport SSH pakai kompresi zlib.
+"""
+import re
+import json
+import base64
+import shlex
+from typing import Optional, Tuple
+
+from telegram import InlineKeyboardMarkup, InlineKeyboardButton
+
+from bot.ssh_client import SSHClient
+from bot.config import LOG_PAGE_CHARS, LOG_LINE_WIDTH, LOG_SCAN_BYTES
+from bot.models import DEFAULT_INSTANCE
+
+NODE_LOG = DEFAULT_INSTANCE.log
+
+LEVELS = {
+    "error": r"(?i)\b(error|critical|fatal|traceback|exception)\b",
+    "warn": r"(?i)\b(warn|warning|error|critical|fatal|traceback|exception)\b",
+}
+
+_DURATION = re.compile(r"^(\d+)([smhd])$")
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+# ============================================================
+# REMOTE SCRIPT (jalan di VPS, python3 stdlib)
+# ============================================================
+# Baris tanpa timestamp (lanjutan traceback) tidak lolos filter waktu.
+_REMOTE = r'''
+import sys, os, re, json, time, base64
+a = json.loads(base64.b64decode(sys.argv[1]))
+try:
+    size = os.path.getsize(a["path"])
+except OSError:
+    print(json.dumps({"error": "log tidak ditemukan"})); sys.exit()
+lvl = re.compile(a["level"]) if a["level"] else None
+pat = re.compile(a["pattern"], re.I) if a["pattern"] else None
+fmt = lambda s: time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(time.time() - s))
+since = fmt(a["since"]) if a["since"] else None
+until = fmt(a["until"]) if a["until"] else None
+ts = re.compile(r"(\d{4}-\d{2}-\d{2})[ T](\d{2}:\d{2}:\d{2})")
+def ok(line):
+    if lvl and not lvl.search(line) or pat and not pat.search(line):
+        return False
+    if since or until:
+        m = ts.search(line[:64])
+        t = m and m.group(1) + " " + m.group(2)
+        if not t or since and t < since or until and t > until:
+            return False
+    return True
+budget, width, scan = a["budget"], a["width"], a["scan"]
+cursor = size if a["cursor"] is None else min(max(0, a["cursor"]), size)
+out, used, stop = [], 0, cursor
+f = open(a["path"], "rb")
+if a["dir"] == "older":
+    pos, tail = cursor, b""
+    while pos > 0 and used < budget and cursor - pos < scan:
+        n = min(65536, pos); pos -= n; f.seek(pos)
+        parts = (f.read(n) + tail).split(b"\n")
+        tail = parts.pop(0) if pos > 0 else b""
+        off = pos + (len(tail) + 1 if pos > 0 else 0)
+        items = []
+        for p in parts:
+            items.append((off, p)); off += len(p) + 1
+        for off, p in reversed(items):
+            if used >= budget:
+                break
+            stop = off
+            line = p.decode("utf-8", "replace").rstrip("\r")[:width]
+            if line and ok(line):
+                out.append(line); used += len(line) + 1
+    out.reverse()
+    start, end = stop, cursor
+else:
+    f.seek(cursor)
+    while used < budget and stop - cursor < scan:
+        raw = f.readline()
+        if not raw.endswith(b"\n"):
+            break
+        stop += len(raw)
+        line = raw.decode("utf-8", "replace").rstrip("\r\n")[:width]
+        if line and ok(line):
+            out.append(line); used += len(line) + 1
+    start, end = cursor, stop
+print(json.dumps({"size": size, "start": start, "end": end, "lines": out}))
+'''
+
+
+# ============================================================
+# FILTER
+# ============================================================
+def parse_duration(value: str) -> Optional[int]:
+    """'30m' / '2h' / '1d' → detik, None kalau format salah."""
+    m = _DURATION.match(value.strip().lower())
+    return int(m.group(1)) * _UNITS[m.group(2)] if m else None
+
+
+def parse_filter(args) -> Tuple[Optional[dict], str]:
+    """
+    Argumen `key=value` → (filter, "") atau (None, pesan error).
+
+    level=error|warn  grep=<regex>  since=2h  until=30m
+    """
+    flt = {"level": None, "pattern": None, "since": None, "until": None}
+    for arg in args:
+        key, sep, value = arg.partition("=")
+        key = key.lower()
+        if not sep or not value:
+            return None, f"Argumen tidak dikenal: {arg}"
+        if key == "level":
+            if value.lower() not in LEVELS:
+                return None, "level harus error / warn"
+            flt["level"] = value.lower()
+        elif key == "grep":
+            try:
+                re.compile(value)
+            except re.error as e:
+                return None, f"Regex tidak valid: {e}"
+            flt["pattern"] = value
+        elif key in ("since", "until"):
+            seconds = parse_duration(value)
+            if seconds is None:
+                return None, f"{key} harus seperti 30m / 2h / 1d"
+            flt[key] = seconds
+        else:
+            return None, f"Argumen tidak dikenal: {arg}"
+    return flt, ""
+
+
+def format_duration(seconds: int) -> str:
+    for unit in ("d", "h", "m"):
+        if seconds % _UNITS[unit] == 0:
+            return f"{seconds // _UNITS[unit]}{unit}"
+    return f"{seconds}s"
+
+
+def describe_filter(flt: Optional[dict]) -> str:
+    if not flt:
+        return ""
+    parts = []
+    if flt.get("level"):
+        parts.append(f"level={flt['level']}")
+    if flt.get("pattern"):
+        parts.append(f"grep={flt['pattern']}")
+    for key in ("since", "until"):
+        if flt.get(key):
+            parts.append(f"{key}={format_duration(flt[key])}")
+    return " ".join(parts)
+
+
+# ============================================================
+# FETCH + RENDER
+# ============================================================
+def fetch_page(ip, username, password, flt: Optional[dict] = None,
+               cursor: Optional[int] = None, direction: str = "older", path: str = NODE_LOG):
+    """
+    Ambil satu halaman log (`path`, default instance bawaan) dari VPS.
+
+    Returns:
+        (True, {"size", "start", "end", "lines"}) atau (False, pesan error)
+    """
+    flt = flt or {}
+    args = {
+        "path": path,
+        "dir": "newer" if direction == "newer" else "older",
+        "cursor": cursor,
+        "level": LEVELS.get(flt.get("level")),
+        "pattern": flt.get("pattern"),
+        "since": flt.get("since"),
+        "until": flt.get("until"),
+        "budget": LOG_PAGE_CHARS,
+        "width": LOG_LINE_WIDTH,
+        "scan": LOG_SCAN_BYTES,
+    }
+    encoded = base64.b64encode(json.dumps(args).encode()).decode()
+    ok, out = SSHClient.execute(
+        ip, username, password,
+        f"python3 -c {shlex.quote(_REMOTE)} {encoded}",
+        compress=True
+    )
+    if not ok:
+        return False, out.strip()[:300]
+
+    try:
+        page = json.loads(out.strip().splitlines()[-1])
+    except (ValueError, IndexError):
+        return False, "Output log viewer tidak valid (python3 terpasang?)"
+    if "error" in page:
+        return False, page["error"]
+    return True, page
+
+
+def _size(n: int) -> str:
+    return f"{n / 1024 / 1024:.1f}MB" if n >= 1024 * 1024 else f"{n / 1024:.0f}KB"
+
+
+def render(ip: str, page: dict, flt: Optional[dict] = None) -> str:
+    """Teks Markdown satu halaman (muat di satu pesan Telegram)."""
+    header = f"📄 Log `{ip}` · byte {_size(page['start'])}–{_size(page['end'])} / {_size(page['size'])}"
+    described = describe_filter(flt).replace("`", "'")
+    if described:
+        header += f"\n🔍 `{described}`"
+
+    body = "\n".join(page["lines"]).replace("`", "'")
+    if not body:
+        body = "(tidak ada baris yang cocok di rentang ini)"
+    return f"{header}\n```\n{body}\n```"
+
+
+def page_keyboard(ip: str, page: dict) -> InlineKeyboardMarkup:
+    nav = []
+    if page["start"] > 0:
+        nav.append(InlineKeyboardButton("◀️ Lebih lama", callback_data=f"logs_o_{ip}_{page['start']}"))
+    if page["end"] < page["size"]:
+        nav.append(InlineKeyboardButton("Lebih baru ▶️", callback_data=f"logs_n_{ip}_{page['end']}"))
+
+    rows = [nav] if nav else []
+    rows.append([InlineKeyboardButton("⏬ Terbaru", callback_data=f"node_logs_{ip}")])
+    return InlineKeyboardMarkup(rows)
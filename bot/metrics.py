@@ -0,0 +1,453 @@
+"""
+Metrics internal bot + monitor (counter / histogram / gauge).
+
+    SSHClient, handlers, monitor ──▶ REGISTRY (per proses)
+                                        │  dump JSON tiap METRICS_DUMP_INTERVAL
+                                        ▼
+                              tmp/metrics/<proses>.json
+                                        │
+    GET /metrics (Prometheus text) ◀────┴────▶ /metrics (admin, ringkasan)
+
+- Tanpa dependency tambahan: format text Prometheus ditulis sendiri.
+- Setiap proses (bot, worker cluster, monitor --once) punya registry
+  sendiri dan menulis snapshot ke METRICS_DIR. Endpoint HTTP dan command
+  admin menggabungkan semua snapshot dengan label `proc`, jadi metric
+  monitor yang sudah exit tetap terlihat sampai siklus berikutnya.
+- Label host hanya dipakai untuk counter kegagalan SSH (kardinalitas =
+  jumlah VPS yang gagal, bukan semua request).
+"""
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Sequence
+
+from bot.config import (
+    TMP_DIR, METRICS_LISTEN, METRICS_PORT, METRICS_DUMP_INTERVAL
+)
+
+logger = logging.getLogger(__name__)
+
+METRICS_DIR = os.path.join(TMP_DIR, "metrics")
+METRICS_PATH = "/metrics"
+
+# Detik; cukup lebar untuk connect SSH (ms) sampai update node (menit)
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+# ============================================================
+# METRIC TYPES
+# ============================================================
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, values) -> tuple:
+        if len(values) != len(self.labels):
+            raise ValueError(f"{self.name}: butuh label {self.labels}, dapat {values}")
+        return tuple(str(v) for v in values)
+
+    def export(self) -> dict:
+        with self._lock:
+            return {
+                "kind": self.kind, "help": self.help, "labels": list(self.labels),
+                "values": [[list(k), v] for k, v in self._values.items()],
+            }
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, value: float = 1.0):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels):
+        key = self._key(labels)
+        with self._lock:
+            # [count per bucket..., +Inf, sum]
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[bisect.bisect_left(self.buckets, value)] += 1
+            state[-1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def export(self) -> dict:
+        data = super().export()
+        data["buckets"] = list(self.buckets)
+        return data
+
+
+class Gauge(_Metric):
+    """Gauge biasa (`set`) atau dibaca dari callback saat export."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help, labels=(), fn: Optional[Callable] = None):
+        super().__init__(name, help, labels)
+        self.fn = fn
+
+    def set(self, value: float, *labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def export(self) -> dict:
+        if self.fn is not None:
+            try:
+                value = self.fn()
+            except Exception as e:
+                logger.debug(f"Gauge {self.name} gagal dibaca: {e}")
+                value = {}
+            # Callback boleh return angka (tanpa label) atau dict label-tuple → angka
+            items = value.items() if isinstance(value, dict) else [((), value)]
+            with self._lock:
+                self._values = {self._key(k if isinstance(k, tuple) else (k,)): float(v)
+                                for k, v in items}
+        return super().export()
+
+
+# ============================================================
+# REGISTRY
+# ============================================================
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help, labels=()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name, help, labels=(), fn=None) -> Gauge:
+        return self._register(Gauge(name, help, labels, fn))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {m.name: m.export() for m in metrics}
+
+    def drain(self) -> dict:
+        """Snapshot lalu reset (untuk dikirim ke proses induk lalu di-merge)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        data = {}
+        for m in metrics:
+            data[m.name] = m.export()
+            m.reset()
+        return data
+
+    def merge(self, snapshot: dict):
+        """Tambahkan counter / histogram dari snapshot proses lain."""
+        for name, data in snapshot.items():
+            metric = self._metrics.get(name)
+            if metric is None or data["kind"] != metric.kind or metric.kind == "gauge":
+                continue
+            with metric._lock:
+                for labels, value in data["values"]:
+                    key = tuple(labels)
+                    if metric.kind == "counter":
+                        metric._values[key] = metric._values.get(key, 0.0) + value
+                    else:
+                        state = metric._values.get(key)
+                        if state is None or len(state) != len(value):
+                            metric._values[key] = list(value)
+                        else:
+                            metric._values[key] = [a + b for a, b in zip(state, value)]
+
+
+REGISTRY = Registry()
+
+
+# ============================================================
+# METRIC DEFINITIONS
+# ============================================================
+SSH_SECONDS = REGISTRY.histogram(
+    "fusion_ssh_seconds", "Durasi SSH per fase (connect / command / upload)", ("op", "phase")
+)
+SSH_REQUESTS = REGISTRY.counter(
+    "fusion_ssh_requests_total", "Request SSH per operasi dan hasil", ("op", "result")
+)
+SSH_FAILURES = REGISTRY.counter(
+    "fusion_ssh_failures_total", "Kegagalan SSH per host dan alasan", ("host", "reason")
+)
+SSH_RETRIES = REGISTRY.counter(
+    "fusion_ssh_retries_total", "Retry operasi remote per operasi dan hasil", ("op", "result")
+)
+HANDLER_SECONDS = REGISTRY.histogram(
+    "fusion_handler_seconds", "Durasi handler Telegram (setelah admit)", ("kind", "route")
+)
+HANDLER_ERRORS = REGISTRY.counter(
+    "fusion_handler_errors_total", "Exception di handler Telegram", ("kind", "route")
+)
+THROTTLE_REJECTS = REGISTRY.counter(
+    "fusion_throttle_rejected_total", "Request ditolak rate limit / antrian SSH", ("reason",)
+)
+TELEGRAM_SEND_SECONDS = REGISTRY.histogram(
+    "fusion_telegram_send_seconds", "Latency send_message ke Telegram", ("source",)
+)
+MONITOR_STAGE_SECONDS = REGISTRY.histogram(
+    "fusion_monitor_stage_seconds", "Durasi tahap siklus monitor", ("stage",),
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, 7200)
+)
+MONITOR_HOSTS = REGISTRY.gauge(
+    "fusion_monitor_hosts", "Host di siklus monitor terakhir", ("state",)
+)
+MONITOR_LAST_CYCLE = REGISTRY.gauge(
+    "fusion_monitor_last_cycle_timestamp", "Waktu selesai siklus monitor terakhir (unix)"
+)
+
+
+# ============================================================
+# SNAPSHOT FILES (antar proses)
+# ============================================================
+_process_name = f"pid-{os.getpid()}"
+
+
+def set_process(name: str):
+    """Nama proses untuk label `proc` dan nama file snapshot."""
+    global _process_name
+    _process_name = name
+
+
+def dump():
+    """Tulis snapshot registry proses ini ke METRICS_DIR (atomic)."""
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    path = os.path.join(METRICS_DIR, f"{_process_name}.json")
+    tmp = f"{path}.tmp"
+    try:
+        with open(tmp, "w") as f:
+            json.dump({"proc": _process_name, "time": time.time(),
+                       "metrics": REGISTRY.snapshot()}, f)
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.error(f"Gagal dump metrics: {e}")
+
+
+def _dump_loop(interval: float):
+    while True:
+        time.sleep(interval)
+        dump()
+
+
+def start_dumper(name: str, interval: float = METRICS_DUMP_INTERVAL):
+    """Dump snapshot periodik di daemon thread (proses yang hidup lama)."""
+    set_process(name)
+    threading.Thread(target=_dump_loop, args=(interval,), name="metrics-dump", daemon=True).start()
+
+
+def collect() -> Dict[str, dict]:
+    """Snapshot semua proses: proc → metrics (proses ini selalu live)."""
+    snapshots = {}
+    try:
+        names = os.listdir(METRICS_DIR)
+    except OSError:
+        names = []
+    for name in names:
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(METRICS_DIR, name)) as f:
+                data = json.load(f)
+            snapshots[data["proc"]] = data["metrics"]
+        except (OSError, ValueError, KeyError):
+            continue
+    snapshots[_process_name] = REGISTRY.snapshot()
+    return snapshots
+
+
+# ============================================================
+# PROMETHEUS TEXT FORMAT
+# ============================================================
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs += [f'{n}="{_escape(v)}"' for n, v in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _num(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render(snapshots: Dict[str, dict]) -> str:
+    families: Dict[str, dict] = {}
+    for proc, metrics in sorted(snapshots.items()):
+        for name, data in metrics.items():
+            fam = families.setdefault(name, {"data": data, "rows": []})
+            for labels, value in data["values"]:
+                fam["rows"].append((proc, labels, value))
+
+    out = []
+    for name, fam in sorted(families.items()):
+        data = fam["data"]
+        out.append(f"# HELP {name} {data['help']}")
+        out.append(f"# TYPE {name} {data['kind']}")
+        names = data["labels"]
+        for proc, values, value in fam["rows"]:
+            proc_label = [("proc", proc)]
+            if data["kind"] != "histogram":
+                out.append(f"{name}{_labels(names, values, proc_label)} {_num(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(data["buckets"] + ["+Inf"], value[:-1]):
+                cumulative += count
+                le = proc_label + [("le", bound if bound == "+Inf" else _num(bound))]
+                out.append(f"{name}_bucket{_labels(names, values, le)} {cumulative}")
+            out.append(f"{name}_sum{_labels(names, values, proc_label)} {_num(value[-1])}")
+            out.append(f"{name}_count{_labels(names, values, proc_label)} {cumulative}")
+    return "\n".join(out) + "\n"
+
+
+# ============================================================
+# RINGKASAN UNTUK TELEGRAM (/metrics)
+# ============================================================
+def _quantile(buckets, counts, q: float) -> Optional[float]:
+    """Estimasi kuantil dari bucket (batas atas bucket tempat kuantil jatuh)."""
+    total = sum(counts)
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    for bound, count in zip(list(buckets) + [float("inf")], counts):
+        seen += count
+        if seen >= rank:
+            return bound
+    return float("inf")
+
+
+def _fmt_seconds(value: Optional[float]) -> str:
+    if value is None:
+        return "-"
+    if value == float("inf"):
+        return f">{DEFAULT_BUCKETS[-1]}s"
+    return f"{value * 1000:.0f}ms" if value < 1 else f"{value:g}s"
+
+
+def summary(snapshots: Dict[str, dict], top: int = 8) -> str:
+    """Ringkasan singkat semua proses (histogram: n / avg / p50 / p95)."""
+    merged = Registry()
+    for metric in REGISTRY._metrics.values():
+        if metric.kind == "histogram":
+            merged.histogram(metric.name, metric.help, metric.labels, metric.buckets)
+        elif metric.kind == "counter":
+            merged.counter(metric.name, metric.help, metric.labels)
+    for metrics in snapshots.values():
+        merged.merge(metrics)
+
+    # Nama metric selalu di dalam `code`: underscore di luar code merusak Markdown
+    lines = ["📈 *Metrics*", f"Proses: {', '.join(sorted(snapshots))}", ""]
+    for name, data in sorted(merged.snapshot().items()):
+        rows = data["values"]
+        if not rows:
+            continue
+        lines.append(f"▪️ `{name}`")
+        if data["kind"] == "histogram":
+            rows.sort(key=lambda row: -sum(row[1][:-1]))
+            for labels, value in rows[:top]:
+                counts, total = value[:-1], value[-1]
+                n = sum(counts)
+                lines.append(
+                    f"`{'/'.join(labels) or '-'}` n={n} avg={_fmt_seconds(total / n if n else None)} "
+                    f"p50={_fmt_seconds(_quantile(data['buckets'], counts, 0.5))} "
+                    f"p95={_fmt_seconds(_quantile(data['buckets'], counts, 0.95))}"
+                )
+        else:
+            rows.sort(key=lambda row: -row[1])
+            for labels, value in rows[:top]:
+                lines.append(f"`{'/'.join(labels) or '-'}` {_num(value)}")
+        if len(rows) > top:
+            lines.append(f"+{len(rows) - top} lainnya")
+        lines.append("")
+
+    gauges = [
+        (name, labels, value, proc)
+        for proc, metrics in snapshots.items()
+        for name, data in metrics.items() if data["kind"] == "gauge"
+        for labels, value in data["values"]
+    ]
+    if gauges:
+        lines.append("*Gauge*")
+        for name, labels, value, proc in sorted(gauges, key=lambda g: (g[0], g[3])):
+            suffix = f"{{{'/'.join(labels)}}}" if labels else ""
+            lines.append(f"`{name}{suffix}` {_num(value)} ({proc})")
+
+    return "\n".join(lines).strip()
+
+
+# ============================================================
+# HTTP ENDPOINT
+# ============================================================
+class MetricsHandler(BaseHTTPRequestHandler):
+    server_version = "FusionMetrics/1"
+
+    def do_GET(self):
+        if self.path.split("?")[0].rstrip("/") != METRICS_PATH:
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = render(collect()).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        logger.debug(f"{self.address_string()} {fmt % args}")
+
+
+def start_exporter(listen: str = METRICS_LISTEN, port: int = METRICS_PORT):
+    """Start endpoint /metrics di daemon thread. Return server (atau None kalau nonaktif)."""
+    if not port:
+        return None
+    server = ThreadingHTTPServer((listen, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info(f"📈 Metrics endpoint listening on {listen}:{port}{METRICS_PATH}")
+    return server
@@ -0,0 +1,265 @@
+"""
+Record types ringkas (pakai __slots__) untuk data fleet.
+
+JSON di disk tetap sama (dict biasa); konversi hanya terjadi di batas
+storage (`bot.db`): `hydrate()` setelah json.load, `encode()` sebagai
+`default=` json.dump. Di memory tidak ada dict per VPS lagi → RSS jauh
+lebih kecil untuk 10k+ host, dan akses atribut lebih murah dari
+`.get(key, default)` berulang.
+"""
+import time
+from typing import Dict, Optional
+
+
+def _clean_num(value) -> Optional[str]:
+    if value in (None, "", "N/A", "None"):
+        return None
+    return str(value)
+
+
+# ============================================================
+# NODE INSTANCE (users[uid].vps[ip].instances[])
+# ============================================================
+DEFAULT_NODE = "main"
+
+
+class NodeInstance:
+    """Satu RL-Swarm di VPS: unit systemd + direktori (log di <home>/logs)."""
+    __slots__ = ("name", "service", "home")
+
+    def __init__(self, name: str, service: str = None, home: str = None):
+        self.name = name
+        self.service = service or f"rl-swarm-{name}.service"
+        self.home = (home or f"/root/rl-swarm-{name}").rstrip("/")
+
+    @property
+    def log(self) -> str:
+        return f"{self.home}/logs/swarm_launcher.log"
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> "NodeInstance":
+        return cls(d.get("name") or DEFAULT_NODE, d.get("service"), d.get("home"))
+
+    def to_dict(self) -> Dict:
+        return {"name": self.name, "service": self.service, "home": self.home}
+
+    def __repr__(self):
+        return f"NodeInstance(name={self.name!r}, service={self.service!r})"
+
+
+# Instance bawaan (satu node per VPS, layout lama)
+DEFAULT_INSTANCE = NodeInstance(DEFAULT_NODE, "rl-swarm.service", "/root/rl-swarm")
+
+
+def node_id(ip: str, name: str = DEFAULT_NODE) -> str:
+    """Key state per node (db["vps"], snapshot, alert): ip untuk instance bawaan, ip/name lainnya."""
+    return ip if name == DEFAULT_NODE else f"{ip}/{name}"
+
+
+def split_node(nid: str):
+    """Kebalikan node_id → (ip, name)."""
+    ip, _, name = nid.partition("/")
+    return ip, name or DEFAULT_NODE
+
+
+# ============================================================
+# VPS ENTRY (users[uid].vps[ip])
+# ============================================================
+class VPSRecord:
+    __slots__ = ("user", "password", "label", "tags", "instances", "extra")
+
+    def __init__(self, user="root", password="", label=None, tags=None, instances=None, extra=None):
+        self.user = user or "root"
+        self.password = password or ""
+        self.label = label
+        self.tags = list(tags) if tags else []
+        # Kosong = hanya DEFAULT_INSTANCE (format lama)
+        self.instances = list(instances) if instances else []
+        # Field yang tidak dikenal tetap dibawa supaya tidak hilang saat flush
+        self.extra = extra or None
+
+    def nodes(self):
+        """Semua instance node di VPS ini (minimal DEFAULT_INSTANCE)."""
+        return self.instances or [DEFAULT_INSTANCE]
+
+    def node(self, name: str) -> Optional[NodeInstance]:
+        return next((n for n in self.nodes() if n.name == name), None)
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> "VPSRecord":
+        d = dict(d)
+        return cls(
+            user=d.pop("user", "root"),
+            password=d.pop("password", ""),
+            label=d.pop("label", None),
+            tags=d.pop("tags", None),
+            instances=[NodeInstance.from_dict(n) for n in d.pop("instances", None) or []],
+            extra=d or None,
+        )
+
+    def to_dict(self) -> Dict:
+        d = {"user": self.user, "password": self.password}
+        if self.label is not None:
+            d["label"] = self.label
+        if self.tags:
+            d["tags"] = self.tags
+        if self.instances:
+            d["instances"] = [n.to_dict() for n in self.instances]
+        if self.extra:
+            d.update(self.extra)
+        return d
+
+    def __repr__(self):
+        return f"VPSRecord(user={self.user!r}, label={self.label!r}, tags={self.tags!r})"
+
+
+# ============================================================
+# PROBE RESULT (hasil check_nodes / snapshot / vps[ip].last)
+# ============================================================
+class ProbeResult:
+    __slots__ = ("ip", "label", "status", "peer",
+                 "score", "reward", "points",
+                 "score_prev", "reward_prev", "points_prev",
+                 "status_prev", "updated")
+
+    METRICS = ("score", "reward", "points")
+
+    def __init__(self, ip=None, label=0, status="offline", peer=None,
+                 score=None, reward=None, points=None,
+                 score_prev=None, reward_prev=None, points_prev=None,
+                 status_prev=None, updated=None):
+        self.ip = ip
+        self.label = label or 0
+        self.status = status
+        self.peer = peer if peer and peer != "N/A" else None
+        self.score = _clean_num(score)
+        self.reward = _clean_num(reward)
+        self.points = _clean_num(points)
+        self.score_prev = _clean_num(score_prev)
+        self.reward_prev = _clean_num(reward_prev)
+        self.points_prev = _clean_num(points_prev)
+        self.status_prev = status_prev
+        self.updated = updated if updated is not None else time.time()
+
+    # --------------------------------------------------------
+    # Formatting (sama seperti format report lama)
+    # --------------------------------------------------------
+    def fmt(self, name: str) -> str:
+        """'800 (+25)' / '800' / 'N/A'."""
+        new = getattr(self, name)
+        if not new:
+            return "N/A"
+        try:
+            newf = float(new)
+        except ValueError:
+            return new
+        d = self.delta(name)
+        if d is None:
+            return f"{int(newf)}"
+        return f"{int(newf)} (+{int(d)})" if d >= 0 else f"{int(newf)} ({int(d)})"
+
+    def delta(self, name: str) -> Optional[float]:
+        """Selisih dengan nilai sebelumnya, None kalau salah satu tidak ada."""
+        try:
+            return float(getattr(self, name)) - float(getattr(self, f"{name}_prev"))
+        except (TypeError, ValueError):
+            return None
+
+    @property
+    def status_changed(self) -> bool:
+        return self.status_prev is not None and self.status_prev != self.status
+
+    @property
+    def peer_str(self) -> str:
+        return self.peer or "N/A"
+
+    @property
+    def online(self) -> bool:
+        return self.status == "online"
+
+    # --------------------------------------------------------
+    # Storage (vps[ip].last)
+    # --------------------------------------------------------
+    @classmethod
+    def from_last(cls, ip: str, d: Dict) -> "ProbeResult":
+        return cls(
+            ip=ip,
+            status=d.get("status", "offline"),
+            peer=d.get("peer_id"),
+            score=d.get("score"),
+            reward=d.get("reward"),
+            points=d.get("points"),
+            updated=d.get("updated", 0),
+        )
+
+    def to_last(self) -> Dict:
+        return {
+            "score": self.score,
+            "reward": self.reward,
+            "points": self.points,
+            "peer_id": self.peer_str,
+            "status": self.status,
+            "updated": self.updated,
+        }
+
+    def __repr__(self):
+        return f"ProbeResult(ip={self.ip!r}, status={self.status!r}, score={self.score!r})"
+
+
+# ============================================================
+# KEY METADATA (users[uid].keys[filename])
+# ============================================================
+class KeyMeta:
+    __slots__ = ("path", "size", "uploaded")
+
+    def __init__(self, path: str, size: int = 0, uploaded: float = None):
+        self.path = path
+        self.size = size or 0
+        self.uploaded = uploaded or 0
+
+    @classmethod
+    def from_value(cls, value) -> "KeyMeta":
+        # Format lama: keys[filename] = "/path/ke/file"
+        if isinstance(value, str):
+            return cls(value)
+        return cls(value.get("path", ""), value.get("size", 0), value.get("uploaded", 0))
+
+    def to_dict(self) -> Dict:
+        return {"path": self.path, "size": self.size, "uploaded": self.uploaded}
+
+    def __repr__(self):
+        return f"KeyMeta(path={self.path!r})"
+
+
+# ============================================================
+# STORAGE BOUNDARY
+# ============================================================
+def hydrate(db: Dict) -> Dict:
+    """Ubah dict hasil json.load jadi record (in-place)."""
+    for user in db.get("users", {}).values():
+        vps_map = user.get("vps", {})
+        for ip, vps in vps_map.items():
+            if isinstance(vps, dict):
+                vps_map[ip] = VPSRecord.from_dict(vps)
+
+        keys = user.get("keys", {})
+        for name, value in keys.items():
+            if not isinstance(value, KeyMeta):
+                keys[name] = KeyMeta.from_value(value)
+
+    for ip, state in db.get("vps", {}).items():
+        last = state.get("last")
+        if isinstance(last, dict):
+            state["last"] = ProbeResult.from_last(ip, last)
+    return db
+
+
+def encode(obj):
+    """`default=` untuk json.dump."""
+    if isinstance(obj, VPSRecord):
+        return obj.to_dict()
+    if isinstance(obj, ProbeResult):
+        return obj.to_last()
+    if isinstance(obj, KeyMeta):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
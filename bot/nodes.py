@@ -0,0 +1,221 @@
+"""
+Beberapa instance RL-Swarm per VPS + probe batch per host.
+
+    users[uid].vps[ip].instances = [{"name", "service", "home"}, ...]
+    (kosong = satu node bawaan: rl-swarm.service + /root/rl-swarm)
+
+State per node di db["vps"][node_id] (lihat models.node_id): instance
+bawaan tetap pakai key `ip`, jadi data lama tidak perlu migrasi.
+
+Probe semua instance di satu host = SATU perintah SSH:
+
+    @@<nonce> res            bot.resources.PROBE_CMD (opsional)
+    @@<nonce> node main      status, score/reward/points/peer (1x grep),
+    @@<nonce> node n2        log baru sejak cursor (opsional)
+
+Instance bawaan dengan node agent: summary.json dibaca langsung
+(`agent {...}`), grep log hanya kalau summary tidak ada / basi.
+
+Nonce acak per perintah → isi log tidak mungkin dikira pemisah section.
+Biaya SSH sebanding jumlah host, bukan jumlah instance.
+"""
+import re
+import json
+import shlex
+import secrets
+from typing import Dict, List, Optional, Tuple
+
+from bot.ssh_client import SSHClient
+from bot.config import AGENT_SUMMARY_PATH, AGENT_MAX_AGE
+from bot.models import NodeInstance, DEFAULT_NODE, node_id
+from bot import resources
+
+# Maksimal byte log baru yang di-scan per instance per siklus
+ERROR_SCAN_BYTES = 1024 * 1024
+
+NAME_RE = re.compile(r"^[a-z0-9-]{1,16}$")
+SERVICE_RE = re.compile(r"^[A-Za-z0-9@._-]+\.service$")
+HOME_RE = re.compile(r"^/[A-Za-z0-9._/-]+$")
+
+# Satu grep per log: nilai terakhir tiap metric + peer ID
+_METRICS = (
+    "grep -aoE '(score|reward|points): [0-9.]*|Qm[a-zA-Z0-9]{44,}' \"$f\" 2>/dev/null | "
+    "awk '/^Qm/{p=$0;next}{v[$1]=$2}"
+    "END{print \"score\",v[\"score:\"];print \"reward\",v[\"reward:\"];"
+    "print \"points\",v[\"points:\"];print \"peer\",p}'; "
+)
+
+# Summary agent fresh (jam VPS sendiri → aman dari clock skew) → tanpa grep log
+_AGENT = (
+    f"a=$(head -c 65536 {shlex.quote(AGENT_SUMMARY_PATH)} 2>/dev/null | tr -d '\\n'); "
+    "u=$(printf '%s' \"$a\" | grep -o '\"updated\": *[0-9]*' | grep -o '[0-9]*$'); "
+    f"if [ -n \"$u\" ] && [ $(( $(date +%s) - u )) -le {AGENT_MAX_AGE} ]; then "
+    "printf 'agent %s\\n' \"$a\"; else "
+    + _METRICS +
+    "fi; "
+)
+
+
+# ============================================================
+# INSTANCE
+# ============================================================
+def validate(name: str, service: str = None, home: str = None) -> Tuple[Optional[NodeInstance], str]:
+    """Instance baru dari input user → (instance, "") atau (None, pesan error)."""
+    if not NAME_RE.match(name or ""):
+        return None, "Nama instance: a-z, 0-9, '-' (maks 16)"
+    inst = NodeInstance(name, service, home)
+    if not SERVICE_RE.match(inst.service):
+        return None, "Service harus seperti rl-swarm-2.service"
+    if not HOME_RE.match(inst.home) or ".." in inst.home:
+        return None, "Direktori harus path absolut, contoh /root/rl-swarm-2"
+    return inst, ""
+
+
+def node_ids(ip: str, vps) -> List[str]:
+    return [node_id(ip, n.name) for n in vps.nodes()]
+
+
+def units(instances) -> str:
+    return " ".join(shlex.quote(n.service) for n in instances)
+
+
+def systemctl_command(instances, verb: str) -> str:
+    """`systemctl <verb>` semua instance sekaligus (1 SSH), lalu status per unit."""
+    u = units(instances)
+    if verb == "stop":
+        return f"systemctl stop {u}"
+    return f"systemctl {verb} {u} && systemctl is-active {u}"
+
+
+def status_command(instances) -> str:
+    """Satu baris status per instance, urut sesuai `instances`."""
+    return f"systemctl is-active {units(instances)} 2>/dev/null; true"
+
+
+def parse_status(instances, output: str) -> Dict[str, bool]:
+    lines = output.strip().splitlines()
+    return {n.name: i < len(lines) and lines[i].strip() == "active" for i, n in enumerate(instances)}
+
+
+# ============================================================
+# BATCH PROBE
+# ============================================================
+def _section(nonce: str, head: str) -> str:
+    # Newline di depan marker: isi section sebelumnya (log) tidak perlu diakhiri \n
+    return f"printf '\\n@@{nonce} {head}\\n'; "
+
+
+def _log_cmd(cursor: dict) -> str:
+    inode = int(cursor.get("inode") or 0)
+    offset = int(cursor.get("offset") or 0)
+    return (
+        f"o={offset}; "
+        "set -- $(stat -c '%i %s' \"$f\" 2>/dev/null || echo 0 0); "
+        f"if [ \"$1\" != \"{inode}\" ] || [ \"$2\" -lt \"$o\" ]; then o=0; fi; "
+        f"if [ $(( $2 - o )) -gt {ERROR_SCAN_BYTES} ]; then o=$(( $2 - {ERROR_SCAN_BYTES} )); fi; "
+        "echo \"log $1 $2 $o\"; "
+        "tail -c +$(( o + 1 )) \"$f\" 2>/dev/null | head -c $(( $2 - o )); "
+    )
+
+
+def batch_command(instances, nonce: str, cursors: Optional[Dict[str, dict]] = None,
+                  with_resources: bool = False) -> str:
+    """
+    Perintah shell untuk probe semua `instances` di satu host.
+
+    Args:
+        cursors: name → cursor log {"inode", "offset"}; None = tanpa baca log
+        with_resources: ikut sertakan sampel CPU/RAM/disk/swap
+    """
+    parts = []
+    if with_resources:
+        parts.append(_section(nonce, "res") + resources.PROBE_CMD + "; ")
+    for inst in instances:
+        parts.append(
+            _section(nonce, f"node {inst.name}")
+            + f"f={shlex.quote(inst.log)}; "
+            + f"echo \"status $(systemctl is-active {shlex.quote(inst.service)} 2>/dev/null)\"; "
+            + (_AGENT if inst.name == DEFAULT_NODE else _METRICS)
+            + (_log_cmd(cursors.get(inst.name) or {}) if cursors is not None else "")
+        )
+    return "".join(parts)
+
+
+def _parse_node(text: str) -> dict:
+    node = {"status": "offline", "score": None, "reward": None, "points": None,
+            "peer": None, "agent": None, "cursor": None, "lines": None}
+    while text:
+        line, _, rest = text.partition("\n")
+        key, _, value = line.partition(" ")
+        if key == "log":
+            try:
+                inode, size, _ = (int(x) for x in value.split())
+            except ValueError:
+                break
+            body = rest
+            # Baris terakhir yang belum lengkap dibaca ulang di siklus berikutnya.
+            # Output di-decode surrogateescape (lihat probe) → byte persis seperti di VPS
+            if body and not body.endswith("\n"):
+                body, _, partial = body.rpartition("\n")
+                size -= len(partial.encode("utf-8", "surrogateescape"))
+            node["cursor"] = {"inode": inode, "offset": size}
+            # Byte UTF-8 rusak → U+FFFD (baris bisa masuk alert / pesan Telegram)
+            node["lines"] = body.encode("utf-8", "surrogateescape").decode("utf-8", "replace").splitlines()
+            break
+        if key == "status":
+            node["status"] = "online" if value.strip() == "active" else "offline"
+        elif key in ("score", "reward", "points", "peer"):
+            node[key] = value.strip() or None
+        elif key == "agent":
+            try:
+                summary = json.loads(value)
+            except ValueError:
+                summary = None
+            node["agent"] = summary if isinstance(summary, dict) else None
+        text = rest
+    return node
+
+
+def parse_batch(output: str, nonce: str) -> Tuple[Optional[str], Dict[str, dict]]:
+    """
+    Output batch_command → (teks blok resources | None, name → hasil node).
+
+    Hasil node: {"status", "score", "reward", "points", "peer",
+    "agent" (summary agent yang fresh | None), "cursor" (None kalau log
+    tidak dibaca), "lines"}.
+    """
+    res, nodes = None, {}
+    for chunk in ("\n" + output).split(f"\n@@{nonce} ")[1:]:
+        head, _, text = chunk.partition("\n")
+        if head == "res":
+            res = text
+        elif head.startswith("node "):
+            nodes[head[5:]] = _parse_node(text)
+    return res, nodes
+
+
+def probe(ip: str, vps, cursors: Optional[Dict[str, dict]] = None,
+          with_resources: bool = False) -> Optional[Tuple[Optional[str], Dict[str, dict]]]:
+    """
+    Probe semua instance VPS dengan 1 perintah SSH.
+
+    Returns:
+        parse_batch(...) atau None kalau SSH gagal
+    """
+    nonce = secrets.token_hex(8)
+    ok, output = SSHClient.execute(
+        ip, vps.user, vps.password,
+        batch_command(vps.nodes(), nonce, cursors, with_resources),
+        errors="surrogateescape"
+    )
+    if not ok or f"@@{nonce} " not in output:
+        return None
+    return parse_batch(output, nonce)
+
+
+def describe(instances) -> str:
+    """Daftar instance untuk pesan Telegram."""
+    return "\n".join(
+        f"• `{n.name}` — `{n.service}` · `{n.home}`" + (" (bawaan)" if n.name == DEFAULT_NODE else "")
+        for n in instances
+    )
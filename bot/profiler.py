@@ -0,0 +1,188 @@
+"""
+Profiling on-demand handler bot (cProfile), dipicu admin dari Telegram.
+
+    /profile 20          profile 20 handler berikutnya
+    /profile 30s         profile event loop selama 30 detik
+    /profile 20 file     + kirim file .prof (buka dengan snakeviz / pstats)
+    /profile stop        hentikan sekarang dan kirim hasil
+    /profile status
+
+- Mode N handler: profiler hanya aktif selama ada handler yang sedang
+  di-profile (enable saat masuk pertama, disable saat keluar terakhir),
+  jadi waktu idle tidak ikut. Task lain yang jalan di event loop pada
+  saat itu ikut tercatat → hasil teragregasi lintas task async.
+- Mode T detik: semua yang jalan di thread event loop selama T detik.
+- Satu sesi per proses; dengan BOT_WORKERS > 1 yang di-profile adalah
+  worker yang melayani admin.
+"""
+import io
+import os
+import time
+import asyncio
+import cProfile
+import logging
+import pstats
+from contextlib import contextmanager
+from typing import Optional
+
+from bot.config import TMP_DIR, PROFILE_MAX_CALLS, PROFILE_MAX_SECONDS, PROFILE_TOP
+from monitor.report import chunk, TELEGRAM_LIMIT
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.path.join(TMP_DIR, "profiles")
+
+
+class ProfileSession:
+    def __init__(self, bot, chat_id, calls: int = 0, seconds: float = 0, as_file: bool = False):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.calls = calls
+        self.remaining = calls
+        self.seconds = seconds
+        self.as_file = as_file
+        self.started = time.time()
+        self.active = 0
+        self.handled = 0
+        self.done = False
+        self.profile = cProfile.Profile()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def describe(self) -> str:
+        if self.seconds:
+            left = max(0, self.seconds - (time.time() - self.started))
+            return f"mode waktu {self.seconds:g}s, sisa {left:.0f}s"
+        return f"{self.handled}/{self.calls} handler, {self.active} sedang jalan"
+
+    # --------------------------------------------------------
+    # Mode N handler
+    # --------------------------------------------------------
+    def take(self) -> bool:
+        if self.done or self.seconds or self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        return True
+
+    def enter(self):
+        self.active += 1
+        if self.active == 1:
+            self.profile.enable()
+
+    def exit(self):
+        self.active -= 1
+        self.handled += 1
+        if self.active == 0:
+            self.profile.disable()
+            if self.remaining <= 0:
+                finish(self)
+
+    # --------------------------------------------------------
+    # Hasil
+    # --------------------------------------------------------
+    def stats_text(self, top: int = PROFILE_TOP) -> str:
+        buf = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=buf)
+        stats.strip_dirs().sort_stats("cumulative").print_stats(top)
+        return buf.getvalue().strip()
+
+    def dump(self) -> str:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f"fusion-{os.getpid()}-{int(self.started)}.prof")
+        self.profile.dump_stats(path)
+        return path
+
+    async def report(self):
+        scope = (f"{self.seconds:g} detik" if self.seconds else f"{self.handled} handler")
+        header = f"🔬 Profile selesai ({scope}, {time.time() - self.started:.1f}s)\n"
+        try:
+            text = self.stats_text()
+        except TypeError:
+            # pstats gagal kalau tidak ada data sama sekali
+            await self.bot.send_message(self.chat_id, header + "Tidak ada data.")
+            return
+
+        # Pecah per baris supaya blok ``` tetap utuh di setiap pesan
+        lines = [line.replace("`", "'")[:300] for line in text.splitlines()]
+        await self.bot.send_message(self.chat_id, header)
+        for part in chunk(lines, limit=TELEGRAM_LIMIT - len("```\n\n```"), sep="\n"):
+            await self.bot.send_message(self.chat_id, f"```\n{part}\n```", parse_mode="Markdown")
+
+        if self.as_file:
+            path = self.dump()
+            with open(path, "rb") as f:
+                await self.bot.send_document(
+                    self.chat_id, document=f, filename=os.path.basename(path),
+                    caption="pstats / snakeviz"
+                )
+
+
+_session: Optional[ProfileSession] = None
+
+
+# ============================================================
+# API
+# ============================================================
+def current() -> Optional[ProfileSession]:
+    return _session
+
+
+def start(bot, chat_id, calls: int = 0, seconds: float = 0, as_file: bool = False) -> ProfileSession:
+    """Mulai sesi baru. ValueError kalau masih ada sesi aktif."""
+    global _session
+    if _session is not None and not _session.done:
+        raise ValueError("Masih ada sesi profile aktif.")
+
+    session = ProfileSession(
+        bot, chat_id,
+        calls=min(calls, PROFILE_MAX_CALLS),
+        seconds=min(seconds, PROFILE_MAX_SECONDS),
+        as_file=as_file
+    )
+    _session = session
+
+    if session.seconds:
+        session.profile.enable()
+        loop = asyncio.get_running_loop()
+        session._timer = loop.call_later(session.seconds, finish, session)
+    logger.info(f"🔬 Profiling dimulai: {session.describe()}")
+    return session
+
+
+def finish(session: Optional[ProfileSession] = None):
+    """Hentikan sesi (default: yang aktif) dan kirim hasilnya lewat event loop."""
+    global _session
+    session = session or _session
+    if session is None or session.done:
+        return
+    session.done = True
+    if _session is session:
+        _session = None
+
+    if session._timer is not None:
+        session._timer.cancel()
+    # Mode waktu selalu enabled; mode handler hanya saat ada handler aktif
+    if session.seconds or session.active:
+        session.profile.disable()
+
+    async def _send():
+        try:
+            await session.report()
+        except Exception as e:
+            logger.error(f"Gagal kirim hasil profile: {e}")
+
+    asyncio.get_running_loop().create_task(_send())
+
+
+@contextmanager
+def hook():
+    """Bungkus dispatch handler: ikut di-profile kalau sesi mode N handler aktif."""
+    session = _session
+    if session is None or not session.take():
+        yield
+        return
+
+    session.enter()
+    try:
+        yield
+    finally:
+        session.exit()
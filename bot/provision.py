@@ -0,0 +1,470 @@
+"""
+Provisioning VPS dari bot, per step dengan checkpoint.
+
+    /provision 50G [IP/label ...]         scripts/setup_vps.sh
+    /provision move 50G [IP/label ...]    scripts/move_to_vps.sh
+    /provision resume                     ulangi host yang gagal terakhir
+    /provision status                     hasil terakhir (tanpa SSH)
+
+Script dijalankan per step (`<script> SWAP --step NAME`). Step yang sukses
+meninggalkan marker di VPS:
+
+    REMOTE_DIR/done/<step>    hash input step
+    REMOTE_DIR/log/<step>.log output step terakhir
+
+- Input step = isi fungsi step_<name> + bagian script di luar semua
+  step_* (helper bersama, preamble, runner) + parameternya: SWAP untuk
+  swap, isi file key di VPS untuk keys (di-hash di VPS, ikut dibaca
+  bersama marker).
+- Marker cocok dengan hash sekarang → step dilewati. Step yang
+  dependensinya dijalankan ulang ikut dijalankan ulang.
+- Step runtime (RUNTIME, mis. launch) tidak punya marker: inputnya
+  keadaan VPS saat itu, jadi selalu dijalankan.
+- Step yang tidak saling bergantung jalan paralel di VPS: satu perintah
+  SSH per gelombang (job background + wait). optimize → deps berurutan
+  karena sama-sama butuh lock apt.
+- Hasil (status + detik per step) disimpan di db["vps"][ip]["provision"],
+  jadi provision fleet yang gagal cukup di-resume: step yang sudah selesai
+  tidak dibayar lagi.
+"""
+import os
+import re
+import time
+import asyncio
+import hashlib
+import logging
+import secrets
+import shlex
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from bot.ssh_client import SSHClient
+from bot.config import TMP_DIR, PROVISION_CONCURRENCY, PROVISION_TIMEOUT, PROVISION_LOG_TAIL
+from bot.db import load_db, transaction
+from bot.utils import plain, reply_lines
+
+logger = logging.getLogger(__name__)
+
+SCRIPT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+REMOTE_DIR = "/var/lib/deklan-fusion/provision"
+
+SWAP_RE = re.compile(r"^[0-9]+[GgMm]$")
+
+# kind → (script, step → dependensi). Urutan dict = urutan step di script.
+PIPELINES = {
+    "setup": ("setup_vps.sh", {
+        "swap": (),
+        "optimize": (),
+        "deps": ("optimize",),
+        "fetch": ("deps",),
+        "launch": ("swap", "fetch"),
+    }),
+    "move": ("move_to_vps.sh", {
+        "swap": (),
+        "optimize": (),
+        "deps": ("optimize",),
+        "keys": (),
+        "launch": ("swap", "deps", "keys"),
+    }),
+}
+
+# Step tanpa marker: selalu jalan (deploy / restart node)
+RUNTIME = {"launch"}
+
+# step → file di VPS yang isinya ikut jadi input hash step
+REMOTE_INPUTS = {
+    "keys": ("/root/ezlabs/swarm.pem", "/root/ezlabs/userApiKey.json", "/root/ezlabs/userData.json"),
+}
+
+_STEP_DEF = re.compile(r"^step_([a-z]+)\(\) \{$", re.M)
+_ANSI = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+
+STATUS_ICON = {"ok": "✅", "skip": "⏭", "fail": "❌", "blocked": "⛔"}
+
+
+# ============================================================
+# STEP + HASH
+# ============================================================
+def load_script(kind: str) -> str:
+    """Isi script dengan newline LF (file di repo CRLF, bash di VPS tidak terima \\r)."""
+    with open(os.path.join(SCRIPT_DIR, PIPELINES[kind][0]), newline="") as f:
+        return f.read().replace("\r\n", "\n")
+
+
+def step_bodies(text: str) -> Dict[str, str]:
+    """name → isi fungsi step_<name>() { ... } di script."""
+    matches = list(_STEP_DEF.finditer(text))
+    bodies = {}
+    for i, m in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        body, _, _ = text[m.end():end].rpartition("\n}\n")
+        bodies[m.group(1)] = body
+    return bodies
+
+
+def step_hashes(kind: str, swap: str, text: str = None,
+                inputs: Dict[str, str] = None) -> Dict[str, Optional[str]]:
+    """
+    Hash input per step; berubah kalau isi step, helper bersama di luar
+    step_*, atau parameternya berubah. Step RUNTIME → None (tanpa marker).
+
+    `inputs` = step → digest file REMOTE_INPUTS di VPS (read_markers).
+    """
+    text = text if text is not None else load_script(kind)
+    bodies = step_bodies(text)
+    shared = text
+    for body in bodies.values():
+        shared = shared.replace(body, "", 1)
+    shared = hashlib.sha256(shared.encode()).hexdigest()
+
+    hashes = {}
+    for name in PIPELINES[kind][1]:
+        if name not in bodies:
+            raise ValueError(f"step_{name} tidak ada di {PIPELINES[kind][0]}")
+        if name in RUNTIME:
+            hashes[name] = None
+            continue
+        data = bodies[name] + f"\nSHARED={shared}"
+        if name == "swap":
+            data += f"\nSWAP_SIZE={swap.upper()}"
+        if name in REMOTE_INPUTS:
+            data += f"\nFILES={(inputs or {}).get(name, '')}"
+        hashes[name] = hashlib.sha256(data.encode()).hexdigest()[:16]
+    return hashes
+
+
+def plan(deps: Dict[str, tuple], hashes: Dict[str, str], markers: Dict[str, str]) -> Tuple[list, List[list]]:
+    """
+    Step yang dilewati + gelombang step yang harus jalan.
+
+    Step jalan kalau markernya beda dari hash sekarang, step RUNTIME (hash
+    None), atau salah satu dependensinya ikut jalan. Gelombang = kedalaman
+    di antara step yang jalan.
+
+    Returns:
+        (skipped [name], waves [[name, ...], ...])
+    """
+    level = {}
+    for name, needs in deps.items():
+        pending = [level[d] for d in needs if d in level]
+        if pending or hashes[name] is None or markers.get(name) != hashes[name]:
+            level[name] = 1 + max(pending, default=-1)
+    skipped = [name for name in deps if name not in level]
+    waves = [[n for n in deps if level.get(n) == i] for i in range(max(level.values(), default=-1) + 1)]
+    return skipped, waves
+
+
+# ============================================================
+# REMOTE
+# ============================================================
+def _markers_command(names) -> str:
+    # Digest file input: nama + isi per file (file hilang → "-"), jadi
+    # menambah / mengganti key mengubah hash step-nya
+    inputs = "".join(
+        f"printf '@input %s %s\\n' {name} \"$(for f in {' '.join(shlex.quote(f) for f in REMOTE_INPUTS[name])}; do "
+        "echo \"$f\"; sha256sum 2>/dev/null < \"$f\" || echo -; done | sha256sum | cut -c1-16)\"; "
+        for name in names if name in REMOTE_INPUTS
+    )
+    return (
+        f"mkdir -p {REMOTE_DIR}/done {REMOTE_DIR}/log && "
+        f"for s in {' '.join(names)}; do "
+        f"printf '%s %s\\n' \"$s\" \"$(cat {REMOTE_DIR}/done/$s 2>/dev/null)\"; done; "
+        + inputs
+    )
+
+
+def read_markers(ip: str, vps, names) -> Optional[Tuple[Dict[str, str], Dict[str, str]]]:
+    """
+    Hash marker per step + digest REMOTE_INPUTS di VPS (1 SSH).
+
+    Returns:
+        (markers, inputs), None kalau SSH gagal
+    """
+    ok, out = SSHClient.execute(ip, vps.user, vps.password, _markers_command(names))
+    if not ok:
+        return None
+    markers, inputs = {}, {}
+    for line in out.splitlines():
+        name, _, value = line.strip().partition(" ")
+        if name == "@input":
+            name, _, value = value.partition(" ")
+            if name in names and value:
+                inputs[name] = value.strip()
+        elif name in names and value:
+            markers[name] = value.strip()
+    return markers, inputs
+
+
+def wave_command(script: str, swap: str, wave: list, hashes: Dict[str, str], nonce: str) -> str:
+    """
+    Jalankan semua step di `wave` paralel. Per step satu baris
+    `@@<nonce> step NAME RC DETIK` (+ `@@<nonce> tail NAME ...` kalau gagal).
+    Step RUNTIME tidak meninggalkan marker.
+    """
+    remote = f"{REMOTE_DIR}/{script}"
+    tail = (
+        f"[ $rc -eq 0 ] || tail -n {PROVISION_LOG_TAIL} \"$D/log/$1.log\" | sed \"s/^/@@{nonce} tail $1 /\"; "
+        if PROVISION_LOG_TAIL else ""
+    )
+    return (
+        f"D={REMOTE_DIR}; cd ~; "
+        "_step(){ "
+        "rm -f \"$D/done/$1\"; t=$(date +%s); "
+        f"bash {remote} {shlex.quote(swap)} --step \"$1\" >\"$D/log/$1.log\" 2>&1 </dev/null; rc=$?; "
+        "[ $rc -eq 0 ] && [ \"$2\" != - ] && echo \"$2\" > \"$D/done/$1\"; "
+        + tail +
+        f"echo \"@@{nonce} step $1 $rc $(( $(date +%s) - t ))\"; "
+        "}; "
+        + "".join(f"_step {name} {hashes[name] or '-'} & " for name in wave)
+        + "wait"
+    )
+
+
+def parse_wave(output: str, nonce: str) -> Dict[str, dict]:
+    """Output wave_command → name → {"rc", "secs", "tail"}."""
+    results, tails = {}, {}
+    prefix = f"@@{nonce} "
+    for line in output.splitlines():
+        if not line.startswith(prefix):
+            continue
+        kind, _, rest = line[len(prefix):].partition(" ")
+        name, _, value = rest.partition(" ")
+        if kind == "tail":
+            tails.setdefault(name, []).append(_ANSI.sub("", value).strip())
+        elif kind == "step":
+            try:
+                rc, secs = (int(x) for x in value.split())
+            except ValueError:
+                continue
+            results[name] = {"rc": rc, "secs": secs}
+    for name, r in results.items():
+        r["tail"] = [t for t in tails.get(name, []) if t]
+    return results
+
+
+def _upload_script(ip: str, vps, kind: str, text: str) -> Tuple[bool, str]:
+    script = PIPELINES[kind][0]
+    os.makedirs(TMP_DIR, exist_ok=True)
+    # File lokal per host: provision_fleet meng-upload dari banyak thread
+    local = os.path.join(TMP_DIR, f"provision-{ip}-{script}")
+    with open(local, "w", newline="\n") as f:
+        f.write(text)
+    try:
+        return SSHClient.upload_file(ip, vps.user, vps.password, local, f"{REMOTE_DIR}/{script}")
+    finally:
+        os.remove(local)
+
+
+# ============================================================
+# PROVISION
+# ============================================================
+def provision_host(ip: str, vps, kind: str, swap: str) -> dict:
+    """
+    Provision satu host: baca marker → rencana → gelombang step.
+
+    Returns:
+        {"kind", "swap", "ts", "secs", "ok", "error", "steps": {name: {"status", "secs", "tail"}}}
+    """
+    started = time.time()
+    script, deps = PIPELINES[kind]
+    text = load_script(kind)
+    result = {"kind": kind, "swap": swap, "ts": started, "secs": 0, "ok": False,
+              "error": None, "steps": {}}
+
+    remote = read_markers(ip, vps, list(deps))
+    if remote is None:
+        result["error"] = "SSH gagal"
+    else:
+        markers, inputs = remote
+        hashes = step_hashes(kind, swap, text, inputs)
+        skipped, waves = plan(deps, hashes, markers)
+        for name in skipped:
+            result["steps"][name] = {"status": "skip", "secs": 0, "tail": []}
+        if waves:
+            ok, msg = _upload_script(ip, vps, kind, text)
+            if not ok:
+                result["error"] = msg
+                waves = []
+
+        failed = set()
+        for wave in waves:
+            blocked = [n for n in wave if any(d in failed for d in deps[n])]
+            for name in blocked:
+                result["steps"][name] = {"status": "blocked", "secs": 0, "tail": []}
+            failed.update(blocked)
+            wave = [n for n in wave if n not in blocked]
+            if not wave:
+                continue
+
+            nonce = secrets.token_hex(8)
+            ok, out = SSHClient.execute(
+                ip, vps.user, vps.password,
+                wave_command(script, swap, wave, hashes, nonce), timeout=PROVISION_TIMEOUT
+            )
+            done = parse_wave(out, nonce) if ok else {}
+            for name in wave:
+                r = done.get(name)
+                if r is None:
+                    result["steps"][name] = {"status": "fail", "secs": 0,
+                                             "tail": [_ANSI.sub("", out).strip()[-200:] or "tidak ada hasil"]}
+                    failed.add(name)
+                elif r["rc"] != 0:
+                    result["steps"][name] = {"status": "fail", "secs": r["secs"],
+                                             "tail": [f"exit {r['rc']}"] + r["tail"]}
+                    failed.add(name)
+                else:
+                    result["steps"][name] = {"status": "ok", "secs": r["secs"], "tail": []}
+
+        result["ok"] = result["error"] is None and not failed
+
+    result["secs"] = round(time.time() - started)
+    with transaction(("vps", ip)) as db:
+        db.setdefault("vps", {}).setdefault(ip, {})["provision"] = result
+    logger.info(
+        f"Provision {kind} {ip}: {'ok' if result['ok'] else 'gagal'} "
+        f"({result['secs']}s, {sum(s['status'] == 'skip' for s in result['steps'].values())} step dilewati)"
+    )
+    return result
+
+
+def provision_fleet(targets: Dict[str, object], kind: str, swap: str,
+                    concurrency: int = PROVISION_CONCURRENCY) -> Dict[str, dict]:
+    """provision_host semua target, maksimal `concurrency` host bersamaan."""
+    if not targets:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(targets)),
+                            thread_name_prefix="provision") as pool:
+        futures = {
+            ip: pool.submit(contextvars.copy_context().run, provision_host, ip, vps, kind, swap)
+            for ip, vps in targets.items()
+        }
+        return {ip: f.result() for ip, f in futures.items()}
+
+
+def last_result(db: dict, ip: str) -> Optional[dict]:
+    return (db.get("vps", {}).get(ip) or {}).get("provision")
+
+
+# ============================================================
+# RENDER
+# ============================================================
+def _dur(secs: int) -> str:
+    return f"{secs // 60}m {secs % 60:02d}s" if secs >= 60 else f"{secs}s"
+
+
+def render_host(label, ip: str, result: Optional[dict]) -> str:
+    if not result:
+        return f"#{label} `{ip}` — belum pernah di-provision"
+
+    head = f"{'✅' if result['ok'] else '❌'} #{label} `{ip}` — {result['kind']} {result['swap']} · {_dur(result['secs'])}"
+    lines = [head]
+    if result.get("error"):
+        lines.append(f"  {plain(result['error'])[:200]}")
+    for name in PIPELINES[result["kind"]][1]:
+        step = result["steps"].get(name)
+        if not step:
+            continue
+        if step["status"] == "skip":
+            lines.append(f"  ⏭ {name} (sudah, input sama)")
+        elif step["status"] == "blocked":
+            lines.append(f"  ⛔ {name} (dependensi gagal)")
+        else:
+            lines.append(f"  {STATUS_ICON[step['status']]} {name} {_dur(step['secs'])}")
+        lines += [f"    `{plain(t)[:160]}`" for t in step.get("tail", [])]
+    return "\n".join(lines)
+
+
+# ============================================================
+# TELEGRAM
+# ============================================================
+USAGE = (
+    "Format:\n"
+    "`/provision 50G [IP/label ...]` — setup_vps.sh\n"
+    "`/provision move 50G [IP/label ...]` — move_to_vps.sh\n"
+    "`/provision resume` — ulangi host yang gagal\n"
+    "`/provision status` — hasil terakhir"
+)
+
+
+def _select(vps_list: dict, query: List[str]) -> Tuple[dict, List[str]]:
+    """Filter VPS user berdasarkan IP / label (kosong = semua)."""
+    if not query:
+        return dict(vps_list), []
+    selected, unknown = {}, []
+    for q in query:
+        q = q.lstrip("#")
+        match = {ip: d for ip, d in vps_list.items() if ip == q or str(d.label) == q}
+        if not match:
+            unknown.append(q)
+        selected.update(match)
+    return selected, unknown
+
+
+def _blocks(blocks: List[str]) -> List[str]:
+    lines = []
+    for block in blocks:
+        lines += ["", block]
+    return lines
+
+
+async def provision_command(update, context):
+    """/provision — lihat USAGE."""
+    message = update.message
+    args = message.text.split()[1:]
+    db = load_db()
+    vps_list = db.get("users", {}).get(str(update.effective_user.id), {}).get("vps", {})
+    if not vps_list:
+        await message.reply_text("❌ Tidak ada VPS.")
+        return
+
+    if args[:1] == ["status"]:
+        blocks = [render_host(d.label, ip, last_result(db, ip)) for ip, d in vps_list.items()]
+        await reply_lines(message, "🛠 *Provision terakhir*", _blocks(blocks))
+        return
+
+    if args[:1] == ["resume"]:
+        jobs = {}
+        for ip, d in vps_list.items():
+            last = last_result(db, ip)
+            if last and not last["ok"] and last["kind"] in PIPELINES:
+                jobs.setdefault((last["kind"], last["swap"]), {})[ip] = d
+        if not jobs:
+            await message.reply_text("✅ Tidak ada provision yang gagal.")
+            return
+    else:
+        kind = "setup"
+        if args[:1] == ["move"]:
+            kind, args = "move", args[1:]
+        if not args or not SWAP_RE.match(args[0]):
+            await message.reply_text(USAGE, parse_mode="Markdown")
+            return
+        targets, unknown = _select(vps_list, args[1:])
+        if unknown:
+            await message.reply_text(f"❌ VPS tidak ditemukan: {', '.join(plain(u) for u in unknown)}")
+            return
+        jobs = {(kind, args[0].upper()): targets}
+
+    for (kind, swap), targets in jobs.items():
+        await message.reply_text(
+            f"🛠 Provision *{kind}* (swap {swap}) di {len(targets)} VPS "
+            f"(paralel {min(PROVISION_CONCURRENCY, len(targets))})…\n"
+            f"Step yang sudah selesai dengan input sama dilewati.",
+            parse_mode="Markdown"
+        )
+        results = await asyncio.to_thread(provision_fleet, targets, kind, swap)
+
+        ok = [ip for ip, r in results.items() if r["ok"]]
+        skipped = sum(s["status"] == "skip" for r in results.values() for s in r["steps"].values())
+        header = (
+            f"🛠 *Provision {kind} selesai*\n"
+            f"✅ Sukses: {len(ok)}\n"
+            f"❌ Gagal: {len(results) - len(ok)}\n"
+            f"⏭ Step dilewati: {skipped}"
+        )
+        # Yang gagal dulu
+        order = sorted(results, key=lambda ip: results[ip]["ok"])
+        lines = _blocks([render_host(targets[ip].label, ip, results[ip]) for ip in order])
+        if len(ok) < len(results):
+            lines += ["", "Ulangi yang gagal: `/provision resume`"]
+        await reply_lines(message, header, lines)
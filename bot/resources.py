@@ -0,0 +1,288 @@
+"""
+Resource VPS (CPU, RAM, disk, swap) + rekomendasi swap.
+
+    siklus monitor ──▶ bot.nodes.probe (1 perintah SSH: PROBE_CMD + node)
+                              │
+                              ├── db["vps"][ip]["resources"]   sampel terakhir + flag
+                              └── RESOURCE_DIR/<ip>.jsonl       time series per host
+
+- Probe ikut perintah SSH batch monitor, jadi tidak ada sesi SSH
+  tambahan. Output per baris diberi prefix (`cpu`, `load`, `mem`, …).
+- CPU % = selisih counter /proc/stat terhadap sampel sebelumnya, jadi
+  nilainya rata-rata sepanjang satu siklus monitor, bukan sesaat.
+- Rekomendasi swap: RAM + swap ≥ RESOURCE_MEM_TARGET_GB, dibatasi disk
+  kosong (+ /swapfile lama yang akan diganti) dikurangi cadangan.
+"""
+import os
+import json
+import math
+import time
+import logging
+from typing import Optional
+
+from bot.config import (
+    RESOURCE_DIR, RESOURCE_HISTORY, RESOURCE_MEM_TARGET_GB, RESOURCE_DISK_RESERVE_GB,
+    RESOURCE_LOAD_MAX, RESOURCE_CPU_MAX, RESOURCE_MEM_MIN_PCT,
+    RESOURCE_SWAP_MAX_PCT, RESOURCE_DISK_MIN_PCT
+)
+from bot.db import load_db
+
+logger = logging.getLogger(__name__)
+
+GB = 1024 ** 3
+
+SWAPFILE = "/swapfile"
+
+# Ukuran di keyboard.swap_menu (GB)
+SWAP_SIZES = (32, 50, 80, 100)
+
+PROBE_CMD = (
+    "head -n1 /proc/stat 2>/dev/null; "
+    "echo \"load $(cat /proc/loadavg 2>/dev/null)\"; "
+    "echo \"ncpu $(nproc 2>/dev/null)\"; "
+    "grep -E '^(MemTotal|MemAvailable|SwapTotal|SwapFree):' /proc/meminfo 2>/dev/null | sed 's/^/mem /'; "
+    "echo \"df $(df -Pk / 2>/dev/null | tail -n1)\"; "
+    "swapon --show=NAME,SIZE,USED --bytes --noheadings 2>/dev/null | sed 's/^/swap /'"
+)
+
+FLAG_LABEL = {
+    "load": "load tinggi",
+    "cpu": "CPU penuh",
+    "mem": "RAM hampir habis",
+    "swap": "swap hampir penuh",
+    "disk": "disk hampir penuh",
+}
+
+
+# ============================================================
+# PARSE
+# ============================================================
+def parse_sample(text: str) -> Optional[dict]:
+    """
+    Output PROBE_CMD → sampel (byte), None kalau /proc tidak terbaca.
+
+    `cpu_raw` = [total, idle] counter mentah, untuk CPU % siklus berikutnya.
+    """
+    sample = {"swaps": []}
+    mem = {}
+    for line in text.splitlines():
+        tag, _, rest = line.partition(" ")
+        fields = rest.split()
+        try:
+            if tag == "cpu" and len(fields) >= 4:
+                ticks = [int(x) for x in fields[:8]]
+                # idle + iowait
+                sample["cpu_raw"] = [sum(ticks), ticks[3] + (ticks[4] if len(ticks) > 4 else 0)]
+            elif tag == "load" and len(fields) >= 3:
+                sample["load"] = [float(x) for x in fields[:3]]
+            elif tag == "ncpu" and fields:
+                sample["ncpu"] = int(fields[0])
+            elif tag == "mem" and len(fields) >= 2:
+                mem[fields[0].rstrip(":")] = int(fields[1]) * 1024
+            elif tag == "df" and len(fields) >= 4:
+                sample["disk_total"] = int(fields[1]) * 1024
+                sample["disk_avail"] = int(fields[3]) * 1024
+            elif tag == "swap" and len(fields) >= 3:
+                sample["swaps"].append(
+                    {"name": fields[0], "size": int(fields[1]), "used": int(fields[2])}
+                )
+        except ValueError:
+            continue
+
+    if "MemTotal" not in mem:
+        return None
+    sample["mem_total"] = mem["MemTotal"]
+    sample["mem_avail"] = mem.get("MemAvailable", 0)
+    sample["swap_total"] = mem.get("SwapTotal", 0)
+    sample["swap_free"] = mem.get("SwapFree", 0)
+    return sample
+
+
+def cpu_percent(prev: Optional[list], raw: Optional[list]) -> Optional[float]:
+    """CPU % rata-rata antara dua counter /proc/stat (None kalau reboot / belum ada)."""
+    if not prev or not raw:
+        return None
+    total, idle = raw[0] - prev[0], raw[1] - prev[1]
+    if total <= 0 or idle < 0:
+        return None
+    return round(100.0 * (total - idle) / total, 1)
+
+
+# ============================================================
+# ANALYSIS
+# ============================================================
+def _pct(part, whole) -> Optional[float]:
+    return round(100.0 * part / whole, 1) if whole else None
+
+
+def overload_flags(s: dict) -> list:
+    """Nama flag (lihat FLAG_LABEL) yang melewati ambang RESOURCE_*."""
+    flags = []
+    ncpu = s.get("ncpu") or 1
+    if s.get("load") and s["load"][1] / ncpu >= RESOURCE_LOAD_MAX:
+        flags.append("load")
+    if s.get("cpu") is not None and s["cpu"] >= RESOURCE_CPU_MAX:
+        flags.append("cpu")
+    avail = _pct(s.get("mem_avail", 0), s.get("mem_total"))
+    if avail is not None and avail < RESOURCE_MEM_MIN_PCT:
+        flags.append("mem")
+    if s.get("swap_total"):
+        used = _pct(s["swap_total"] - s.get("swap_free", 0), s["swap_total"])
+        if used >= RESOURCE_SWAP_MAX_PCT:
+            flags.append("swap")
+    disk = _pct(s.get("disk_avail", 0), s.get("disk_total"))
+    if disk is not None and disk < RESOURCE_DISK_MIN_PCT:
+        flags.append("disk")
+    return flags
+
+
+def suggest_swap(s: dict) -> dict:
+    """
+    Rekomendasi ukuran swap untuk satu host.
+
+    create_swap.sh mengganti /swapfile (swap lain hanya di-swapoff), jadi
+    ukuran /swapfile lama dihitung sebagai ruang disk yang bisa dipakai.
+
+    Returns:
+        {"size": "50G" | None, "reason": str}
+    """
+    swapfile = sum(sw["size"] for sw in s.get("swaps", []) if sw["name"] == SWAPFILE)
+    other = max(0, s.get("swap_total", 0) - swapfile)
+    need = RESOURCE_MEM_TARGET_GB * GB - s.get("mem_total", 0) - other
+    room = s.get("disk_avail", 0) + swapfile - RESOURCE_DISK_RESERVE_GB * GB
+
+    if need <= 0:
+        return {"size": None, "reason": "RAM sudah cukup, swap tidak perlu"}
+    if swapfile >= need:
+        return {"size": None, "reason": "swap sekarang sudah cukup"}
+
+    need_gb = math.ceil(need / GB)
+    room_gb = int(room // GB)
+    fits = [size for size in SWAP_SIZES if need_gb <= size <= room_gb]
+    if fits:
+        return {"size": f"{fits[0]}G", "reason": f"target RAM+swap {RESOURCE_MEM_TARGET_GB}G"}
+    if need_gb <= room_gb:
+        return {"size": f"{need_gb}G", "reason": f"target RAM+swap {RESOURCE_MEM_TARGET_GB}G"}
+    if room_gb >= 1 and room_gb * GB > swapfile:
+        return {"size": f"{room_gb}G", "reason": f"dibatasi disk (cadangan {RESOURCE_DISK_RESERVE_GB}G)"}
+    if swapfile:
+        return {"size": None, "reason": "swap sekarang sudah maksimal untuk disk ini"}
+    return {"size": None, "reason": "disk tidak cukup untuk swap"}
+
+
+# ============================================================
+# RECORD
+# ============================================================
+def _history_path(ip: str) -> str:
+    return os.path.join(RESOURCE_DIR, f"{ip}.jsonl")
+
+
+def _append_history(ip: str, point: dict):
+    """Tambah satu titik; file dipangkas ke RESOURCE_HISTORY saat 2x lipat."""
+    os.makedirs(RESOURCE_DIR, exist_ok=True)
+    path = _history_path(ip)
+    with open(path, "a") as f:
+        f.write(json.dumps(point, separators=(",", ":")) + "\n")
+        size = f.tell()
+
+    # Cek murah berdasarkan ukuran dulu (satu titik ≥ 150 byte)
+    if size < RESOURCE_HISTORY * 2 * 150:
+        return
+    with open(path) as f:
+        lines = f.readlines()
+    if len(lines) > RESOURCE_HISTORY * 2:
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            f.writelines(lines[-RESOURCE_HISTORY:])
+        os.replace(tmp, path)
+
+
+def update(host: dict, ip: str, sample: dict, now: float = None) -> dict:
+    """
+    Simpan sampel baru ke state host (dipanggil di dalam transaction) +
+    time series. Return state resources yang baru.
+    """
+    now = now if now is not None else time.time()
+    prev = host.get("resources") or {}
+    sample["cpu"] = cpu_percent(prev.get("cpu_raw"), sample.get("cpu_raw"))
+    sample["ts"] = now
+
+    state = dict(sample)
+    state["flags"] = overload_flags(sample)
+    state["swap_suggest"] = suggest_swap(sample)
+    host["resources"] = state
+
+    point = {k: v for k, v in sample.items() if k not in ("cpu_raw", "swaps")}
+    try:
+        _append_history(ip, point)
+    except OSError as e:
+        logger.warning(f"Gagal simpan history resource {ip}: {e}")
+    return state
+
+
+def latest(db: dict, ip: str) -> Optional[dict]:
+    return (db.get("vps", {}).get(ip) or {}).get("resources")
+
+
+def history(ip: str, limit: int = RESOURCE_HISTORY) -> list:
+    """Titik time series terakhir (lama → baru)."""
+    try:
+        with open(_history_path(ip)) as f:
+            lines = f.readlines()[-limit:]
+    except OSError:
+        return []
+    points = []
+    for line in lines:
+        try:
+            points.append(json.loads(line))
+        except ValueError:
+            continue
+    return points
+
+
+def overloaded(db: dict = None) -> dict:
+    """ip → flag untuk semua host yang sedang overload (sampel terakhir)."""
+    db = db if db is not None else load_db()
+    result = {}
+    for ip, host in db.get("vps", {}).items():
+        flags = (host.get("resources") or {}).get("flags")
+        if flags:
+            result[ip] = flags
+    return result
+
+
+# ============================================================
+# RENDER
+# ============================================================
+def _gb(n: int) -> str:
+    return f"{n / GB:.1f}G"
+
+
+def describe_flags(flags) -> str:
+    return ", ".join(FLAG_LABEL.get(f, f) for f in flags)
+
+
+def render_host(label, ip: str, s: Optional[dict]) -> str:
+    if not s:
+        return f"#{label} `{ip}` — belum ada data (tunggu siklus monitor)"
+
+    ncpu = s.get("ncpu") or "?"
+    load = s.get("load") or [0, 0, 0]
+    cpu = f"{s['cpu']:.0f}%" if s.get("cpu") is not None else "-"
+    lines = [
+        f"{'🔴' if s.get('flags') else '🟢'} #{label} `{ip}`",
+        f"CPU  : {ncpu} core · {cpu} · load {load[0]:.2f}/{load[1]:.2f}/{load[2]:.2f}",
+        f"RAM  : {_gb(s['mem_total'] - s.get('mem_avail', 0))} / {_gb(s['mem_total'])}",
+        f"Swap : {_gb(s.get('swap_total', 0) - s.get('swap_free', 0))} / {_gb(s.get('swap_total', 0))}",
+        f"Disk : {_gb(s.get('disk_avail', 0))} kosong / {_gb(s.get('disk_total', 0))}",
+    ]
+    if s.get("flags"):
+        lines.append(f"⚠️ {describe_flags(s['flags'])}")
+    suggest = s.get("swap_suggest") or {}
+    if suggest.get("size"):
+        lines.append(f"💡 Swap disarankan: *{suggest['size']}* ({suggest['reason']})")
+    elif suggest:
+        lines.append(f"💡 {suggest['reason']}")
+    age = time.time() - s.get("ts", 0)
+    lines.append(f"🕒 {age / 60:.0f} menit lalu")
+    return "\n".join(lines)
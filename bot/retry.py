@@ -0,0 +1,127 @@
+"""
+Retry operasi remote per host (backoff eksponensial + jitter).
+
+    results = await retry.fleet(retry.NODE_START, vps_list, start_one)
+    # ip → (ok, pesan, jumlah percobaan)
+
+- Yang diulang hanya kegagalan transport (SSHClient.last_failure):
+  timeout, koneksi ditolak / putus, error protokol SSH. Auth gagal atau
+  perintah yang error di VPS langsung final.
+- Operasi idempotent (systemctl start, upload key) boleh diulang walau
+  putus di tengah perintah. Untuk operasi tidak idempotent (create swap)
+  hanya langkah eksekusi remote yang dijaga: gagal connect atau upload
+  (phase "transfer", file cuma ditimpa) tetap diulang, putus saat
+  perintah sudah jalan (phase "command") langsung final.
+- Per ronde hanya host yang gagal yang diulang. Jeda antar ronde acak
+  0..BASE × 2^(n-1) detik (maks RETRY_MAX_DELAY).
+- Budget per operasi: maks RETRY_BUDGET_RATIO × jumlah host percobaan
+  ulang (min RETRY_BUDGET_MIN), jadi fleet yang down total tidak dibanjiri
+  retry.
+"""
+import math
+import random
+import asyncio
+import logging
+from typing import Callable, Dict, Optional, Tuple
+
+from bot.ssh_client import SSHClient
+from bot.config import (
+    RETRY_ATTEMPTS, RETRY_BASE_DELAY, RETRY_MAX_DELAY, RETRY_BUDGET_RATIO, RETRY_BUDGET_MIN
+)
+from bot.metrics import SSH_RETRIES
+
+logger = logging.getLogger(__name__)
+
+# Alasan dari ssh_client._reason yang dianggap sementara
+TRANSIENT = {"timeout", "refused", "network", "ssh"}
+
+
+class RetryPolicy:
+    """Kebijakan retry satu jenis operasi remote."""
+
+    __slots__ = ("name", "idempotent", "attempts")
+
+    def __init__(self, name: str, idempotent: bool, attempts: int = RETRY_ATTEMPTS):
+        self.name = name
+        self.idempotent = idempotent
+        self.attempts = attempts
+
+
+NODE_START = RetryPolicy("node_start", idempotent=True)
+KEY_SYNC = RetryPolicy("key_sync", idempotent=True)
+# create_swap.sh swapoff + hapus /swapfile dulu: jangan jalan dua kali bersamaan.
+# Upload script-nya sendiri aman diulang.
+CREATE_SWAP = RetryPolicy("create_swap", idempotent=False)
+
+
+def backoff(attempt: int, base: float = RETRY_BASE_DELAY, cap: float = RETRY_MAX_DELAY) -> float:
+    """Jeda sebelum retry ke-`attempt` (1, 2, …): full jitter."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+def budget(hosts: int) -> int:
+    return max(RETRY_BUDGET_MIN, math.ceil(RETRY_BUDGET_RATIO * hosts))
+
+
+def retryable(policy: RetryPolicy, failure: Optional[Tuple[str, str]]) -> bool:
+    """failure = SSHClient.last_failure() dari percobaan yang gagal."""
+    if failure is None:
+        return False
+    reason, phase = failure
+    # Hanya phase "command" yang berarti perintah remote mungkin sudah jalan
+    return reason in TRANSIENT and (policy.idempotent or phase != "command")
+
+
+def _attempt(fn: Callable, ip: str, vps) -> Tuple[bool, str, Optional[Tuple[str, str]]]:
+    # Jalan di thread: last_failure dibaca di context yang sama dengan panggilan SSH
+    ok, msg = fn(ip, vps)
+    return ok, msg, None if ok else SSHClient.last_failure()
+
+
+async def fleet(policy: RetryPolicy, hosts: Dict[str, object],
+                fn: Callable[[str, object], Tuple[bool, str]]) -> Dict[str, Tuple[bool, str, int]]:
+    """
+    Jalankan `fn(ip, vps)` untuk semua host, ulangi hanya host yang gagal
+    sementara sampai policy.attempts atau budget habis.
+
+    Returns:
+        ip → (ok, pesan, jumlah percobaan)
+    """
+    results = {}
+    pending = list(hosts)
+    left = budget(len(hosts))
+
+    for attempt in range(policy.attempts):
+        if attempt:
+            if len(pending) > left:
+                SSH_RETRIES.inc(policy.name, "budget", value=len(pending) - left)
+                pending = pending[:left]
+            if not pending:
+                break
+            left -= len(pending)
+            await asyncio.sleep(backoff(attempt))
+
+        retry_next = []
+        for ip in pending:
+            ok, msg, failure = await asyncio.to_thread(_attempt, fn, ip, hosts[ip])
+            results[ip] = (ok, msg, attempt + 1)
+            if attempt:
+                SSH_RETRIES.inc(policy.name, "ok" if ok else "fail")
+            if not ok and retryable(policy, failure):
+                retry_next.append(ip)
+        pending = retry_next
+
+    recovered = sum(1 for ok, _, n in results.values() if ok and n > 1)
+    if recovered or pending:
+        logger.info(
+            f"Retry {policy.name}: {recovered} host pulih, "
+            f"{sum(1 for ok, _, _ in results.values() if not ok)} tetap gagal"
+        )
+    return results
+
+
+def summary(results: Dict[str, Tuple[bool, str, int]]) -> Tuple[int, int, int]:
+    """(sukses, gagal, sukses setelah retry)."""
+    ok = sum(1 for r in results.values() if r[0])
+    recovered = sum(1 for r in results.values() if r[0] and r[2] > 1)
+    return ok, len(results) - ok, recovered
@@ -1,145 +1,180 @@
 import os
-import json
+import time
 import logging
-from bot.ssh_client import SSHClient
+from bot.config import AGENT_MAX_AGE
+from bot.db import load_db, transaction, find_host, fleet
+from bot.models import ProbeResult, DEFAULT_NODE, node_id
+from bot import nodes
 
 logger = logging.getLogger(__name__)
 
-DB_PATH = "/opt/deklan-fusion/fusion_db.json"
-
 
 # ======================================
-# DATABASE
+# NODE AGENT SUMMARY
 # ======================================
-def load_db():
-    """Load database dari JSON file."""
-    if not os.path.exists(DB_PATH):
-        return {"vps": {}}
+# Field ringkasan agent yang disimpan di db["vps"][ip]["agent"]
+AGENT_FIELDS = ("status", "peer", "score", "reward", "points",
+                "errors", "last_error", "last_error_at", "updated")
+
+
+def agent_state(summary: dict, source: str) -> dict:
+    """
+    Subset ringkasan agent yang disimpan di DB.
+
+    source: "push" (dari collector) atau "ssh" (dibaca probe batch, lihat bot.nodes)
+    """
+    state = {k: summary.get(k) for k in AGENT_FIELDS}
+    state["source"] = source
+    state["received"] = time.time()
+    return state
 
-    try:
-        with open(DB_PATH, "r") as f:
-            return json.load(f)
-    except Exception:
-        return {"vps": {}}
 
+def apply_agent(result: ProbeResult, summary: dict) -> ProbeResult:
+    result.status = "online" if summary.get("status") == "online" else "offline"
+    result.peer = summary.get("peer")
+    result.score = summary.get("score")
+    result.reward = summary.get("reward")
+    result.points = summary.get("points")
+    return result
 
-def save_db(db):
-    """Save database ke JSON file."""
-    with open(DB_PATH, "w") as f:
-        json.dump(db, f, indent=4)
+
+def _pushed_fresh(state) -> bool:
+    return (
+        bool(state) and state.get("source") == "push"
+        and time.time() - (state.get("received") or 0) <= AGENT_MAX_AGE
+    )
+
+
+# ======================================
+# PEER ID CACHE
+# ======================================
+# Peer ID hanya berubah kalau swarm.pem diganti / node di-reinstall,
+# jadi disimpan per node di db["vps"][node_id]["peer"] = {"id", "at"} dan
+# hanya di-invalidate oleh event: upload key, update node, restart,
+# atau refresh manual. Invalidate menyimpan {"invalidated": ts} supaya
+# probe yang sudah jalan sebelum event tidak menulis balik ID lama.
+def cached_peer(db, ip):
+    """Peer ID dari cache DB (tanpa SSH), None kalau belum ada / di-invalidate."""
+    entry = db.get("vps", {}).get(ip, {}).get("peer") or {}
+    return entry.get("id")
+
+
+def _cache_peer(state: dict, peer, started: float):
+    entry = state.get("peer") or {}
+    if not peer or entry.get("id") == peer or entry.get("invalidated", 0) > started:
+        return
+    state["peer"] = {"id": peer, "at": time.time()}
+
+
+def fetch_peers(ip, vps) -> dict:
+    """Grep peer ID semua instance VPS (1 SSH) lalu simpan ke cache. Return node_id → peer."""
+    started = time.time()
+    probed = nodes.probe(ip, vps)
+    if probed is None:
+        return {}
+    peers = {
+        node_id(ip, name): data["peer"] for name, data in probed[1].items() if data["peer"]
+    }
+    if peers:
+        with transaction(*[("vps", nid) for nid in peers]) as db:
+            for nid, peer in peers.items():
+                _cache_peer(db.setdefault("vps", {}).setdefault(nid, {}), peer, started)
+    return peers
+
+
+def invalidate_peers(ips, reason=""):
+    """Buang cache peer ID semua node di host-host ini (event: key / update / restart / refresh)."""
+    ips = list(ips)
+    if not ips:
+        return
+    current = load_db()
+    nids = []
+    for ip in ips:
+        _, entry = find_host(current, ip)
+        nids += nodes.node_ids(ip, entry) if entry is not None else [ip]
+
+    now = time.time()
+    with transaction(*[("vps", nid) for nid in nids]) as db:
+        vps_state = db.setdefault("vps", {})
+        for nid in nids:
+            vps_state.setdefault(nid, {})["peer"] = {"invalidated": now}
+    logger.info(f"Peer cache di-invalidate ({reason or 'manual'}): {len(ips)} host, {len(nids)} node")
 
 
 # ======================================
 # PARSE REWARD LOGS
 # ======================================
-def check_reward(ip, username, password):
+def _new_result(db, nid, label) -> ProbeResult:
+    """ProbeResult kosong + nilai siklus sebelumnya (untuk delta)."""
+    last = db.get("vps", {}).get(nid, {}).get("last")
+    return ProbeResult(
+        ip=nid,
+        label=label,
+        score_prev=last.score if last else None,
+        reward_prev=last.reward if last else None,
+        points_prev=last.points if last else None,
+        status_prev=last.status if last else None,
+    )
+
+
+# ======================================
+# MULTI INSTANCE (1 SSH PER HOST)
+# ======================================
+def node_results(ip, vps, probed: dict, started: float) -> list:
     """
-    Check reward dan score dari VPS.
-    Return dict:
-    {
-        "label": 1,
-        "peer": "Qmxxx",
-        "status": "online/offline",
-        "score": "800 (+25)",
-        "reward": "3085 (+225)",
-        "points": "N/A (+0)"
-    }
+    Hasil nodes.probe → ProbeResult per instance (urut vps.nodes()), disimpan
+    di db["vps"][node_id]. Instance bawaan memakai push agent kalau fresh,
+    lalu summary agent yang dibaca probe, baru hasil grep log.
     """
-
-    # Load DB
     db = load_db()
-    vps_data = db["vps"].get(ip, {})
-    last = vps_data.get("last", {})
-
-    # Old values
-    old_reward = last.get("reward")
-    old_score = last.get("score")
-    old_points = last.get("points")
-
-    # Label (index VPS)
-    all_ips = list(db["vps"].keys())
-    label = all_ips.index(ip) + 1 if ip in all_ips else 0
-
-    # Read logs
-    success, output = SSHClient.execute(
-        ip, username, password,
-        "tail -n 200 /root/rl-swarm/logs/swarm_launcher.log 2>/dev/null || echo ''"
-    )
+    label = vps.label or 0
+    results = []
+    for inst in vps.nodes():
+        nid = node_id(ip, inst.name)
+        result = _new_result(db, nid, label)
+        pushed = db.get("vps", {}).get(nid, {}).get("agent")
+        data = probed.get(inst.name)
+
+        agent = None
+        if inst.name == DEFAULT_NODE and _pushed_fresh(pushed):
+            apply_agent(result, pushed)
+        elif data is not None and data.get("agent"):
+            apply_agent(result, data["agent"])
+            agent = agent_state(data["agent"], "ssh")
+        elif data is not None:
+            result.status = data["status"]
+            result.score = data["score"]
+            result.reward = data["reward"]
+            result.points = data["points"]
+            result.peer = cached_peer(db, nid) or data["peer"]
+        else:
+            results.append(result)
+            continue
+
+        _store(nid, result, agent, started=started)
+        results.append(result)
+    return results
 
-    if not success:
-        return {
-            "label": label,
-            "peer": "N/A",
-            "status": "offline",
-            "score": "N/A",
-            "reward": "N/A",
-            "points": "N/A"
-        }
-
-    # Parse values
-    def extract(pattern):
-        ok, out = SSHClient.execute(
-            ip, username, password,
-            f"grep -o \"{pattern}\" /root/rl-swarm/logs/swarm_launcher.log | tail -1"
-        )
-        return out.strip() if ok and out.strip() else None
-
-    new_score = extract("score: [0-9\\.]*")
-    new_reward = extract("reward: [0-9\\.]*")
-    new_points = extract("points: [0-9\\.]*")
-    peer_id = extract("Qm[a-zA-Z0-9]\\{44,\\}")
-
-    # Clean numeric
-    if new_score and "score:" in new_score:
-        new_score = new_score.split(":")[1].strip()
-    if new_reward and "reward:" in new_reward:
-        new_reward = new_reward.split(":")[1].strip()
-    if new_points and "points:" in new_points:
-        new_points = new_points.split(":")[1].strip()
-
-    # Online status
-    ok, st = SSHClient.execute(
-        ip, username, password,
-        "systemctl is-active rl-swarm.service 2>/dev/null || echo inactive"
-    )
-    status = "online" if ok and "active" in st else "offline"
-
-    # Format delta
-    def delta(new, old):
-        if not new:
-            return "N/A"
-        try:
-            newf = float(new)
-            if old:
-                oldf = float(old)
-                d = newf - oldf
-                return f"{int(newf)} (+{int(d)})" if d >= 0 else f"{int(newf)} ({int(d)})"
-            return f"{int(newf)}"
-        except:
-            return new
-
-    score_str = delta(new_score, old_score)
-    reward_str = delta(new_reward, old_reward)
-    points_str = delta(new_points, old_points)
-
-    # Save back to DB
-    db["vps"].setdefault(ip, {})
-    db["vps"][ip]["last"] = {
-        "score": new_score,
-        "reward": new_reward,
-        "points": new_points,
-        "peer_id": peer_id or "N/A"
-    }
-    save_db(db)
-
-    return {
-        "label": label,
-        "peer": peer_id or "N/A",
-        "status": status,
-        "score": score_str,
-        "reward": reward_str,
-        "points": points_str
-    }
+
+def check_nodes(ip, vps) -> list:
+    """Status + metric semua instance di satu VPS dengan 1 perintah SSH."""
+    started = time.time()
+    probed = nodes.probe(ip, vps)
+    if probed is None:
+        db = load_db()
+        return [_new_result(db, node_id(ip, n.name), vps.label or 0) for n in vps.nodes()]
+    return node_results(ip, vps, probed[1], started)
+
+
+def _store(ip, result, agent=None, started=0.0):
+    # Save back to DB (dalam transaksi: SSH di atas bisa lama dan
+    # proses lain mungkin sudah menulis DB sementara itu)
+    with transaction(("vps", ip)) as db:
+        state = db.setdefault("vps", {}).setdefault(ip, {})
+        state["last"] = result
+        if agent is not None:
+            state["agent"] = agent
+        _cache_peer(state, result.peer, started)
 
 
 # ======================================
@@ -149,10 +184,7 @@ def check_all_rewards():
     db = load_db()
     results = []
 
-    for ip, info in db["vps"].items():
-        username = info.get("user", "root")
-        password = info.get("password", "")
-        res = check_reward(ip, username, password)
-        results.append(res)
+    for ip, info in fleet(db).items():
+        results.extend(check_nodes(ip, info))
 
     return results
@@ -0,0 +1,260 @@
+"""
+Fleet snapshot: hasil probe terakhir monitor → file biner fixed-layout
+yang dibaca bot lewat mmap (tanpa JSON, tanpa SSH).
+
+Layout (little-endian):
+
+    HEADER (64 byte)
+        magic       4s   b"DFSN"
+        version     H
+        record_size H
+        generation  Q    naik +1 setiap publish
+        published   d    unix timestamp
+        count       I
+        (padding)
+
+    RECORD × count (urut berdasarkan ip → binary search)
+        ip          46s  ip/nama instance; >46 byte → "#" + sha1 hex
+        status      B    0=unknown 1=online 2=offline
+        label       I
+        score, score_delta, reward, reward_delta, points, points_delta  6×d  (NaN = N/A)
+        updated     d
+        peer        64s
+
+Writer menulis file baru ke tmp lalu os.replace() → reader tidak pernah
+melihat file setengah jadi. Reader cukup os.stat() per akses untuk
+mendeteksi generation baru lalu remap.
+"""
+import os
+import mmap
+import hashlib
+import math
+import time
+import struct
+import logging
+from bisect import bisect_left
+from typing import Iterable, Optional
+
+from bot.config import SNAPSHOT_PATH, SNAPSHOT_MAX_AGE
+from bot.models import ProbeResult
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"DFSN"
+VERSION = 1
+
+HEADER = struct.Struct("<4sHHQdI")
+HEADER_SIZE = 64
+RECORD = struct.Struct("<46sBI6dd64s")
+
+STATUS_CODE = {"online": 1, "offline": 2}
+STATUS_NAME = {1: "online", 2: "offline"}
+
+NAN = float("nan")
+
+
+def _num(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return NAN
+
+
+def _key(ip: str) -> bytes:
+    # Dipotong bisa bikin dua instance (IPv6 + nama) berbagi key → hash saja
+    raw = ip.encode("utf-8")
+    if len(raw) > 46 or raw.startswith(b"#"):
+        raw = b"#" + hashlib.sha1(raw).hexdigest().encode("ascii")
+    return raw.ljust(46, b"\0")
+
+
+# ============================================================
+# WRITER (monitor)
+# ============================================================
+def _current_generation(path: str) -> int:
+    try:
+        with open(path, "rb") as f:
+            magic, version, _, generation, _, _ = HEADER.unpack(f.read(HEADER.size))
+        if magic == MAGIC:
+            return generation
+    except (OSError, struct.error):
+        pass
+    return 0
+
+
+def pack_record(r: ProbeResult) -> bytes:
+    def pair(name):
+        new = _num(getattr(r, name))
+        old = _num(getattr(r, f"{name}_prev"))
+        return new, (new - old if not math.isnan(old) else NAN)
+
+    score, score_d = pair("score")
+    reward, reward_d = pair("reward")
+    points, points_d = pair("points")
+
+    return RECORD.pack(
+        _key(r.ip),
+        STATUS_CODE.get(r.status, 0),
+        int(r.label or 0),
+        score, score_d, reward, reward_d, points, points_d,
+        float(r.updated or time.time()),
+        (r.peer or "").encode("ascii", "ignore")[:64].ljust(64, b"\0")
+    )
+
+
+def publish(records: Iterable[ProbeResult], path: str = SNAPSHOT_PATH) -> int:
+    """Tulis generation baru secara atomic. Return nomor generation."""
+    packed = sorted((_key(r.ip), pack_record(r)) for r in records if r.ip)
+    generation = _current_generation(path) + 1
+
+    header = HEADER.pack(MAGIC, VERSION, RECORD.size, generation, time.time(), len(packed))
+    buf = bytearray(header.ljust(HEADER_SIZE, b"\0"))
+    for _, rec in packed:
+        buf += rec
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(buf)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+    logger.info(f"Snapshot generation {generation} published ({len(packed)} hosts)")
+    return generation
+
+
+# ============================================================
+# READER (bot)
+# ============================================================
+class SnapshotRecord:
+    __slots__ = ("ip", "status", "label", "score", "score_delta",
+                 "reward", "reward_delta", "points", "points_delta",
+                 "updated", "peer")
+
+    def __init__(self, raw: tuple):
+        (ip, status, self.label,
+         self.score, self.score_delta, self.reward, self.reward_delta,
+         self.points, self.points_delta, self.updated, peer) = raw
+        self.ip = ip.rstrip(b"\0").decode("utf-8", "replace")
+        self.status = STATUS_NAME.get(status, "unknown")
+        self.peer = peer.rstrip(b"\0").decode("ascii") or None
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.updated
+
+    def to_probe(self) -> ProbeResult:
+        """ProbeResult yang sama bentuknya dengan hasil check_nodes()."""
+        def value(v):
+            return None if math.isnan(v) else repr(v)
+
+        def prev(v, d):
+            return None if math.isnan(v) or math.isnan(d) else repr(v - d)
+
+        return ProbeResult(
+            ip=self.ip,
+            label=self.label,
+            status=self.status,
+            peer=self.peer,
+            score=value(self.score), score_prev=prev(self.score, self.score_delta),
+            reward=value(self.reward), reward_prev=prev(self.reward, self.reward_delta),
+            points=value(self.points), points_prev=prev(self.points, self.points_delta),
+            updated=self.updated,
+        )
+
+
+class _Keys:
+    """Sequence ip-key di atas mmap supaya bisa di-bisect tanpa copy."""
+
+    def __init__(self, mm, count):
+        self.mm = mm
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        off = HEADER_SIZE + i * RECORD.size
+        return self.mm[off:off + 46]
+
+
+class SnapshotReader:
+    def __init__(self, path: str = SNAPSHOT_PATH):
+        self.path = path
+        self._mm = None
+        self._ident = None
+        self.generation = 0
+        self.published = 0.0
+        self.count = 0
+
+    def _close(self):
+        if self._mm is not None:
+            self._mm.close()
+        self._mm = None
+        self.count = 0
+
+    def _refresh(self) -> bool:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            self._close()
+            self._ident = None
+            return False
+
+        ident = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if ident == self._ident and self._mm is not None:
+            return True
+
+        self._close()
+        self._ident = ident
+        if st.st_size < HEADER_SIZE:
+            return False
+
+        with open(self.path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, record_size, generation, published, count = HEADER.unpack_from(mm, 0)
+        if (magic != MAGIC or version != VERSION or record_size != RECORD.size
+                or HEADER_SIZE + count * RECORD.size > len(mm)):
+            logger.warning(f"Snapshot {self.path} tidak valid, diabaikan")
+            mm.close()
+            return False
+
+        self._mm = mm
+        self.generation = generation
+        self.published = published
+        self.count = count
+        return True
+
+    def get(self, ip: str, max_age: float = SNAPSHOT_MAX_AGE) -> Optional[SnapshotRecord]:
+        """Record untuk ip, atau None kalau tidak ada / lebih tua dari max_age."""
+        if not self._refresh() or not self.count:
+            return None
+
+        key = _key(ip)
+        i = bisect_left(_Keys(self._mm, self.count), key)
+        if i >= self.count:
+            return None
+
+        off = HEADER_SIZE + i * RECORD.size
+        raw = RECORD.unpack_from(self._mm, off)
+        if raw[0] != key:
+            return None
+
+        rec = SnapshotRecord(raw)
+        rec.ip = ip     # key bisa berupa hash
+        if max_age and rec.age > max_age:
+            return None
+        return rec
+
+
+_reader = None
+
+
+def get_reader() -> SnapshotReader:
+    """Reader singleton per proses."""
+    global _reader
+    if _reader is None:
+        _reader = SnapshotReader()
+    return _reader
@@ -2,18 +2,62 @@
 SSH Client wrapper untuk komunikasi dengan VPS menggunakan paramiko.
 Mendukung execute command dan upload file.
 """
+import time
 import paramiko
 import logging
+import functools
+import contextvars
 from typing import Optional, Tuple
 
+from bot.metrics import SSH_SECONDS, SSH_REQUESTS, SSH_FAILURES
+from bot.tracing import span
+
 logger = logging.getLogger(__name__)
 
+# (reason, phase) kegagalan transport SSH terakhir di context ini (lihat bot.retry)
+_last_failure = contextvars.ContextVar("ssh_last_failure", default=None)
+
+
+def _reason(exc: Exception) -> str:
+    """Kategori kegagalan untuk metrics (bukan pesan lengkap → label tetap sedikit)."""
+    if isinstance(exc, paramiko.AuthenticationException):
+        return "auth"
+    if isinstance(exc, paramiko.SSHException):
+        return "ssh"
+    if isinstance(exc, (TimeoutError, OSError)) and "timed out" in str(exc):
+        return "timeout"
+    if isinstance(exc, ConnectionRefusedError):
+        return "refused"
+    if isinstance(exc, OSError):
+        return "network"
+    return "error"
+
+
+def _failed(op: str, host: str, reason: str, phase: str = "connect"):
+    SSH_REQUESTS.inc(op, "error")
+    SSH_FAILURES.inc(host, reason)
+    _last_failure.set((reason, phase))
+
+
+def _traced(name: str):
+    """Span `ssh.<op>` per panggilan (host sebagai atribut)."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(host, *args, **kwargs):
+            _last_failure.set(None)
+            with span(name, host=host):
+                return func(host, *args, **kwargs)
+        return wrapper
+    return decorator
+
 
 class SSHClient:
     """Wrapper untuk SSH operations menggunakan paramiko."""
     
     @staticmethod
-    def execute(host: str, username: str, password: str, command: str, timeout: int = 30) -> Tuple[bool, str]:
+    @_traced("ssh.execute")
+    def execute(host: str, username: str, password: str, command: str, timeout: int = 30,
+                compress: bool = False, errors: str = "ignore") -> Tuple[bool, str]:
         """
         Execute command via SSH.
         
@@ -23,36 +67,56 @@ class SSHClient:
             password: SSH password
             command: Command yang akan dijalankan
             timeout: Timeout dalam detik
+            compress: Kompresi zlib di transport SSH (output besar / teks)
+            errors: Error handler decode UTF-8. "surrogateescape" kalau
+                    pemanggil butuh jumlah byte persis (cursor log):
+                    len(output.encode("utf-8", "surrogateescape"))
             
         Returns:
             Tuple (success: bool, output: str)
         """
+        phase = "connect"
         try:
+            started = time.perf_counter()
             client = paramiko.SSHClient()
             client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            client.connect(host, username=username, password=password, timeout=timeout)
+            with span("ssh.connect"):
+                client.connect(host, username=username, password=password, timeout=timeout,
+                               compress=compress)
+            connected = time.perf_counter()
+            SSH_SECONDS.observe(connected - started, "execute", "connect")
+            phase = "command"
             
-            stdin, stdout, stderr = client.exec_command(command, timeout=timeout)
-            output = stdout.read().decode('utf-8', errors='ignore')
-            error = stderr.read().decode('utf-8', errors='ignore')
+            # Hanya kata pertama command yang dicatat (command bisa berisi token)
+            with span("ssh.command", cmd=command.split(None, 1)[0][:24] if command else ""):
+                stdin, stdout, stderr = client.exec_command(command, timeout=timeout)
+                output = stdout.read().decode('utf-8', errors=errors)
+                error = stderr.read().decode('utf-8', errors=errors)
             
             client.close()
+            SSH_SECONDS.observe(time.perf_counter() - connected, "execute", "command")
             
             if error and not output:
+                SSH_REQUESTS.inc("execute", "stderr")
                 return False, error
+            SSH_REQUESTS.inc("execute", "ok")
             return True, output
             
         except paramiko.AuthenticationException:
             logger.error(f"SSH Authentication failed for {host}")
+            _failed("execute", host, "auth", phase)
             return False, "❌ Authentication failed"
         except paramiko.SSHException as e:
             logger.error(f"SSH Error for {host}: {str(e)}")
+            _failed("execute", host, "ssh", phase)
             return False, f"❌ SSH Error: {str(e)}"
         except Exception as e:
             logger.error(f"Unexpected error for {host}: {str(e)}")
+            _failed("execute", host, _reason(e), phase)
             return False, f"❌ Error: {str(e)}"
     
     @staticmethod
+    @_traced("ssh.upload")
     def upload_file(host: str, username: str, password: str, 
                    local_path: str, remote_path: str, timeout: int = 30) -> Tuple[bool, str]:
         """
@@ -69,10 +133,15 @@ class SSHClient:
         Returns:
             Tuple (success: bool, message: str)
         """
+        phase = "connect"
         try:
+            started = time.perf_counter()
             transport = paramiko.Transport((host, 22))
             transport.connect(username=username, password=password)
             sftp = paramiko.SFTPClient.from_transport(transport)
+            connected = time.perf_counter()
+            SSH_SECONDS.observe(connected - started, "upload", "connect")
+            phase = "transfer"
             
             # Ensure remote directory exists
             remote_dir = '/'.join(remote_path.split('/')[:-1])
@@ -84,28 +153,53 @@ class SSHClient:
             sftp.put(local_path, remote_path)
             sftp.close()
             transport.close()
+            SSH_SECONDS.observe(time.perf_counter() - connected, "upload", "transfer")
+            SSH_REQUESTS.inc("upload", "ok")
             
             return True, f"✅ File uploaded to {host}:{remote_path}"
             
         except Exception as e:
             logger.error(f"SFTP upload error for {host}: {str(e)}")
+            _failed("upload", host, _reason(e), phase)
             return False, f"❌ Upload failed: {str(e)}"
     
     @staticmethod
-    def test_connection(host: str, username: str, password: str, timeout: int = 10) -> bool:
+    def last_failure() -> Optional[Tuple[str, str]]:
         """
-        Test SSH connection.
+        Kegagalan transport dari panggilan SSHClient terakhir di context ini.
+
+        Returns:
+            (reason, phase) — reason seperti _reason(), phase "connect" /
+            "command" / "transfer"; None kalau sukses atau yang gagal
+            perintahnya sendiri (stderr dari VPS)
+        """
+        return _last_failure.get()
+    
+    @staticmethod
+    @_traced("ssh.test")
+    def test_connection(host: str, username: str, password: str, timeout: int = 10) -> Tuple[bool, str]:
+        """
+        Test SSH connection (login saja, tanpa command).
         
         Returns:
-            True jika connection berhasil, False jika gagal
+            Tuple (success: bool, message: str) - message berisi alasan gagal
         """
         try:
+            started = time.perf_counter()
             client = paramiko.SSHClient()
             client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            client.connect(host, username=username, password=password, timeout=timeout)
+            client.connect(host, username=username, password=password, timeout=timeout,
+                           banner_timeout=timeout, auth_timeout=timeout)
             client.close()
-            return True
-        except:
-            return False
+            SSH_SECONDS.observe(time.perf_counter() - started, "test", "connect")
+            SSH_REQUESTS.inc("test", "ok")
+            return True, "✅ Connected"
+        except paramiko.AuthenticationException:
+            _failed("test", host, "auth")
+            return False, "❌ Authentication failed"
+        except Exception as e:
+            reason = _reason(e)
+            _failed("test", host, reason)
+            return False, f"❌ {reason}: {str(e) or type(e).__name__}"
 
 
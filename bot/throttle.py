@@ -0,0 +1,270 @@
+"""
+Rate limiter per-user + budget global sesi SSH.
+
+Semua request yang masuk ke message_handler / callback_handler lewat
+`admit()` sebelum di-dispatch:
+
+- Token bucket per user → biaya = jumlah VPS yang akan disentuh
+  (minimal 1), jadi user dengan 200 VPS yang spam "🔄 Restart Node"
+  habis token jauh lebih cepat dari user yang cuma buka menu. Kalau
+  jumlahnya baru diketahui setelah dispatch (file import), sisanya
+  ditagih lewat `charge()`.
+- SessionBudget global → total sesi SSH yang sedang jalan di semua
+  user dibatasi MAX_SSH_SESSIONS. Request yang belum kebagian slot
+  diantrikan (user dapat notifikasi ⏳), dan ditolak kalau antrian
+  lebih lama dari SSH_QUEUE_TIMEOUT.
+"""
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, Tuple
+
+from bot.config import (
+    RATE_LIMIT_BURST, RATE_LIMIT_REFILL,
+    MAX_SSH_SESSIONS, SSH_QUEUE_TIMEOUT
+)
+from bot import metrics
+from bot.tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# TOKEN BUCKET
+# ============================================================
+class TokenBucket:
+    """Token bucket klasik: kapasitas `capacity`, refill `rate` token/detik."""
+
+    __slots__ = ("capacity", "rate", "tokens", "updated")
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = float(capacity)
+        self.rate = float(rate)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def consume(self, cost: float = 1.0) -> float:
+        """
+        Ambil `cost` token.
+
+        Returns:
+            0.0 kalau berhasil, atau jumlah detik yang harus ditunggu
+            sampai token cukup.
+        """
+        now = time.monotonic()
+        self._refill(now)
+
+        cost = min(float(cost), self.capacity)
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+
+        if self.rate <= 0:
+            return float("inf")
+        return (cost - self.tokens) / self.rate
+
+    def is_full(self) -> bool:
+        self._refill(time.monotonic())
+        return self.tokens >= self.capacity
+
+
+class RateLimiter:
+    """Kumpulan token bucket, satu per user_id."""
+
+    # Bersihkan bucket yang sudah penuh lagi setiap N panggilan,
+    # supaya dict tidak tumbuh terus untuk user yang sudah pergi.
+    SWEEP_EVERY = 1000
+
+    def __init__(self, capacity: float = RATE_LIMIT_BURST, rate: float = RATE_LIMIT_REFILL):
+        self.capacity = capacity
+        self.rate = rate
+        self._buckets: Dict[int, TokenBucket] = {}
+        self._calls = 0
+
+    def check(self, user_id: int, cost: float = 1.0) -> float:
+        """Return 0.0 kalau diizinkan, selain itu detik sampai boleh lagi."""
+        self._calls += 1
+        if self._calls % self.SWEEP_EVERY == 0:
+            self._sweep()
+
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            bucket = TokenBucket(self.capacity, self.rate)
+            self._buckets[user_id] = bucket
+        return bucket.consume(cost)
+
+    def _sweep(self):
+        idle = [uid for uid, b in self._buckets.items() if b.is_full()]
+        for uid in idle:
+            del self._buckets[uid]
+
+
+# ============================================================
+# GLOBAL SSH SESSION BUDGET
+# ============================================================
+class SessionBudget:
+    """
+    Counting semaphore dengan acquire(n) — satu request bisa minta
+    beberapa slot sekaligus (fan-out ke banyak VPS).
+    """
+
+    def __init__(self, capacity: int = MAX_SSH_SESSIONS):
+        self.capacity = max(1, int(capacity))
+        self.in_use = 0
+        self.waiting = 0
+        self._cond = asyncio.Condition()
+
+    def clamp(self, n: int) -> int:
+        return max(0, min(int(n), self.capacity))
+
+    def available(self, n: int) -> bool:
+        return self.in_use + self.clamp(n) <= self.capacity
+
+    async def acquire(self, n: int, timeout: float = None) -> bool:
+        n = self.clamp(n)
+        if n == 0:
+            return True
+
+        async with self._cond:
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(
+                    self._cond.wait_for(lambda: self.in_use + n <= self.capacity),
+                    timeout
+                )
+            except asyncio.TimeoutError:
+                return False
+            finally:
+                self.waiting -= 1
+
+            self.in_use += n
+            return True
+
+    async def release(self, n: int):
+        n = self.clamp(n)
+        if n == 0:
+            return
+        async with self._cond:
+            self.in_use = max(0, self.in_use - n)
+            self._cond.notify_all()
+
+
+limiter = RateLimiter()
+budget = SessionBudget()
+
+metrics.REGISTRY.gauge(
+    "fusion_ssh_sessions", "Sesi SSH budget (in_use / capacity / waiting)", ("state",),
+    fn=lambda: {("in_use",): budget.in_use, ("capacity",): budget.capacity,
+                ("waiting",): budget.waiting}
+)
+
+
+# ============================================================
+# ADMISSION (dipakai handlers sebelum dispatch)
+# ============================================================
+async def _reply(update, text: str):
+    message = update.effective_message
+    if not message:
+        return
+    try:
+        await message.reply_text(text)
+    except Exception as e:
+        logger.debug(f"Throttle reply gagal: {e}")
+
+
+@asynccontextmanager
+async def admit(update, cost: int = 1, ssh_sessions: int = 0):
+    """
+    Gate tunggal sebelum dispatch.
+
+    Usage:
+        async with admit(update, cost, ssh_sessions) as allowed:
+            if not allowed:
+                return
+            ...
+
+    Args:
+        cost: token yang dipakai dari bucket user (≥1)
+        ssh_sessions: jumlah sesi SSH yang akan dibuka (0 = tanpa SSH)
+    """
+    user = update.effective_user
+    user_id = user.id if user else 0
+
+    with span("throttle.admit", cost=cost, sessions=ssh_sessions) as s:
+        allowed = await _acquire(update, user_id, cost, ssh_sessions)
+        if s is not None:
+            s.attrs["allowed"] = allowed is not None
+
+    if allowed is None:
+        yield False
+        return
+
+    try:
+        yield True
+    finally:
+        await budget.release(allowed)
+
+
+async def _acquire(update, user_id: int, cost: int, ssh_sessions: int):
+    """Rate limit + slot SSH. Return jumlah sesi yang dipegang, atau None kalau ditolak."""
+    wait = limiter.check(user_id, max(1, cost))
+    if wait > 0:
+        logger.info(f"Rate limit user={user_id} cost={cost} retry_in={wait:.1f}s")
+        metrics.THROTTLE_REJECTS.inc("rate_limit")
+        await _reply(
+            update,
+            f"⛔ Terlalu banyak request. Coba lagi dalam {int(wait) + 1} detik."
+        )
+        return None
+
+    sessions = budget.clamp(ssh_sessions)
+    if sessions and not budget.available(sessions):
+        await _reply(
+            update,
+            f"⏳ Server sedang sibuk ({budget.in_use}/{budget.capacity} sesi SSH). "
+            "Request Anda masuk antrian…"
+        )
+
+    if not await budget.acquire(sessions, timeout=SSH_QUEUE_TIMEOUT):
+        logger.warning(f"SSH budget timeout user={user_id} sessions={sessions}")
+        metrics.THROTTLE_REJECTS.inc("ssh_queue")
+        await _reply(update, "❌ Antrian penuh, request dibatalkan. Coba lagi nanti.")
+        return None
+
+    return sessions
+
+
+async def charge(update, cost: int) -> bool:
+    """
+    Biaya tambahan setelah admit(), untuk request yang ukurannya baru
+    diketahui setelah dispatch (mis. jumlah host di file import).
+
+    Returns:
+        True kalau token cukup; False → user sudah diberi tahu, batalkan
+    """
+    if cost <= 0:
+        return True
+    user = update.effective_user
+    user_id = user.id if user else 0
+    wait = limiter.check(user_id, cost)
+    if wait > 0:
+        logger.info(f"Rate limit user={user_id} cost={cost} retry_in={wait:.1f}s (charge)")
+        metrics.THROTTLE_REJECTS.inc("rate_limit")
+        await _reply(
+            update,
+            f"⛔ Terlalu banyak request ({cost} host). Coba lagi dalam {int(wait) + 1} detik."
+        )
+        return False
+    return True
+
+
+def usage() -> Tuple[int, int, int]:
+    """(sesi dipakai, kapasitas, jumlah request yang menunggu)."""
+    return budget.in_use, budget.capacity, budget.waiting
@@ -0,0 +1,330 @@
+"""
+Tracing per request: update Telegram → DB / SSH / Bot API.
+
+    with tracing.trace("message 📈 Check Reward", user=123):   # handlers
+        with tracing.span("ssh.execute", host=ip):             # SSHClient
+            ...
+
+- Trace aktif disimpan di contextvar, jadi ikut ke task asyncio tanpa
+  dioper manual. Di luar trace (monitor, thread pool) `span()` no-op.
+- Sampling TRACE_SAMPLE_RATE per trace; trace yang tidak di-sample
+  tidak mencatat apa pun.
+- Trace selesai masuk ring buffer (TRACE_KEEP terakhir) untuk
+  `/trace last`, dan opsional diekspor ke LOG_DIR:
+      jsonl  → traces.jsonl (satu trace per baris)
+      chrome → traces.chrome.json (buka di chrome://tracing / Perfetto)
+"""
+import os
+import json
+import time
+import random
+import logging
+import threading
+import itertools
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from bot.config import (
+    LOG_DIR, TRACE_SAMPLE_RATE, TRACE_EXPORT, TRACE_KEEP,
+    TRACE_MAX_SPANS, TRACE_MAX_BYTES
+)
+
+logger = logging.getLogger(__name__)
+
+JSONL_PATH = os.path.join(LOG_DIR, "traces.jsonl")
+CHROME_PATH = os.path.join(LOG_DIR, "traces.chrome.json")
+
+_ids = itertools.count(1)
+
+
+class Span:
+    __slots__ = ("id", "parent", "name", "start", "end", "attrs")
+
+    def __init__(self, name: str, parent: Optional[int], attrs: dict):
+        self.id = next(_ids)
+        self.parent = parent
+        self.name = name
+        self.start = time.perf_counter()
+        self.end = None
+        self.attrs = attrs
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.perf_counter()) - self.start
+
+    @property
+    def category(self) -> str:
+        return self.name.split(".", 1)[0]
+
+
+class Trace:
+    __slots__ = ("id", "name", "started", "root", "spans", "dropped")
+
+    def __init__(self, name: str, attrs: dict):
+        self.id = f"{os.getpid():x}-{next(_ids):x}"
+        self.name = name
+        self.started = time.time()
+        self.root = Span(name, None, attrs)
+        self.spans: List[Span] = []
+        self.dropped = 0
+
+    @property
+    def duration(self) -> float:
+        return self.root.duration
+
+    def to_dict(self) -> dict:
+        base = self.root.start
+        return {
+            "trace_id": self.id,
+            "name": self.name,
+            "start": self.started,
+            "duration": round(self.duration, 6),
+            "attrs": self.root.attrs,
+            "dropped": self.dropped,
+            "spans": [
+                {
+                    "id": s.id, "parent": s.parent, "name": s.name,
+                    "start": round(s.start - base, 6), "duration": round(s.duration, 6),
+                    "attrs": s.attrs,
+                }
+                for s in self.spans
+            ],
+        }
+
+
+# (trace, span aktif) untuk context ini; None = tidak ada trace / tidak di-sample
+_current: ContextVar[Optional[tuple]] = ContextVar("fusion_trace", default=None)
+
+RECENT: deque = deque(maxlen=max(1, TRACE_KEEP))
+
+_export_lock = threading.Lock()
+
+
+# ============================================================
+# API
+# ============================================================
+@contextmanager
+def trace(name: str, **attrs):
+    """Buka trace baru (root span). Nested trace diperlakukan sebagai span."""
+    if _current.get() is not None:
+        with span(name, **attrs) as s:
+            yield s
+        return
+
+    if TRACE_SAMPLE_RATE <= 0 or random.random() >= TRACE_SAMPLE_RATE:
+        yield None
+        return
+
+    t = Trace(name, attrs)
+    token = _current.set((t, t.root))
+    try:
+        yield t.root
+    except BaseException as e:
+        t.root.attrs["error"] = type(e).__name__
+        raise
+    finally:
+        t.root.end = time.perf_counter()
+        _current.reset(token)
+        _finish(t)
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Span anak dari span aktif. No-op kalau tidak ada trace."""
+    current = _current.get()
+    if current is None:
+        yield None
+        return
+
+    t, parent = current
+    if len(t.spans) >= TRACE_MAX_SPANS:
+        t.dropped += 1
+        yield None
+        return
+
+    s = Span(name, parent.id, attrs)
+    t.spans.append(s)
+    token = _current.set((t, s))
+    try:
+        yield s
+    except BaseException as e:
+        s.attrs["error"] = type(e).__name__
+        raise
+    finally:
+        s.end = time.perf_counter()
+        _current.reset(token)
+
+
+def annotate(**attrs):
+    """Tambah atribut ke span aktif (kalau ada)."""
+    current = _current.get()
+    if current is not None:
+        current[1].attrs.update(attrs)
+
+
+# ============================================================
+# EXPORT
+# ============================================================
+def _rotate(path: str):
+    try:
+        if os.path.getsize(path) > TRACE_MAX_BYTES:
+            os.replace(path, f"{path}.1")
+    except OSError:
+        pass
+
+
+def _chrome_events(t: Trace) -> List[dict]:
+    pid = os.getpid()
+    tid = t.root.id
+    base_us = t.started * 1e6
+    events = []
+    for s in [t.root] + t.spans:
+        events.append({
+            "name": s.name, "cat": s.category, "ph": "X", "pid": pid, "tid": tid,
+            "ts": round(base_us + (s.start - t.root.start) * 1e6),
+            "dur": round(s.duration * 1e6),
+            "args": dict(s.attrs, trace_id=t.id),
+        })
+    return events
+
+
+def _export(t: Trace):
+    if TRACE_EXPORT not in ("jsonl", "chrome"):
+        return
+    os.makedirs(LOG_DIR, exist_ok=True)
+    with _export_lock:
+        if TRACE_EXPORT == "jsonl":
+            _rotate(JSONL_PATH)
+            with open(JSONL_PATH, "a") as f:
+                f.write(json.dumps(t.to_dict(), default=str) + "\n")
+            return
+
+        # Format JSON array Chrome: "]" penutup boleh tidak ada,
+        # jadi file cukup di-append per event
+        _rotate(CHROME_PATH)
+        fresh = not os.path.exists(CHROME_PATH)
+        with open(CHROME_PATH, "a") as f:
+            if fresh:
+                f.write("[\n")
+            for event in _chrome_events(t):
+                f.write(json.dumps(event, default=str) + ",\n")
+
+
+def _finish(t: Trace):
+    RECENT.append(t.to_dict())
+    try:
+        _export(t)
+    except Exception as e:
+        logger.error(f"Gagal export trace: {e}")
+
+
+# ============================================================
+# /trace last
+# ============================================================
+def recent(limit_bytes: int = 2 * 1024 * 1024) -> List[dict]:
+    """
+    Trace terbaru. Kalau export jsonl aktif, dibaca dari file (mencakup
+    semua worker); selain itu ring buffer proses ini.
+    """
+    if TRACE_EXPORT != "jsonl" or not os.path.exists(JSONL_PATH):
+        return list(RECENT)
+
+    traces = []
+    with open(JSONL_PATH, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - limit_bytes))
+        data = f.read().decode("utf-8", errors="ignore")
+    for line in data.splitlines()[-TRACE_KEEP:]:
+        try:
+            traces.append(json.loads(line))
+        except ValueError:
+            continue
+    return traces
+
+
+def breakdown(t: dict) -> Dict[str, list]:
+    """
+    Waktu per kategori (ssh / db / telegram / …) → [detik, jumlah span].
+
+    Span yang parent-nya kategori sama tidak dihitung dua kali
+    (ssh.connect di dalam ssh.execute).
+    """
+    by_id = {s["id"]: s for s in t["spans"]}
+    totals: Dict[str, list] = {}
+    for s in t["spans"]:
+        cat = s["name"].split(".", 1)[0]
+        parent = by_id.get(s["parent"])
+        if parent is not None and parent["name"].split(".", 1)[0] == cat:
+            continue
+        acc = totals.setdefault(cat, [0.0, 0])
+        acc[0] += s["duration"]
+        acc[1] += 1
+    return totals
+
+
+def _fmt(seconds: float) -> str:
+    return f"{seconds * 1000:.0f}ms" if seconds < 1 else f"{seconds:.2f}s"
+
+
+def summary(traces: List[dict], top: int = 5) -> str:
+    """Trace paling lambat + breakdown per tahap (untuk Telegram)."""
+    if not traces:
+        return "ℹ️ Belum ada trace tercatat."
+
+    slowest = sorted(traces, key=lambda t: -t["duration"])[:top]
+    lines = [f"🧭 *Trace paling lambat* ({len(traces)} terakhir)", ""]
+    for t in slowest:
+        name = t["name"].replace("`", "'")
+        lines.append(f"⏱ *{_fmt(t['duration'])}* `{name}`")
+        lines.append(f"`{t['trace_id']}` · {time.strftime('%H:%M:%S', time.localtime(t['start']))}")
+
+        parts = breakdown(t)
+        covered = sum(v[0] for v in parts.values())
+        stages = [
+            f"{cat} {_fmt(sec)} ({n}×)"
+            for cat, (sec, n) in sorted(parts.items(), key=lambda kv: -kv[1][0])
+        ]
+        other = t["duration"] - covered
+        if other > 0.001:
+            stages.append(f"lainnya {_fmt(other)}")
+        if stages:
+            lines.append(" · ".join(stages))
+
+        heavy = sorted(t["spans"], key=lambda s: -s["duration"])[:3]
+        for s in heavy:
+            host = s["attrs"].get("host")
+            suffix = f" `{host}`" if host else ""
+            lines.append(f"  └ `{s['name']}`{suffix} {_fmt(s['duration'])}")
+        if t.get("dropped"):
+            lines.append(f"  (+{t['dropped']} span tidak dicatat)")
+        lines.append("")
+    return "\n".join(lines).strip()
+
+
+# ============================================================
+# BOT API REQUEST (span per panggilan Telegram)
+# ============================================================
+def traced_request(**kwargs):
+    """
+    HTTPXRequest yang membungkus setiap panggilan Bot API dengan span
+    `telegram.<method>` + metrics latency. Token bot tidak pernah ikut
+    dicatat (hanya nama method dari URL).
+    """
+    from telegram.request import HTTPXRequest
+    from bot.metrics import TELEGRAM_SEND_SECONDS
+
+    class TracedRequest(HTTPXRequest):
+        async def do_request(self, url, method, *args, **kw):
+            endpoint = url.rsplit("/", 1)[-1]
+            started = time.perf_counter()
+            try:
+                with span(f"telegram.{endpoint}"):
+                    return await super().do_request(url, method, *args, **kw)
+            finally:
+                if endpoint != "getUpdates":
+                    TELEGRAM_SEND_SECONDS.observe(time.perf_counter() - started, "bot")
+
+    kwargs.setdefault("connection_pool_size", 256)
+    return TracedRequest(**kwargs)
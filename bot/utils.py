@@ -1,6 +1,9 @@
 import os
 import json
+import fcntl
 import shutil
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 
 # =========================================================
@@ -37,6 +40,52 @@ def read_file(path: str):
         return None
 
 
+# =========================================================
+#  Cross-process Lock
+# =========================================================
+
+_lock_state = threading.local()
+
+
+@contextmanager
+def file_lock(path: str, exclusive: bool = True, blocking: bool = True):
+    """
+    flock() pada `path + ".lock"` supaya beberapa proses (bot workers,
+    monitor) tidak saling timpa file yang sama.
+
+    Re-entrant per thread: kalau lock untuk path ini sudah dipegang,
+    blok dalam langsung jalan (tidak deadlock flush di dalam transaction).
+
+    blocking=False → raise BlockingIOError kalau lock dipegang proses lain.
+    """
+    held = getattr(_lock_state, "held", None)
+    if held is None:
+        held = _lock_state.held = {}
+
+    lock_path = path + ".lock"
+    if held.get(lock_path):
+        held[lock_path] += 1
+        try:
+            yield
+        finally:
+            held[lock_path] -= 1
+        return
+
+    ensure_dir(os.path.dirname(lock_path) or ".")
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        flags = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+        fcntl.flock(fd, flags if blocking else flags | fcntl.LOCK_NB)
+        held[lock_path] = 1
+        try:
+            yield
+        finally:
+            held.pop(lock_path, None)
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
 # =========================================================
 #  JSON Helpers
 # =========================================================
@@ -118,3 +167,24 @@ def log(text, logfile):
 def pretty_json(data):
     """Format JSON jadi teks rapi."""
     return json.dumps(data, indent=2, ensure_ascii=False)
+
+
+def plain(text: str) -> str:
+    """Buang karakter Markdown dari teks bebas (pesan error SSH)."""
+    for ch in "`*_":
+        text = text.replace(ch, "")
+    return text.replace("[", "(").replace("]", ")")
+
+
+async def reply_lines(message, header: str, lines, reply_markup=None):
+    """
+    Kirim header + daftar baris, dipecah supaya muat pesan Telegram.
+    `reply_markup` (tombol) ikut di pesan terakhir.
+    """
+    from monitor.report import chunk
+    parts = chunk([header] + list(lines), sep="\n")
+    for i, part in enumerate(parts):
+        await message.reply_text(
+            part, parse_mode="Markdown",
+            reply_markup=reply_markup if i == len(parts) - 1 else None
+        )
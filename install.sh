@@ -20,6 +20,9 @@ error() { echo -e "${RED}[ERR]${NC} $*" >&2; exit 1; }
 BOT_TOKEN=""
 ADMIN_CHAT_ID=""
 ADMIN_ID=""
+WEBHOOK_URL=""
+WEBHOOK_SECRET=""
+WEBHOOK_PORT="8443"
 
 while [[ $# -gt 0 ]]; do
     case $1 in
@@ -35,6 +38,18 @@ while [[ $# -gt 0 ]]; do
             ADMIN_ID="$2"
             shift 2
             ;;
+        --webhook-url)
+            WEBHOOK_URL="$2"
+            shift 2
+            ;;
+        --webhook-secret)
+            WEBHOOK_SECRET="$2"
+            shift 2
+            ;;
+        --webhook-port)
+            WEBHOOK_PORT="$2"
+            shift 2
+            ;;
         -h|--help)
             echo "Usage: $0 [OPTIONS]"
             echo ""
@@ -42,6 +57,9 @@ while [[ $# -gt 0 ]]; do
             echo "  --token TOKEN           Telegram Bot Token (required)"
             echo "  --admin-chat-id ID     Admin Chat ID (required)"
             echo "  --admin-id ID          Admin ID (optional)"
+            echo "  --webhook-url URL      Public HTTPS URL → run bot in webhook mode (optional)"
+            echo "  --webhook-secret STR   Webhook secret token (optional, random if empty)"
+            echo "  --webhook-port PORT    Local webhook port (default: 8443)"
             echo ""
             echo "Example:"
             echo "  sudo $0 --token 123456:ABC-DEF --admin-chat-id 123456789"
@@ -91,7 +109,7 @@ if [ -f "$INSTALL_DIR/bot/requirements.txt" ]; then
     pip install -r "$INSTALL_DIR/bot/requirements.txt"
 else
     # Install default requirements
-    pip install python-telegram-bot==20.7 paramiko python-dotenv
+    pip install "python-telegram-bot[webhooks]==20.7" paramiko python-dotenv
 fi
 
 success "Python dependencies installed"
@@ -110,6 +128,19 @@ BOT_TOKEN=$BOT_TOKEN
 ADMIN_CHAT_ID=$ADMIN_CHAT_ID
 ADMIN_ID=$ADMIN_ID
 EOF
+
+if [ -n "$WEBHOOK_URL" ]; then
+    if [ -z "$WEBHOOK_SECRET" ]; then
+        WEBHOOK_SECRET=$(head -c 32 /dev/urandom | base64 | tr -dc 'A-Za-z0-9' | head -c 40)
+    fi
+    cat >> "$ENV_FILE" <<EOF
+BOT_MODE=webhook
+WEBHOOK_URL=$WEBHOOK_URL
+WEBHOOK_SECRET=$WEBHOOK_SECRET
+WEBHOOK_LISTEN=127.0.0.1
+WEBHOOK_PORT=$WEBHOOK_PORT
+EOF
+fi
 success ".env file created (optional, for backward compatibility)"
 
 # =========================================================
@@ -132,7 +163,9 @@ Environment="PATH=$INSTALL_DIR/venv/bin:/usr/local/sbin:/usr/local/bin:/usr/sbin
 Environment="BOT_TOKEN=$BOT_TOKEN"
 Environment="ADMIN_CHAT_ID=$ADMIN_CHAT_ID"
 Environment="ADMIN_ID=$ADMIN_ID"
-ExecStart=$INSTALL_DIR/venv/bin/python3 -m bot.bot --token "$BOT_TOKEN" --admin-chat-id "$ADMIN_CHAT_ID" --admin-id "$ADMIN_ID"
+Environment="BOT_MODE=polling"
+EnvironmentFile=-$INSTALL_DIR/.env
+ExecStart=$INSTALL_DIR/venv/bin/python3 -m bot.bot --token "$BOT_TOKEN" --admin-chat-id "$ADMIN_CHAT_ID" --admin-id "$ADMIN_ID" --mode \${BOT_MODE}
 Restart=always
 RestartSec=10
 StandardOutput=journal
@@ -145,32 +178,27 @@ EOF
 # Monitor service
 cat > /etc/systemd/system/fusion-monitor.service <<EOF
 [Unit]
-Description=Deklan Fusion Monitor Daemon
+Description=Deklan Fusion Monitor (one cycle, triggered by fusion-monitor.timer)
 After=network-online.target
 Wants=network-online.target
 
 [Service]
-Type=simple
+Type=oneshot
 User=root
 WorkingDirectory=$INSTALL_DIR
 Environment="PATH=$INSTALL_DIR/venv/bin:/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin"
 Environment="BOT_TOKEN=$BOT_TOKEN"
 Environment="ADMIN_CHAT_ID=$ADMIN_CHAT_ID"
-ExecStart=$INSTALL_DIR/venv/bin/python3 -m monitor.monitor --token "$BOT_TOKEN" --admin-chat-id "$ADMIN_CHAT_ID"
-Restart=always
-RestartSec=10
+ExecStart=$INSTALL_DIR/venv/bin/python3 -m monitor.monitor --once --token "$BOT_TOKEN" --admin-chat-id "$ADMIN_CHAT_ID"
+TimeoutStartSec=2h
 StandardOutput=journal
 StandardError=journal
-
-[Install]
-WantedBy=multi-user.target
 EOF
 
 # Monitor timer (every 3 hours)
 cat > /etc/systemd/system/fusion-monitor.timer <<EOF
 [Unit]
 Description=Run Deklan Fusion Monitor every 3 hours
-Requires=fusion-monitor.service
 
 [Timer]
 OnBootSec=5min
@@ -181,6 +209,38 @@ AccuracySec=1min
 WantedBy=timers.target
 EOF
 
+# Log archiver service + timer (every 15 minutes)
+cat > /etc/systemd/system/fusion-archiver.service <<EOF
+[Unit]
+Description=Deklan Fusion log archiver (one pass, triggered by fusion-archiver.timer)
+After=network-online.target
+Wants=network-online.target
+
+[Service]
+Type=oneshot
+User=root
+WorkingDirectory=$INSTALL_DIR
+Environment="PATH=$INSTALL_DIR/venv/bin:/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin"
+EnvironmentFile=-$INSTALL_DIR/.env
+ExecStart=$INSTALL_DIR/venv/bin/python3 -m monitor.archiver --once
+TimeoutStartSec=1h
+StandardOutput=journal
+StandardError=journal
+EOF
+
+cat > /etc/systemd/system/fusion-archiver.timer <<EOF
+[Unit]
+Description=Pull new node logs into the Deklan Fusion archive every 15 minutes
+
+[Timer]
+OnBootSec=10min
+OnUnitActiveSec=15min
+AccuracySec=1min
+
+[Install]
+WantedBy=timers.target
+EOF
+
 # Reload systemd
 systemctl daemon-reload
 
@@ -202,6 +262,7 @@ success "Permissions set"
 info "Enabling services..."
 systemctl enable fusion-bot.service
 systemctl enable fusion-monitor.timer
+systemctl enable fusion-archiver.timer
 
 success "Services enabled"
 
@@ -221,6 +282,7 @@ echo ""
 info "Next steps:"
 echo "  1. Start the bot: systemctl start fusion-bot"
 echo "  2. Start the monitor timer: systemctl start fusion-monitor.timer"
+echo "  3. Start the log archiver timer: systemctl start fusion-archiver.timer"
 echo ""
 info "Useful commands:"
 echo "  - Check bot status: systemctl status fusion-bot"
@@ -0,0 +1,213 @@
+"""
+Alert pipeline monitor: dedup, suppress, group, resolve.
+
+    kondisi per siklus ──▶ AlertEngine.evaluate() ──▶ pesan Telegram
+    (offline, kelas error,        │
+     overload resource)           │
+                                  └── state di db["alerts"] (survive restart)
+
+- Fingerprint = "<ip>|<kelas>", satu alert aktif per fingerprint.
+- Alert aktif yang masih terjadi tidak dikirim ulang sebelum
+  ALERT_REPEAT_INTERVAL lewat.
+- Alert dianggap pulih setelah ALERT_RESOLVE_CYCLES siklus tanpa
+  kondisi tsb → kirim notifikasi ✅ (hanya kalau firing-nya terkirim).
+  Node yang tidak ter-probe (worker shard gagal) tidak dihitung: alert-nya
+  tetap seperti siklus sebelumnya.
+- Muncul lagi < ALERT_FLAP_WINDOW setelah pulih = flapping → diaktifkan
+  lagi tanpa notifikasi baru (sampai repeat interval).
+- Semua host dengan kelas sama digabung jadi satu blok pesan.
+
+State baru baru di-commit setelah pesan terkirim, jadi kalau Telegram
+gagal, alert yang sama dicoba lagi di siklus berikutnya.
+"""
+import time
+import logging
+from typing import Dict, List, Tuple
+
+from bot.config import (
+    ALERT_REPEAT_INTERVAL, ALERT_RESOLVE_CYCLES,
+    ALERT_FLAP_WINDOW, ALERT_GROUP_MAX_HOSTS
+)
+from bot.db import load_db, transaction
+from bot.resources import overloaded, describe_flags
+from monitor.classifier import CLASS_LABEL
+
+logger = logging.getLogger(__name__)
+
+OFFLINE = "offline"
+OVERLOAD = "overload"
+
+ALERT_LABEL = dict(CLASS_LABEL, **{OFFLINE: "Node offline", OVERLOAD: "Resource VPS overload"})
+
+
+def fingerprint(ip: str, cls: str) -> str:
+    return f"{ip}|{cls}"
+
+
+def collect_conditions(results, errors, overload=None) -> Dict[str, dict]:
+    """
+    Kondisi aktif siklus ini.
+
+    Args:
+        results: list ProbeResult (monitor.poll_fleet → probe_host)
+        errors: error baru per node dari poll_fleet: record_node_errors
+                → {"ip", "label", "classes"} hasil classifier.classify
+        overload: ip → flag resource (bot.resources.overloaded)
+    """
+    conditions = {}
+    for r in results or []:
+        if r is not None and r.ip and not r.online:
+            conditions[fingerprint(r.ip, OFFLINE)] = {
+                "ip": r.ip, "label": r.label, "class": OFFLINE, "count": 1, "sample": None
+            }
+        elif r is not None and r.ip and (overload or {}).get(r.ip):
+            conditions[fingerprint(r.ip, OVERLOAD)] = {
+                "ip": r.ip, "label": r.label, "class": OVERLOAD, "count": 1,
+                "sample": describe_flags(overload[r.ip])
+            }
+    for e in errors or []:
+        for cls, entry in e["classes"].items():
+            conditions[fingerprint(e["ip"], cls)] = {
+                "ip": e["ip"], "label": e.get("label"), "class": cls,
+                "count": entry["count"], "sample": entry.get("sample")
+            }
+    return conditions
+
+
+class AlertEngine:
+    def __init__(self, now: float = None):
+        self.now = now if now is not None else time.time()
+        db = load_db()
+        # Copy supaya evaluate() tidak mengubah DB sebelum commit()
+        self.state: Dict[str, dict] = {
+            fp: dict(a) for fp, a in (db.get("alerts") or {}).items()
+        }
+
+    # --------------------------------------------------------
+    # Evaluate
+    # --------------------------------------------------------
+    def evaluate(self, conditions: Dict[str, dict],
+                 skipped=()) -> Tuple[Dict[str, list], Dict[str, list]]:
+        """
+        Update state dengan kondisi siklus ini.
+
+        `skipped` = node_id yang tidak ter-probe: alert-nya tidak disentuh
+        (tidak dihitung miss → tidak pernah "pulih" palsu).
+
+        Returns:
+            (firing, resolved): kelas → list alert yang perlu dikirim
+        """
+        now = self.now
+        firing: Dict[str, list] = {}
+        resolved: Dict[str, list] = {}
+
+        for fp, cond in conditions.items():
+            alert = self.state.get(fp)
+
+            if alert is None or not alert["active"]:
+                flapping = (
+                    alert is not None and alert.get("resolved_at")
+                    and now - alert["resolved_at"] < ALERT_FLAP_WINDOW
+                )
+                alert = {
+                    "ip": cond["ip"],
+                    "label": cond["label"],
+                    "class": cond["class"],
+                    "active": True,
+                    "first_seen": now if not flapping else alert["first_seen"],
+                    "last_sent": alert.get("last_sent") if flapping else None,
+                    "flaps": alert.get("flaps", 0) + 1 if flapping else 0,
+                    "notified": False,
+                    "count": 0,
+                    "resolved_at": None,
+                }
+                self.state[fp] = alert
+
+            alert["last_seen"] = now
+            alert["misses"] = 0
+            alert["count"] += cond["count"]
+            alert["sample"] = cond["sample"]
+
+            if alert["last_sent"] is None or now - alert["last_sent"] >= ALERT_REPEAT_INTERVAL:
+                alert["last_sent"] = now
+                alert["notified"] = True
+                firing.setdefault(alert["class"], []).append(alert)
+
+        for fp, alert in self.state.items():
+            if fp in conditions or not alert["active"] or alert["ip"] in skipped:
+                continue
+            alert["misses"] = alert.get("misses", 0) + 1
+            if alert["misses"] >= ALERT_RESOLVE_CYCLES:
+                alert["active"] = False
+                alert["resolved_at"] = now
+                # Resolve hanya dikirim kalau firing-nya terkirim sejak
+                # resolve terakhir → flapping tidak spam ✅ tiap siklus
+                if alert.get("notified"):
+                    alert["notified"] = False
+                    resolved.setdefault(alert["class"], []).append(alert)
+
+        # Alert pulih yang sudah lewat flap window tidak perlu disimpan lagi
+        self.state = {
+            fp: a for fp, a in self.state.items()
+            if a["active"] or now - (a.get("resolved_at") or 0) < ALERT_FLAP_WINDOW
+        }
+        return firing, resolved
+
+    def commit(self):
+        with transaction(("alerts",)) as db:
+            db["alerts"] = self.state
+
+
+# ============================================================
+# RENDER
+# ============================================================
+def _hosts(alerts: List[dict]) -> str:
+    alerts = sorted(alerts, key=lambda a: (a.get("label") or 0, a["ip"]))
+    shown = [f"#{a.get('label') or '?'} `{a['ip']}`" for a in alerts[:ALERT_GROUP_MAX_HOSTS]]
+    more = len(alerts) - len(shown)
+    if more > 0:
+        shown.append(f"+{more} lainnya")
+    return ", ".join(shown)
+
+
+def render(firing: Dict[str, list], resolved: Dict[str, list]) -> List[str]:
+    """Satu blok per kelas (bukan per host)."""
+    blocks = []
+
+    for cls, alerts in sorted(firing.items(), key=lambda kv: -len(kv[1])):
+        lines = [f"🚨 *{ALERT_LABEL.get(cls, cls)}* — {len(alerts)} host", _hosts(alerts)]
+        sample = next((a["sample"] for a in alerts if a.get("sample")), None)
+        if sample:
+            sample = sample.replace("`", "'")[:200]
+            lines.append(f"`{sample}`")
+        flapping = sum(1 for a in alerts if a.get("flaps"))
+        if flapping:
+            lines.append(f"↕️ {flapping} host flapping")
+        blocks.append("\n".join(lines))
+
+    for cls, alerts in sorted(resolved.items(), key=lambda kv: -len(kv[1])):
+        blocks.append(
+            f"✅ *{ALERT_LABEL.get(cls, cls)}* pulih — {len(alerts)} host\n{_hosts(alerts)}"
+        )
+
+    return blocks
+
+
+def process(results, errors, now: float = None, skipped=()):
+    """
+    Evaluate kondisi siklus ini.
+
+    `skipped` = node_id yang tidak ter-probe siklus ini (lihat evaluate).
+
+    Returns:
+        (engine, blocks) — kirim `blocks`, lalu `engine.commit()`
+    """
+    engine = AlertEngine(now)
+    firing, resolved = engine.evaluate(collect_conditions(results, errors, overloaded()), skipped)
+    blocks = render(firing, resolved)
+    if blocks:
+        logger.info(
+            f"Alerts: {sum(map(len, firing.values()))} firing, "
+            f"{sum(map(len, resolved.values()))} resolved"
+        )
+    return engine, blocks
@@ -0,0 +1,469 @@
+"""
+Arsip log node (swarm_launcher.log) di host bot.
+
+Log di VPS hilang saat VPS mati / di-reinstall lewat update_node.sh,
+jadi archiver menarik bagian log yang baru secara incremental dan
+menyimpannya lokal:
+
+    ARCHIVE_DIR/<node>/index.json        cursor SSH + daftar segment (rentang waktu)
+    ARCHIVE_DIR/<node>/000001.log.gz     segment gzip (multi-member, di-append)
+
+  <node> = models.node_id: `<ip>` untuk instance bawaan, `<ip>_<nama>`
+  untuk instance lain (arsip lama tetap terbaca).
+
+- Semua instance satu host ditarik dengan 1 SSH (section per instance,
+  pemisah ber-nonce seperti bot.nodes).
+- Cursor per instance (inode + offset byte): tiap putaran hanya byte baru
+  yang ditarik (maks ARCHIVE_PULL_BYTES per instance, sisanya putaran
+  berikutnya), lewat SSH dengan kompresi transport. Inode berubah / file
+  mengecil (reinstall, truncate) → mulai segment baru dari offset 0.
+- Segment di-rotate setelah ARCHIVE_SEGMENT_BYTES terkompresi; total per
+  host dibatasi ARCHIVE_MAX_BYTES (segment tertua dihapus) dan opsional
+  ARCHIVE_RETENTION_DAYS.
+- Query offline tidak menyentuh fleet sama sekali: segment dipilih dari
+  index (first/last timestamp) lalu di-decompress secara streaming.
+
+    python3 -m monitor.archiver              loop tiap ARCHIVE_INTERVAL
+    python3 -m monitor.archiver --once       satu putaran (fusion-archiver.timer)
+    python3 -m monitor.archiver query --ip 1.2.3.4 --since 2h --grep "OOM|Traceback"
+    python3 -m monitor.archiver query --ip 1.2.3.4/n2      (satu instance saja)
+    python3 -m monitor.archiver stats
+"""
+import os
+import re
+import sys
+import gzip
+import json
+import time
+import shlex
+import logging
+import secrets
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional, Tuple
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bot.config import (
+    TMP_DIR, ARCHIVE_DIR, ARCHIVE_INTERVAL, ARCHIVE_PULL_BYTES, ARCHIVE_SEGMENT_BYTES,
+    ARCHIVE_MAX_BYTES, ARCHIVE_RETENTION_DAYS, ARCHIVE_CONCURRENCY
+)
+from bot.db import load_db, fleet
+from bot.models import node_id, split_node
+from bot.utils import file_lock, ensure_dir, load_json
+
+logger = logging.getLogger(__name__)
+
+ARCHIVER_LOCK = os.path.join(TMP_DIR, "archiver")
+
+INDEX_FILE = "index.json"
+
+# Timestamp di awal baris log, boleh diawali "[" (waktu lokal)
+_TS = re.compile(r"^\W{0,2}(\d{4})-(\d{2})-(\d{2})[ T](\d{2}):(\d{2}):(\d{2})")
+
+
+def line_time(line: str, default: float) -> float:
+    """Epoch dari timestamp baris; baris tanpa timestamp ikut baris sebelumnya."""
+    m = _TS.match(line)
+    if not m:
+        return default
+    try:
+        return time.mktime(tuple(int(x) for x in m.groups()) + (0, 0, -1))
+    except (OverflowError, ValueError):
+        return default
+
+
+# ============================================================
+# INDEX PER NODE (ip / ip/instance)
+# ============================================================
+def host_dir(ip: str) -> str:
+    """Direktori arsip satu node (`ip` atau node_id `ip/nama`)."""
+    return os.path.join(ARCHIVE_DIR, re.sub(r"[^0-9A-Za-z.:_-]", "_", ip))
+
+
+def load_index(ip: str) -> dict:
+    index = load_json(os.path.join(host_dir(ip), INDEX_FILE), None)
+    if not isinstance(index, dict):
+        index = {"host": ip, "cursor": {}, "seq": 0, "segments": []}
+    return index
+
+
+def _save_index(ip: str, index: dict):
+    path = os.path.join(host_dir(ip), INDEX_FILE)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp, path)
+
+
+def archived_hosts() -> list:
+    if not os.path.isdir(ARCHIVE_DIR):
+        return []
+    hosts = []
+    for name in sorted(os.listdir(ARCHIVE_DIR)):
+        index = load_json(os.path.join(ARCHIVE_DIR, name, INDEX_FILE), None)
+        if isinstance(index, dict) and index.get("host"):
+            hosts.append(index["host"])
+    return hosts
+
+
+# ============================================================
+# PULL (1 SSH PER HOST, SEMUA INSTANCE)
+# ============================================================
+def pull_command(instances, nonce: str, cursors: dict) -> str:
+    """Satu section `@@<nonce> <nama>` per instance: header cursor + byte log baru."""
+    parts = []
+    for inst in instances:
+        cursor = cursors.get(inst.name) or {}
+        inode = int(cursor.get("inode") or 0)
+        offset = int(cursor.get("offset") or 0)
+        parts.append(
+            # Newline di depan marker: log section sebelumnya tidak perlu diakhiri \n
+            f"printf '\\n@@{nonce} {inst.name}\\n'; "
+            f"f={shlex.quote(inst.log)}; o={offset}; "
+            "set -- $(stat -c '%i %s' \"$f\" 2>/dev/null || echo 0 0); "
+            f"if [ \"$1\" != \"{inode}\" ] || [ \"$2\" -lt \"$o\" ]; then o=0; fi; "
+            "echo \"$1 $2 $o\"; "
+            f"tail -c +$(( o + 1 )) \"$f\" 2>/dev/null | head -c {ARCHIVE_PULL_BYTES}; "
+        )
+    return "".join(parts)
+
+
+def _pull(ip, vps_data, cursors: dict) -> Optional[dict]:
+    """
+    Tarik byte log baru semua instance sejak cursor masing-masing.
+
+    Beda dengan scan error monitor (bot.nodes): tidak pernah loncat ke ekor log,
+    backlog ditarik bertahap di putaran berikutnya.
+
+    Returns:
+        nama instance → (cursor baru, teks baris lengkap, rotated), atau None
+        kalau SSH gagal. Instance dengan output rusak tidak ikut (cursor tetap).
+    """
+    from bot.ssh_client import SSHClient
+    nonce = secrets.token_hex(8)
+    success, output = SSHClient.execute(
+        ip, vps_data.user, vps_data.password,
+        pull_command(vps_data.nodes(), nonce, cursors), timeout=120, compress=True,
+        errors="surrogateescape"
+    )
+    if not success or f"@@{nonce} " not in output:
+        return None
+
+    pulled = {}
+    for chunk in ("\n" + output).split(f"\n@@{nonce} ")[1:]:
+        name, _, text = chunk.partition("\n")
+        result = _parse_pull(text, cursors.get(name) or {})
+        if result is not None:
+            pulled[name] = result
+    return pulled
+
+
+def _parse_pull(output: str, cursor: dict):
+    inode = int(cursor.get("inode") or 0)
+    offset = int(cursor.get("offset") or 0)
+
+    header, _, body = output.partition("\n")
+    try:
+        new_inode, size, start = (int(x) for x in header.split())
+    except ValueError:
+        return None
+    if new_inode == 0:
+        # Log belum ada (node belum pernah jalan / baru di-reinstall)
+        return {"inode": inode, "offset": offset}, "", False
+
+    # Baris terakhir yang belum lengkap ditarik ulang di putaran berikutnya,
+    # kecuali satu baris lebih panjang dari batas tarik
+    if body and not body.endswith("\n"):
+        head, sep, partial = body.rpartition("\n")
+        if sep or _nbytes(body) < ARCHIVE_PULL_BYTES:
+            body = head + sep
+
+    rotated = new_inode != inode or start < offset
+    return {"inode": new_inode, "offset": start + _nbytes(body)}, body, rotated
+
+
+def _nbytes(text: str) -> int:
+    """Jumlah byte asli di VPS (output SSH di-decode surrogateescape)."""
+    return len(text.encode("utf-8", "surrogateescape"))
+
+
+# ============================================================
+# SEGMENT
+# ============================================================
+def _segment_path(ip: str, seg: dict) -> str:
+    return os.path.join(host_dir(ip), seg["file"])
+
+
+def _append(ip: str, index: dict, text: str, rotated: bool):
+    """Append teks ke segment aktif (gzip member baru), rotate kalau perlu."""
+    segments = index["segments"]
+    current = segments[-1] if segments else None
+    if (current is None or rotated
+            or current.get("bytes", 0) >= ARCHIVE_SEGMENT_BYTES):
+        index["seq"] = index.get("seq", 0) + 1
+        current = {"file": f"{index['seq']:06d}.log.gz", "first": None, "last": None,
+                   "lines": 0, "raw": 0, "bytes": 0}
+        segments.append(current)
+
+    now = time.time()
+    ts = current["last"] or now
+    first = last = None
+    lines = 0
+    for line in text.splitlines():
+        ts = line_time(line, ts)
+        first = ts if first is None else min(first, ts)
+        last = ts if last is None else max(last, ts)
+        lines += 1
+
+    # Byte asli (termasuk UTF-8 rusak) disimpan apa adanya
+    raw = text.encode("utf-8", "surrogateescape")
+    path = _segment_path(ip, current)
+    with gzip.open(path, "ab", compresslevel=6) as f:
+        f.write(raw)
+
+    current["first"] = first if current["first"] is None else min(current["first"], first)
+    current["last"] = last if current["last"] is None else max(current["last"], last)
+    current["lines"] += lines
+    current["raw"] += len(raw)
+    current["bytes"] = os.path.getsize(path)
+
+
+def _prune(ip: str, index: dict) -> int:
+    """Hapus segment lewat retention / di atas batas ukuran. Return jumlah dihapus."""
+    segments = index["segments"]
+    drop = []
+
+    if ARCHIVE_RETENTION_DAYS > 0:
+        cutoff = time.time() - ARCHIVE_RETENTION_DAYS * 86400
+        drop = [s for s in segments if (s.get("last") or 0) < cutoff]
+
+    if ARCHIVE_MAX_BYTES > 0:
+        kept = [s for s in segments if s not in drop]
+        total = sum(s.get("bytes", 0) for s in kept)
+        # Segment aktif (terakhir) tidak pernah dihapus karena ukuran
+        for seg in kept[:-1]:
+            if total <= ARCHIVE_MAX_BYTES:
+                break
+            drop.append(seg)
+            total -= seg.get("bytes", 0)
+
+    for seg in drop:
+        try:
+            os.remove(_segment_path(ip, seg))
+        except FileNotFoundError:
+            pass
+    index["segments"] = [s for s in segments if s not in drop]
+    return len(drop)
+
+
+# ============================================================
+# PUTARAN ARCHIVER
+# ============================================================
+def archive_host(ip, vps_data) -> Optional[Tuple[int, int]]:
+    """
+    Tarik + simpan log baru semua instance satu host.
+
+    Data ditulis ke segment dulu, baru index (cursor). Kalau proses mati
+    di antaranya, byte yang sama ditarik ulang (duplikat, bukan hilang).
+
+    Returns:
+        (byte, baris) yang diarsip, atau None kalau SSH gagal
+    """
+    indexes = {inst.name: load_index(node_id(ip, inst.name)) for inst in vps_data.nodes()}
+    pulled = _pull(ip, vps_data, {name: index.get("cursor") or {} for name, index in indexes.items()})
+    if pulled is None:
+        return None
+
+    nbytes = nlines = 0
+    for name, (cursor, text, rotated) in pulled.items():
+        if name not in indexes:
+            continue
+        nid, index = node_id(ip, name), indexes[name]
+        ensure_dir(host_dir(nid))
+        if text:
+            _append(nid, index, text, rotated)
+            nbytes += _nbytes(text)
+            nlines += text.count("\n")
+        index["cursor"] = cursor
+        index["pulled"] = time.time()
+        _prune(nid, index)
+        _save_index(nid, index)
+    return nbytes, nlines
+
+
+def run_archive(concurrency=ARCHIVE_CONCURRENCY) -> dict:
+    """Satu putaran: semua VPS di fleet + retention host yang sudah hilang."""
+    started = time.time()
+    hosts = fleet(load_db())
+
+    def _one(item):
+        ip, vps_data = item
+        try:
+            return ip, archive_host(ip, vps_data)
+        except Exception as e:
+            logger.error(f"Arsip {ip} gagal: {e}")
+            return ip, None
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="archive") as pool:
+        done = list(pool.map(_one, hosts.items()))
+
+    # Node yang sudah tidak ada di fleet: arsip tetap disimpan, hanya retention
+    live = {node_id(ip, inst.name) for ip, vps_data in hosts.items() for inst in vps_data.nodes()}
+    for nid in archived_hosts():
+        if nid not in live:
+            index = load_index(nid)
+            if _prune(nid, index):
+                _save_index(nid, index)
+
+    failed = sum(1 for _, r in done if r is None)
+    nbytes = sum(r[0] for _, r in done if r)
+    lines = sum(r[1] for _, r in done if r)
+    logger.info(
+        f"Arsip log: {len(done) - failed}/{len(done)} host, {lines} baris "
+        f"({nbytes / 1024 / 1024:.1f}MB) dalam {time.time() - started:.1f}s"
+    )
+    return {"hosts": len(done), "failed": failed, "bytes": nbytes, "lines": lines}
+
+
+# ============================================================
+# QUERY OFFLINE
+# ============================================================
+def query(ip: Optional[str] = None, since: Optional[float] = None, until: Optional[float] = None,
+          pattern: Optional[str] = None, limit: int = 0) -> Iterator[Tuple[str, float, str]]:
+    """
+    Cari di arsip tanpa SSH: yield (host, epoch, baris).
+
+    `ip` = semua instance host itu, atau node_id `ip/nama` untuk satu
+    instance. Hanya segment yang rentang waktunya beririsan dengan
+    [since, until] yang dibuka, dan di-decompress per baris (tidak dimuat
+    utuh ke memory).
+    """
+    rx = re.compile(pattern) if pattern else None
+    found = 0
+    hosts = archived_hosts()
+    if ip:
+        hosts = [h for h in hosts if h == ip or split_node(h)[0] == ip]
+    for host in hosts:
+        for seg in load_index(host)["segments"]:
+            if since is not None and (seg.get("last") or 0) < since:
+                continue
+            if until is not None and (seg.get("first") or 0) > until:
+                continue
+            try:
+                f = gzip.open(_segment_path(host, seg), "rt", encoding="utf-8", errors="replace")
+            except FileNotFoundError:
+                continue
+            with f:
+                ts = seg.get("first") or 0
+                for line in f:
+                    ts = line_time(line, ts)
+                    if since is not None and ts < since:
+                        continue
+                    if until is not None and ts > until:
+                        break
+                    if rx is not None and not rx.search(line):
+                        continue
+                    yield host, ts, line.rstrip("\n")
+                    found += 1
+                    if limit and found >= limit:
+                        return
+
+
+def stats() -> list:
+    """Ringkasan arsip per host (jumlah segment, ukuran, rentang waktu)."""
+    rows = []
+    for host in archived_hosts():
+        segments = load_index(host)["segments"]
+        rows.append({
+            "host": host,
+            "segments": len(segments),
+            "bytes": sum(s.get("bytes", 0) for s in segments),
+            "raw": sum(s.get("raw", 0) for s in segments),
+            "lines": sum(s.get("lines", 0) for s in segments),
+            "first": min((s["first"] for s in segments if s.get("first")), default=None),
+            "last": max((s["last"] for s in segments if s.get("last")), default=None),
+        })
+    return rows
+
+
+_RELATIVE = re.compile(r"^(\d+)([smhd])$")
+
+
+def parse_when(value: Optional[str]) -> Optional[float]:
+    """'2h' / '30m' / '1d' (relatif dari sekarang) atau 'YYYY-MM-DD[ HH:MM[:SS]]'."""
+    if not value:
+        return None
+    m = _RELATIVE.match(value.strip().lower())
+    if m:
+        return time.time() - int(m.group(1)) * {"s": 1, "m": 60, "h": 3600, "d": 86400}[m.group(2)]
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return time.mktime(time.strptime(value.strip(), fmt))
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f"Waktu tidak valid: {value}")
+
+
+# ============================================================
+# ENTRY
+# ============================================================
+def run_once() -> int:
+    try:
+        with file_lock(ARCHIVER_LOCK, blocking=False):
+            run_archive()
+    except BlockingIOError:
+        logger.warning("Archiver lain masih jalan, skip.")
+    return 0
+
+
+def main():
+    logger.info("Starting Deklan Fusion log archiver...")
+    while True:
+        try:
+            run_once()
+        except Exception as e:
+            logger.error(f"Error in archiver loop: {e}")
+        time.sleep(ARCHIVE_INTERVAL)
+
+
+def _fmt_time(ts) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts)) if ts else "-"
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        level=logging.INFO
+    )
+    parser = argparse.ArgumentParser(description="Deklan Fusion log archiver")
+    parser.add_argument("command", nargs="?", default="run", choices=("run", "query", "stats"))
+    parser.add_argument("--once", action="store_true", help="Satu putaran lalu exit (untuk systemd timer)")
+    parser.add_argument("--ip", help="query: hanya host ini (atau ip/instance)")
+    parser.add_argument("--since", type=parse_when, help="query: 2h / 1d / 'YYYY-MM-DD HH:MM'")
+    parser.add_argument("--until", type=parse_when, help="query: 30m / 'YYYY-MM-DD HH:MM'")
+    parser.add_argument("--grep", help="query: regex")
+    parser.add_argument("--limit", type=int, default=0, help="query: maks baris")
+    args = parser.parse_args()
+
+    if args.command == "query":
+        try:
+            for host, _, line in query(args.ip, args.since, args.until, args.grep, args.limit):
+                print(f"{host}\t{line}")
+        except BrokenPipeError:
+            pass
+        sys.exit(0)
+
+    if args.command == "stats":
+        for row in stats():
+            print(
+                f"{row['host']}\t{row['segments']} seg\t{row['bytes'] / 1024 / 1024:.1f}MB "
+                f"(raw {row['raw'] / 1024 / 1024:.1f}MB)\t{row['lines']} baris\t"
+                f"{_fmt_time(row['first'])} → {_fmt_time(row['last'])}"
+            )
+        sys.exit(0)
+
+    if args.once:
+        sys.exit(run_once())
+    main()
@@ -0,0 +1,122 @@
+"""
+Classifier error untuk log node (swarm_launcher.log).
+
+Semua pola digabung jadi satu regex alternation dengan named group,
+jadi setiap baris cukup di-scan sekali (tanpa lower() berulang per pola).
+Kelas spesifik dicek dulu; baris yang tidak cocok kelas spesifik mana
+pun baru dicek ke pola generik (error / exception).
+
+Hasil per host:
+
+    {
+        "conn_refused": {"count": 3, "first_seen": 1735.., "last_seen": 1735.., "sample": "..."},
+        ...
+    }
+"""
+import re
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+# (nama kelas, label untuk report, pola)
+# Urutan tidak menentukan prioritas: regex alternation mengambil match
+# paling kiri di baris.
+ERROR_CLASSES = [
+    ("conn_refused", "ConnectionRefused", r"ConnectionRefusedError|Connection refused"),
+    ("uvloop", "uvloop", r"uvloop"),
+    ("file_not_found", "FileNotFound", r"FileNotFoundError|No such file or directory"),
+    ("oom", "OOM", r"OutOfMemoryError|out of memory|MemoryError|oom-kill|Killed process"),
+    ("cuda", "CUDA", r"CUDA error|cudaError\w*|NCCL error|CUBLAS_STATUS_\w+|CUDNN_STATUS_\w+"),
+    ("torch", "Torch", r"torch\.(?![\w.]*OutOfMemory)[\w.]*Error|Segmentation fault"),
+    ("p2p", "P2P/DHT", r"P2PDaemonError|P2PHandlerError|DHT\w*Error|hivemind\.[\w.]*Error"),
+    ("timeout", "Timeout", r"TimeoutError|timed out"),
+    ("traceback", "Traceback", r"Traceback \(most recent call last\)"),
+]
+
+GENERIC_CLASS = ("other", "Error", r"\berror\b|\bexception\b")
+
+CLASS_LABEL = {name: label for name, label, _ in ERROR_CLASSES}
+CLASS_LABEL[GENERIC_CLASS[0]] = GENERIC_CLASS[1]
+
+SPECIFIC_RE = re.compile(
+    "|".join(f"(?P<{name}>{pattern})" for name, _, pattern in ERROR_CLASSES),
+    re.IGNORECASE
+)
+GENERIC_RE = re.compile(GENERIC_CLASS[2], re.IGNORECASE)
+
+# Timestamp di awal baris log, contoh "2025-01-31 12:00:01" / "2025-01-31T12:00:01"
+TS_RE = re.compile(r"(\d{4}-\d{2}-\d{2})[ T](\d{2}:\d{2}:\d{2})")
+
+SAMPLE_LEN = 200
+
+
+def classify_line(line: str) -> Optional[str]:
+    """Nama kelas error untuk satu baris, atau None."""
+    m = SPECIFIC_RE.search(line)
+    if m:
+        return m.lastgroup
+    if GENERIC_RE.search(line):
+        return GENERIC_CLASS[0]
+    return None
+
+
+def _line_time(line: str, default: float) -> float:
+    m = TS_RE.search(line, 0, 40)
+    if not m:
+        return default
+    try:
+        return datetime.strptime(f"{m.group(1)} {m.group(2)}", "%Y-%m-%d %H:%M:%S").timestamp()
+    except ValueError:
+        return default
+
+
+def classify(lines: Iterable[str], now: float = None) -> Dict[str, dict]:
+    """
+    Klasifikasikan baris log dalam satu pass.
+
+    Baris tanpa timestamp memakai `now` untuk first/last seen.
+    """
+    now = now if now is not None else time.time()
+    found: Dict[str, dict] = {}
+
+    for line in lines:
+        cls = classify_line(line)
+        if cls is None:
+            continue
+        ts = _line_time(line, now)
+        entry = found.get(cls)
+        if entry is None:
+            found[cls] = {
+                "count": 1,
+                "first_seen": ts,
+                "last_seen": ts,
+                "sample": line.strip()[:SAMPLE_LEN],
+            }
+        else:
+            entry["count"] += 1
+            entry["first_seen"] = min(entry["first_seen"], ts)
+            entry["last_seen"] = max(entry["last_seen"], ts)
+            entry["sample"] = line.strip()[:SAMPLE_LEN]
+
+    return found
+
+
+def merge(total: Dict[str, dict], new: Dict[str, dict]) -> Dict[str, dict]:
+    """Gabungkan hasil scan baru ke akumulasi per host (in-place)."""
+    for cls, entry in new.items():
+        acc = total.get(cls)
+        if acc is None:
+            total[cls] = dict(entry)
+            continue
+        acc["count"] += entry["count"]
+        acc["first_seen"] = min(acc["first_seen"], entry["first_seen"])
+        if entry["last_seen"] >= acc["last_seen"]:
+            acc["last_seen"] = entry["last_seen"]
+            acc["sample"] = entry["sample"]
+    return total
+
+
+def summarize(classes: Dict[str, dict]) -> str:
+    """'ConnectionRefused×3, OOM×1' (urut terbanyak)."""
+    ranked = sorted(classes.items(), key=lambda kv: -kv[1]["count"])
+    return ", ".join(f"{CLASS_LABEL.get(cls, cls)}×{e['count']}" for cls, e in ranked)
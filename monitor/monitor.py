@@ -1,14 +1,27 @@
 """
 Monitor daemon untuk generate change report setiap 3 jam.
+
+Dua cara jalan:
+    python3 -m monitor.monitor           loop sendiri (sleep 3 jam)
+    python3 -m monitor.monitor --once    satu siklus lalu exit (dipakai
+                                         fusion-monitor.timer)
+
+Fleet besar: `--workers N` (atau MONITOR_WORKERS) membagi host ke N
+proses worker lewat consistent hash (monitor/shard.py).
+
+Module berat (paramiko, python-telegram-bot) baru di-import saat
+benar-benar dipakai, jadi start `--once` cepat dan tidak ada proses
+yang menahan memory di antara siklus.
 """
 import os
 import sys
 import json
+import time
 import logging
 import asyncio
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from telegram import Bot
 from dotenv import load_dotenv
 
 # Add parent directory to path
@@ -17,10 +30,14 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 # Load environment (if .env exists)
 env_path = os.path.join(os.path.dirname(__file__), "..", ".env")
 if os.path.exists(env_path):
-load_dotenv(env_path)
+    load_dotenv(env_path)
 
-from bot.reward_checker import check_all_rewards, load_db
-from bot.ssh_client import SSHClient
+from bot.config import TMP_DIR, MONITOR_WORKERS, MONITOR_CONCURRENCY
+from bot.db import load_db, flush_db, fleet, transaction
+from bot.models import node_id, split_node
+from bot.utils import file_lock
+from bot import snapshot, metrics, resources
+from monitor import classifier, alerts, report, shard
 
 # Setup logging
 logging.basicConfig(
@@ -30,133 +47,347 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-async def generate_change_report() -> str:
+def publish_snapshot(results, skipped=()):
+    """
+    Publish hasil probe ke fleet snapshot (dibaca bot via mmap).
+
+    `skipped` = node_id yang tidak ter-probe siklus ini (worker shard
+    gagal): record lama dari snapshot sebelumnya dipertahankan apa adanya.
+    """
+    try:
+        records = [r for r in results if r is not None and r.ip]
+        if skipped:
+            reader = snapshot.SnapshotReader()
+            for nid in skipped:
+                rec = reader.get(nid, max_age=0)
+                if rec is not None:
+                    records.append(rec.to_probe())
+        snapshot.publish(records)
+    except Exception as e:
+        logger.error(f"Gagal publish snapshot: {e}")
+
+
+async def generate_change_report(results=None, errors=None, mode=None) -> list:
     """
     Generate change report untuk semua VPS.
+
+    Args:
+        errors: error baru per node dari poll_fleet() (opsional), ditempel per host
+        mode: full / compact / changed (default REPORT_MODE)
     
     Returns:
-        Formatted report string
+        List pesan (masing-masing ≤ 4096 karakter)
     """
-    results = check_all_rewards()
+    if results is None:
+        from bot.reward_checker import check_all_rewards
+        results = check_all_rewards()
     
-    if not results:
-        return "❌ Tidak ada VPS tersimpan."
-    
-    # Format sesuai spesifikasi
-    report = "🔥 CHANGE REPORT (3 HOURS)\n\n"
-    
-    for r in results:
-        status_emoji = "🟢" if r["status"] == "online" else "🔴"
-        report += (
-            f"Label : {r['label']}\n"
-            f"Peer  : {r['peer']}\n"
-            f"{status_emoji}\n"
-            f"Score : {r['score']}\n"
-            f"Reward : {r['reward']}\n"
-            f"Point  : {r['points']}\n\n"
-        )
-    
-    report += "Bot created by Deklan"
-    
-    return report
+    return report.render_report(results, errors, mode)
 
 
-async def send_report_to_admin(bot_token=None, admin_chat_id=None):
-    """Send change report ke admin Telegram."""
+async def send_report_to_admin(bot_token=None, admin_chat_id=None, results=None, errors=None,
+                               mode=None) -> bool:
+    """Send change report ke admin Telegram. Return True kalau terkirim."""
     # Priority: function args > environment variable
     token = bot_token or os.getenv("BOT_TOKEN", "")
     chat_id = admin_chat_id or os.getenv("ADMIN_CHAT_ID", "")
     
     if not token or not chat_id:
         logger.error("BOT_TOKEN or ADMIN_CHAT_ID not set! Use --token and --admin-chat-id arguments or set environment variables")
-        return
+        return False
     
     try:
+        from telegram import Bot
         bot = Bot(token=token)
-        report = await generate_change_report()
+        messages = await generate_change_report(results, errors, mode)
         
-        await bot.send_message(
-            chat_id=chat_id,
-            text=report,
-            parse_mode="Markdown"
-        )
+        for text in messages:
+            with metrics.TELEGRAM_SEND_SECONDS.time("monitor"):
+                await bot.send_message(
+                    chat_id=chat_id,
+                    text=text,
+                    parse_mode="Markdown"
+                )
         
-        logger.info("Change report sent successfully")
+        logger.info(f"Change report sent successfully ({len(messages)} message(s))")
+        return True
         
     except Exception as e:
         logger.error(f"Error sending report: {e}")
+        return False
 
 
-async def check_node_errors():
-    """Check untuk error di logs (ConnectionRefusedError, uvloop error, FileNotFoundError)."""
-    db = load_db()
-    
-    # Support both old and new format
-    vps_list = {}
-    if "vps" in db:
-        # Old format
-    vps_list = db.get("vps", {})
-    else:
-        # New format - collect all VPS from all users
-        for user_data in db.get("users", {}).values():
-            vps_list.update(user_data.get("vps", {}))
-    
-    errors_found = []
-    
-    for ip, vps_data in vps_list.items():
-        username = vps_data.get("user", "root")
-        password = vps_data.get("password", "")
-        
-        # Get last 50 lines of log
-        success, output = SSHClient.execute(
-            ip, username, password,
-            "tail -n 50 /root/rl-swarm/logs/swarm_launcher.log 2>/dev/null || echo ''"
+async def send_alerts_to_admin(blocks, bot_token=None, admin_chat_id=None) -> bool:
+    """Kirim blok alert (digabung sebanyak mungkin per pesan). Return True kalau terkirim."""
+    token = bot_token or os.getenv("BOT_TOKEN", "")
+    chat_id = admin_chat_id or os.getenv("ADMIN_CHAT_ID", "")
+    if not token or not chat_id:
+        logger.error("BOT_TOKEN or ADMIN_CHAT_ID not set, alerts not sent")
+        return False
+
+    messages = report.chunk(blocks)
+
+    try:
+        from telegram import Bot
+        bot = Bot(token=token)
+        for text in messages:
+            with metrics.TELEGRAM_SEND_SECONDS.time("monitor"):
+                await bot.send_message(chat_id=chat_id, text=text, parse_mode="Markdown")
+    except Exception as e:
+        logger.error(f"Error sending alerts: {e}")
+        return False
+
+    logger.info(f"{len(blocks)} alert block(s) sent in {len(messages)} message(s)")
+    return True
+
+
+def record_node_errors(nid, label, node):
+    """
+    Klasifikasikan error baru di log satu node (hasil probe batch).
+
+    Akumulasi disimpan di db["vps"][node_id]["errors"]:
+        {"cursor": {...}, "classes": {kelas: {count, first_seen, last_seen, sample}}}
+
+    Returns:
+        {"ip", "label", "classes"} kalau ada error baru, selain itu None
+    """
+    if node.get("cursor") is None:
+        return None
+
+    new = classifier.classify(node["lines"])
+
+    with transaction(("vps", nid)) as db:
+        state = db.setdefault("vps", {}).setdefault(nid, {})
+        prev = state.get("errors") or {}
+        state["errors"] = {
+            "cursor": node["cursor"],
+            "classes": classifier.merge(prev.get("classes") or {}, new),
+            "updated": time.time(),
+        }
+
+    if new:
+        return {"ip": nid, "label": label, "classes": new}
+    return None
+
+
+# ============================================================
+# PROBE (IN-PROCESS / SHARDED)
+# ============================================================
+def probe_host(ip, vps_data):
+    """
+    Probe semua instance node satu host dengan SATU perintah SSH
+    (bot/nodes.py): status + reward/score + log baru per instance,
+    ditambah sampel resource host.
+
+    Returns:
+        (list ProbeResult per instance, list error baru per instance)
+    """
+    from bot.reward_checker import node_results
+    from bot.nodes import probe
+
+    started = time.time()
+    state = load_db().get("vps", {})
+    cursors = {
+        n.name: (state.get(node_id(ip, n.name), {}).get("errors") or {}).get("cursor") or {}
+        for n in vps_data.nodes()
+    }
+
+    probed = probe(ip, vps_data, cursors, with_resources=True)
+    if probed is None:
+        return node_results(ip, vps_data, {}, started), []
+
+    sample_text, found = probed
+    sample = resources.parse_sample(sample_text or "")
+    if sample:
+        with transaction(("vps", ip)) as db:
+            resources.update(db.setdefault("vps", {}).setdefault(ip, {}), ip, sample)
+
+    results = node_results(ip, vps_data, found, started)
+    errors = []
+    for inst in vps_data.nodes():
+        if inst.name in found:
+            err = record_node_errors(node_id(ip, inst.name), vps_data.label, found[inst.name])
+            if err:
+                errors.append(err)
+    return results, errors
+
+
+def probe_hosts(hosts, concurrency=MONITOR_CONCURRENCY):
+    """
+    Probe sekumpulan host dengan `concurrency` SSH bersamaan.
+
+    Dipakai langsung (1 worker) atau sebagai entry proses worker shard;
+    DB di-flush sebelum return supaya proses induk langsung melihat
+    state per host yang baru.
+
+    Returns:
+        (results, errors) urut sesuai `hosts`
+    """
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="probe") as pool:
+        probed = list(pool.map(lambda item: probe_host(*item), hosts.items()))
+    flush_db()
+
+    results = [r for host_results, _ in probed for r in host_results]
+    errors = [e for _, host_errors in probed for e in host_errors]
+    logger.info(f"Probe {len(hosts)} host selesai dalam {time.time() - started:.1f}s (pid {os.getpid()})")
+    return results, errors
+
+
+def _probe_shard(hosts, concurrency):
+    """Entry worker shard: hasil probe + metrics proses ini (di-merge induk)."""
+    results, errors = probe_hosts(hosts, concurrency)
+    return results, errors, metrics.REGISTRY.drain()
+
+
+def poll_fleet(workers=MONITOR_WORKERS, concurrency=MONITOR_CONCURRENCY):
+    """
+    Probe semua VPS, di-shard ke `workers` proses kalau > 1.
+
+    Returns:
+        (results, errors, skipped) gabungan semua shard, urut sesuai fleet;
+        skipped = set node_id dari shard yang worker-nya gagal
+    """
+    hosts = fleet(load_db())
+    order = {ip: i for i, ip in enumerate(hosts)}
+
+    results, errors = [], []
+    done, failed = shard.run_sharded(_probe_shard, hosts, workers, concurrency)
+    for shard_results, shard_errors, shard_metrics in done:
+        results.extend(shard_results)
+        errors.extend(shard_errors)
+        metrics.REGISTRY.merge(shard_metrics)
+
+    # ip host ikut dimasukkan: alert overload di-key per host, bukan per node
+    skipped = set(failed) | {
+        node_id(ip, n.name) for ip, vps_data in failed.items() for n in vps_data.nodes()
+    }
+    if skipped:
+        logger.warning(f"{len(failed)} host tidak ter-probe siklus ini, state sebelumnya dipertahankan")
+
+    # Urut host sesuai fleet; instance dalam satu host tetap urutan probe (sort stabil)
+    results.sort(key=lambda r: order.get(split_node(r.ip)[0], len(order)))
+    errors.sort(key=lambda e: order.get(split_node(e["ip"])[0], len(order)))
+    return results, errors, skipped
+
+
+# ============================================================
+# CYCLE + CHECKPOINT
+# ============================================================
+MONITOR_LOCK = os.path.join(TMP_DIR, "monitor")
+
+CYCLE_INTERVAL = 10800
+
+
+def _checkpoint(**fields):
+    """Simpan progres siklus di db["monitor"] dan langsung flush ke disk."""
+    with transaction(("monitor",)) as db:
+        db.setdefault("monitor", {}).update(fields)
+    flush_db()
+
+
+def _merge_errors(*lists):
+    merged = {}
+    for errors in lists:
+        for e in errors or []:
+            acc = merged.setdefault(e["ip"], {"ip": e["ip"], "label": e.get("label"), "classes": {}})
+            classifier.merge(acc["classes"], e["classes"])
+    return list(merged.values())
+
+
+async def run_cycle(bot_token=None, admin_chat_id=None, report_mode=None,
+                    workers=MONITOR_WORKERS) -> bool:
+    """
+    Satu siklus monitor: probe → snapshot → error → alert → report.
+
+    Setiap tahap di-checkpoint ke DB (cursor log, metric terakhir dan
+    state alert tersimpan per host). Error yang sudah di-scan tapi belum
+    sempat dilaporkan (crash / Telegram gagal) disimpan sebagai
+    `pending_errors` dan ikut report siklus berikutnya.
+
+    Dengan workers > 1 probe + scan log di-shard ke beberapa proses
+    (monitor/shard.py), hasilnya digabung jadi satu report.
+
+    Returns:
+        True kalau report terkirim
+    """
+    started = time.time()
+    _checkpoint(stage="probe", started=started, workers=workers)
+    stage = metrics.MONITOR_STAGE_SECONDS
+
+    # Probe semua VPS sekali + klasifikasi error baru di log
+    # → snapshot untuk bot + report
+    with stage.time("probe"):
+        results, found, skipped = poll_fleet(workers)
+        flush_db()
+        publish_snapshot(results, skipped)
+
+    pending = load_db().get("monitor", {}).get("pending_errors") or []
+    errors = _merge_errors(pending, found)
+    if errors:
+        logger.warning(f"Found new errors on {len(errors)} VPS")
+    _checkpoint(stage="alerts", pending_errors=errors)
+
+    # Alert (dedup / suppress / group / resolve), state di DB
+    with stage.time("alerts"):
+        engine, blocks = alerts.process(results, errors, skipped=skipped)
+        if not blocks or await send_alerts_to_admin(blocks, bot_token, admin_chat_id):
+            engine.commit()
+    _checkpoint(stage="report")
+
+    # Generate dan send report
+    with stage.time("report"):
+        sent = await send_report_to_admin(
+            bot_token=bot_token, admin_chat_id=admin_chat_id,
+            results=results, errors=errors, mode=report_mode
         )
-        
-        if not success:
-            continue
-        
-        # Check for common errors
-        error_patterns = [
-            "ConnectionRefusedError",
-            "uvloop",
-            "FileNotFoundError",
-            "error",
-            "Error",
-            "ERROR",
-            "exception",
-            "Exception"
-        ]
-        
-        for pattern in error_patterns:
-            if pattern.lower() in output.lower():
-                errors_found.append({
-                    "ip": ip,
-                    "error": pattern,
-                    "log_snippet": output[-200:]  # Last 200 chars
-                })
-                break
-    
-    return errors_found
 
+    finished = time.time()
+    fields = {"stage": "done", "finished": finished,
+              "duration": round(finished - started, 1), "hosts": len(results)}
+    if sent:
+        fields["pending_errors"] = []
+    _checkpoint(**fields)
+
+    online = sum(1 for r in results if r.online)
+    metrics.MONITOR_HOSTS.set(online, "online")
+    metrics.MONITOR_HOSTS.set(len(results) - online, "offline")
+    metrics.MONITOR_HOSTS.set(len(errors), "errors")
+    metrics.MONITOR_HOSTS.set(len(skipped), "skipped")
+    metrics.MONITOR_LAST_CYCLE.set(finished)
+    metrics.dump()
+
+    logger.info(f"Monitor cycle selesai: {len(results)} host dalam {finished - started:.1f}s")
+    return sent
 
-async def main(bot_token=None, admin_chat_id=None):
+
+async def run_once(bot_token=None, admin_chat_id=None, report_mode=None,
+                   workers=MONITOR_WORKERS) -> int:
+    """Satu siklus untuk systemd timer. Return exit code."""
+    metrics.set_process("monitor")
+    try:
+        with file_lock(MONITOR_LOCK, blocking=False):
+            await run_cycle(bot_token, admin_chat_id, report_mode, workers)
+    except BlockingIOError:
+        logger.warning("Siklus monitor sebelumnya masih jalan, skip.")
+    return 0
+
+
+async def main(bot_token=None, admin_chat_id=None, report_mode=None, workers=MONITOR_WORKERS):
     """Main monitor loop."""
     logger.info("Starting Deklan Fusion Monitor...")
+    metrics.set_process("monitor")
     
     while True:
         try:
-            # Generate dan send report
-            await send_report_to_admin(bot_token=bot_token, admin_chat_id=admin_chat_id)
-            
-            # Check for errors
-            errors = await check_node_errors()
-            if errors:
-                logger.warning(f"Found {len(errors)} errors in VPS logs")
-                # Optionally send error alerts to admin
+            try:
+                with file_lock(MONITOR_LOCK, blocking=False):
+                    await run_cycle(bot_token, admin_chat_id, report_mode, workers)
+            except BlockingIOError:
+                logger.warning("Monitor lain (timer --once) sedang jalan, skip siklus ini.")
             
             # Wait 3 hours (10800 seconds)
-            await asyncio.sleep(10800)
+            await asyncio.sleep(CYCLE_INTERVAL)
             
         except KeyboardInterrupt:
             logger.info("Monitor stopped by user")
@@ -180,8 +411,26 @@ if __name__ == "__main__":
         help="Admin Chat ID (or set ADMIN_CHAT_ID environment variable)",
         default=None
     )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Jalankan satu siklus lalu exit (untuk systemd timer)"
+    )
+    parser.add_argument(
+        "--report-mode",
+        choices=report.MODES,
+        help="full / compact / changed (or set REPORT_MODE environment variable)",
+        default=None
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Jumlah proses worker probe, host di-shard per IP (or set MONITOR_WORKERS)",
+        default=MONITOR_WORKERS
+    )
     
     args = parser.parse_args()
+    workers = max(1, args.workers)
     
     # Set environment variables if provided via command line
     if args.token:
@@ -189,5 +438,14 @@ if __name__ == "__main__":
     if args.admin_chat_id:
         os.environ["ADMIN_CHAT_ID"] = args.admin_chat_id
     
-    asyncio.run(main(bot_token=args.token, admin_chat_id=args.admin_chat_id))
+    if args.once:
+        sys.exit(asyncio.run(run_once(
+            bot_token=args.token, admin_chat_id=args.admin_chat_id, report_mode=args.report_mode,
+            workers=workers
+        )))
+
+    asyncio.run(main(
+        bot_token=args.token, admin_chat_id=args.admin_chat_id, report_mode=args.report_mode,
+        workers=workers
+    ))
 
@@ -0,0 +1,173 @@
+"""
+Renderer change report + pemecah pesan Telegram.
+
+Mode:
+    full     7 baris per node (format lama)
+    compact  1 baris per node
+    changed  hanya node yang status / metric-nya berubah (atau punya error baru)
+
+Report dibangun sebagai list blok (satu blok per node) lalu dipaket ke
+pesan ≤ 4096 karakter. Pemotongan hanya di batas blok / baris, jadi
+entity Markdown (`code`, *bold*) tidak pernah terbelah di dua pesan.
+"""
+from typing import Dict, List, Optional
+
+from bot.config import REPORT_MODE, REPORT_CHANGE_THRESHOLD
+from monitor import classifier
+
+TELEGRAM_LIMIT = 4096
+
+MODES = ("full", "compact", "changed")
+
+HEADER = "🔥 CHANGE REPORT (3 HOURS)"
+FOOTER = "Bot created by Deklan"
+
+MARKDOWN_CHARS = "*_`["
+
+
+# ============================================================
+# CHUNKING
+# ============================================================
+def _tg_len(text: str) -> int:
+    """Panjang versi Telegram (UTF-16 code unit; emoji = 2)."""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _strip_markdown(text: str) -> str:
+    return text.translate({ord(c): None for c in MARKDOWN_CHARS})
+
+
+def _split_block(block: str, limit: int) -> List[str]:
+    """Pecah blok yang lebih panjang dari limit di batas baris."""
+    parts, current = [], []
+    size = 0
+    for line in block.split("\n"):
+        n = _tg_len(line)
+        if n > limit:
+            # Satu baris kepanjangan: potong paksa tanpa markup supaya
+            # tidak ada entity yang terbuka di satu pesan dan tertutup di pesan lain
+            line = _strip_markdown(line)
+            if current:
+                parts.append("\n".join(current))
+                current, size = [], 0
+            step = limit // 2
+            parts.extend(line[i:i + step] for i in range(0, len(line), step))
+            continue
+        if current and size + 1 + n > limit:
+            parts.append("\n".join(current))
+            current, size = [], 0
+        size += n + (1 if current else 0)
+        current.append(line)
+    if current:
+        parts.append("\n".join(current))
+    return parts
+
+
+def chunk(blocks: List[str], limit: int = TELEGRAM_LIMIT, sep: str = "\n\n") -> List[str]:
+    """Paket blok ke sesedikit mungkin pesan ≤ limit."""
+    messages, current, size = [], "", 0
+    sep_len = _tg_len(sep)
+    for block in blocks:
+        pieces = [block] if _tg_len(block) <= limit else _split_block(block, limit)
+        for piece in pieces:
+            n = _tg_len(piece)
+            if current and size + sep_len + n > limit:
+                messages.append(current)
+                current, size = "", 0
+            if current:
+                current, size = f"{current}{sep}{piece}", size + sep_len + n
+            else:
+                current, size = piece, n
+    if current:
+        messages.append(current)
+    return messages
+
+
+# ============================================================
+# RENDER
+# ============================================================
+def _label(r) -> str:
+    """Label host, + nama instance untuk node selain bawaan ("5/n2")."""
+    _, _, name = (r.ip or "").partition("/")
+    return f"{r.label}/{name}" if name else f"{r.label}"
+
+
+def _errors_line(classes: Optional[Dict[str, dict]]) -> Optional[str]:
+    return f"Errors : {classifier.summarize(classes)}" if classes else None
+
+
+def render_full(r, errors=None) -> str:
+    status_emoji = "🟢" if r.online else "🔴"
+    lines = [
+        f"Label : {_label(r)}",
+        f"Peer  : {r.peer_str}",
+        status_emoji,
+        f"Score : {r.fmt('score')}",
+        f"Reward : {r.fmt('reward')}",
+        f"Point  : {r.fmt('points')}",
+    ]
+    err = _errors_line(errors)
+    if err:
+        lines.append(err)
+    return "\n".join(lines)
+
+
+def render_compact(r, errors=None) -> str:
+    status_emoji = "🟢" if r.online else "🔴"
+    line = (
+        f"{status_emoji} #{_label(r)} S {r.fmt('score')} · "
+        f"R {r.fmt('reward')} · P {r.fmt('points')}"
+    )
+    if errors:
+        line += f" · ⚠️ {classifier.summarize(errors)}"
+    return line
+
+
+def is_changed(r, errors=None, threshold: float = REPORT_CHANGE_THRESHOLD) -> bool:
+    if errors or r.status_changed:
+        return True
+    for name in r.METRICS:
+        d = r.delta(name)
+        if d is not None and d != 0 and abs(d) >= threshold:
+            return True
+    return False
+
+
+def render_report(results, errors=None, mode: str = None,
+                  threshold: float = REPORT_CHANGE_THRESHOLD) -> List[str]:
+    """
+    Report sebagai list pesan siap kirim (masing-masing ≤ 4096 karakter).
+
+    Args:
+        results: list ProbeResult (monitor.poll_fleet → probe_host)
+        errors: error baru per node dari poll_fleet (opsional): record_node_errors
+                → {"ip", "label", "classes"} hasil classifier.classify
+        mode: full / compact / changed (default REPORT_MODE)
+    """
+    mode = (mode or REPORT_MODE).lower()
+    if mode not in MODES:
+        mode = "full"
+
+    results = [r for r in results or [] if r is not None]
+    if not results:
+        return ["❌ Tidak ada VPS tersimpan."]
+
+    host_errors = {e["ip"]: e["classes"] for e in errors or []}
+
+    if mode == "changed":
+        shown = [r for r in results if is_changed(r, host_errors.get(r.ip), threshold)]
+        header = f"{HEADER}\n{len(shown)}/{len(results)} node berubah"
+    else:
+        shown = results
+        header = HEADER
+
+    if not shown:
+        return chunk([header, "✅ Tidak ada perubahan.", FOOTER])
+
+    if mode == "full":
+        body = [render_full(r, host_errors.get(r.ip)) for r in shown]
+        return chunk([header, *body, FOOTER])
+
+    # compact: satu baris per node, pesan dipotong di batas baris
+    body = [render_compact(r, host_errors.get(r.ip)) for r in shown]
+    return chunk([f"{header}\n", *body, f"\n{FOOTER}"], sep="\n")
@@ -0,0 +1,105 @@
+"""
+Shard fleet monitor ke beberapa proses worker (consistent hashing).
+
+    ┌─────────┐  hosts shard 0  ┌──────────┐  ThreadPool (SSH)
+    │ monitor │ ──────────────▶ │ worker 0 │ ───────────────▶ VPS …
+    │ (induk) │ ──────────────▶ │ worker 1 │ ───────────────▶ VPS …
+    │         │ ◀────────────── │   ...    │
+    └─────────┘  hasil probe    └──────────┘
+
+- Host dibagi lewat hash ring (MONITOR_RING_VNODES titik virtual per
+  worker), jadi menambah / mengurangi worker hanya memindahkan ±1/N host.
+- Tiap worker proses sendiri (spawn, bukan fork: proses induk punya
+  thread flusher DB) → crypto SSH + parsing log jalan di core berbeda.
+- Worker menulis state per host (`vps[ip]`) ke DB; satu host selalu
+  milik satu worker, jadi merge per path di bot.db tidak bentrok.
+- Hasil dikembalikan ke induk dan digabung jadi satu report / snapshot.
+- Worker yang crash / raise: host shard itu dikembalikan sebagai "tidak
+  ter-probe" → induk mempertahankan state alert + snapshot sebelumnya
+  untuk host tsb (bukan dianggap pulih / hilang).
+"""
+import bisect
+import hashlib
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+from bot.config import MONITOR_RING_VNODES
+
+logger = logging.getLogger(__name__)
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent hash ring sederhana: key → node."""
+
+    def __init__(self, nodes: int, vnodes: int = MONITOR_RING_VNODES):
+        points = sorted(
+            (_hash(f"shard-{node}#{v}"), node)
+            for node in range(nodes) for v in range(vnodes)
+        )
+        self._keys = [h for h, _ in points]
+        self._nodes = [n for _, n in points]
+
+    def node_for(self, key: str) -> int:
+        i = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._nodes[i]
+
+
+def split(hosts: Dict[str, object], workers: int) -> List[Dict[str, object]]:
+    """Bagi dict ip → entry ke `workers` shard (urutan asli dipertahankan)."""
+    shards = [{} for _ in range(workers)]
+    if workers == 1:
+        shards[0].update(hosts)
+        return shards
+    ring = HashRing(workers)
+    for ip, entry in hosts.items():
+        shards[ring.node_for(ip)][ip] = entry
+    return shards
+
+
+def run_sharded(func: Callable, hosts: Dict[str, object], workers: int,
+                *args) -> Tuple[list, Dict[str, object]]:
+    """
+    Jalankan `func(shard_hosts, *args)` di `workers` proses, satu per shard.
+
+    `func` harus fungsi top-level (di-pickle by name). Shard kosong tidak
+    dijalankan.
+
+    Returns:
+        (list hasil per shard yang sukses (urut nomor shard),
+         host dari shard yang worker-nya crash / raise → belum ter-probe)
+    """
+    shards = [s for s in split(hosts, workers) if s]
+    results, failed = [], {}
+
+    if len(shards) <= 1:
+        for s in shards:
+            try:
+                results.append(func(s, *args))
+            except Exception as e:
+                logger.error(f"Probe gagal ({len(s)} host): {e}")
+                failed.update(s)
+        return results, failed
+
+    logger.info(f"Monitor shard: {len(hosts)} host → {[len(s) for s in shards]}")
+    ctx = multiprocessing.get_context("spawn")
+    # Satu pool per shard: worker yang mati hanya mematahkan (BrokenProcessPool)
+    # pool-nya sendiri, shard lain tetap jalan
+    pools = [ProcessPoolExecutor(max_workers=1, mp_context=ctx) for _ in shards]
+    try:
+        futures = [pool.submit(func, s, *args) for pool, s in zip(pools, shards)]
+        for shard, future in enumerate(futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logger.error(f"Worker shard {shard} gagal ({len(shards[shard])} host): {e}")
+                failed.update(shards[shard])
+    finally:
+        for pool in pools:
+            pool.shutdown()
+    return results, failed
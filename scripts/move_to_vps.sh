@@ -35,9 +35,16 @@ if [[ ! "$SWAP_SIZE" =~ ^[0-9]+[GgMm]$ ]]; then
     exit 1
 fi
 
+# Single step (used by bot/provision.py): $0 <SWAP_SIZE> --step NAME
+ONLY_STEP=""
+if [ "${2:-}" = "--step" ]; then
+    ONLY_STEP="${3:-}"
+fi
+
 # =========================================================
 # STEP 1 — CREATE SWAP + OPTIMIZE SYSTEM
 # =========================================================
+step_swap() {
 status "[1/4] Creating swap ($SWAP_SIZE) and optimizing system…"
 
 cat > /usr/local/bin/create-swap-custom.sh <<SWAP_SCRIPT
@@ -112,7 +119,7 @@ if ! fallocate -l "\$SWAP_SIZE" "\$SWAPFILE"; then
 fi
 
 chmod 600 "\$SWAPFILE" || error "Failed to set swapfile permissions."
-mkswap "\$SWAP_SIZE" || error "Failed to format swapfile."
+mkswap "\$SWAPFILE" || error "Failed to format swapfile."
 swapon "\$SWAPFILE" || error "Failed to enable swapfile."
 message "Swapfile is now active."
 
@@ -136,7 +143,9 @@ message "Swapfile configuration complete."
 SWAP_SCRIPT
 chmod +x /usr/local/bin/create-swap-custom.sh
 /usr/local/bin/create-swap-custom.sh
+}
 
+step_optimize() {
 # (1b) Optimize system (same as setup_vps.sh)
 cat > /usr/local/bin/optimize-system.sh <<'OPT_SCRIPT'
 #!/bin/bash
@@ -265,10 +274,12 @@ echo -e "\n${GREEN}✔ Optimization complete!${NC}"
 OPT_SCRIPT
 chmod +x /usr/local/bin/optimize-system.sh
 /usr/local/bin/optimize-system.sh
+}
 
 # =========================================================
 # STEP 2 — INSTALL DEPENDENCIES
 # =========================================================
+step_deps() {
 status "[2/4] Installing dependencies…"
 
 cat > /usr/local/bin/ez-deps.sh <<'EODEPS'
@@ -365,10 +376,12 @@ chmod +x /usr/local/bin/ez-deps.sh
 
 apt-get update -y >/dev/null 2>&1 || true
 apt-get install -y expect unzip >/dev/null 2>&1 || true
+}
 
 # =========================================================
 # STEP 3 — ENSURE /root/ezlabs & REQUIRED FILES (with 5-min wait)
 # =========================================================
+step_keys() {
 status "[3/4] Ensuring /root/ezlabs and required keys…"
 EZDIR="/root/ezlabs"
 mkdir -p "$EZDIR"
@@ -469,14 +482,33 @@ if ((${#missing[@]})); then
 else
   echo -e "${GREEN}All required files already in ${EZDIR}. Proceeding to Step 4…${NC}"
 fi
+}
 
 # =========================================================
 # STEP 4 — RUN GENSYN NODE (systemd launcher)
 # =========================================================
+step_launch() {
 status "[4/4] Starting Gensyn node via systemd.sh…"
 bash -lc 'cd && rm -rf qwen2-5-1-5-b.zip systemd.sh && wget -O systemd.sh https://raw.githubusercontent.com/ezlabsnodes/gensyn/main/systemd.sh && chmod +x systemd.sh && ./systemd.sh'
 
 ok "Gensyn systemd unit deployed."
-ok "Move to VPS completed successfully!"
+}
 
+# =========================================================
+# RUN — all steps, or only --step NAME
+# =========================================================
+STEPS=(swap optimize deps keys launch)
+if [ -n "$ONLY_STEP" ]; then
+  if [[ " ${STEPS[*]} " != *" $ONLY_STEP "* ]]; then
+    err "Unknown step: $ONLY_STEP (valid: ${STEPS[*]})"
+    exit 1
+  fi
+  "step_$ONLY_STEP"
+  ok "Step $ONLY_STEP done."
+  exit 0
+fi
 
+for step in "${STEPS[@]}"; do
+  "step_$step"
+done
+ok "Move to VPS completed successfully!"
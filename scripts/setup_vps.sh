@@ -36,9 +36,16 @@ if [[ ! "$SWAP_SIZE" =~ ^[0-9]+[GgMm]$ ]]; then
     exit 1
 fi
 
+# Single step (used by bot/provision.py): $0 <SWAP_SIZE> --step NAME
+ONLY_STEP=""
+if [ "${2:-}" = "--step" ]; then
+    ONLY_STEP="${3:-}"
+fi
+
 # =========================================================
 # STEP 1 — CREATE SWAP + OPTIMIZE SYSTEM
 # =========================================================
+step_swap() {
 status "[1/4] Creating swap ($SWAP_SIZE) and optimizing system…"
 
 # (1a) Create swap script (with parameter)
@@ -138,7 +145,9 @@ message "Swapfile configuration complete."
 SWAP_SCRIPT
 chmod +x /usr/local/bin/create-swap-custom.sh
 /usr/local/bin/create-swap-custom.sh
+}
 
+step_optimize() {
 # (1b) Optimize system
 cat > /usr/local/bin/optimize-system.sh <<'OPT_SCRIPT'
 #!/bin/bash
@@ -267,10 +276,12 @@ echo -e "\n${GREEN}✔ Optimization complete!${NC}"
 OPT_SCRIPT
 chmod +x /usr/local/bin/optimize-system.sh
 /usr/local/bin/optimize-system.sh
+}
 
 # =========================================================
 # STEP 2 — INSTALL DEPENDENCIES
 # =========================================================
+step_deps() {
 status "[2/4] Installing dependencies…"
 
 cat > /usr/local/bin/ez-deps.sh <<'EODEPS'
@@ -347,10 +358,12 @@ chmod +x /usr/local/bin/ez-deps.sh
 
 apt-get update -y >/dev/null 2>&1 || true
 apt-get install -y expect unzip >/dev/null 2>&1 || true
+}
 
 # =========================================================
 # STEP 3 — PREP & FETCH RL-SWARM PACKAGE
 # =========================================================
+step_fetch() {
 status "[3/4] Preparing runtime and packaging…"
 
 safe_cp() {
@@ -393,10 +406,12 @@ unzip -o qwen2-official.zip >/dev/null
 safe_cp "$HOME/ezlabs/swarm.pem" "$HOME/rl-swarm"
 safe_cp "$HOME/ezlabs/userApiKey.json" "$HOME/rl-swarm/modal-login/temp-data"
 safe_cp "$HOME/ezlabs/userData.json" "$HOME/rl-swarm/modal-login/temp-data"
+}
 
 # =========================================================
 # STEP 4 — LAUNCH RL-SWARM IN SCREEN
 # =========================================================
+step_launch() {
 status "[4/4] Launching rl-swarm in screen…"
 cd "$HOME/rl-swarm"
 
@@ -407,6 +422,23 @@ chmod +x run_rl_swarm.sh
 screen -S gensyn -dm bash -lc 'source .venv/bin/activate && CPU_ONLY=true ./run_rl_swarm.sh'
 
 ok "Launch request sent to screen session 'gensyn'."
-ok "Setup completed successfully!"
+}
 
+# =========================================================
+# RUN — all steps, or only --step NAME
+# =========================================================
+STEPS=(swap optimize deps fetch launch)
+if [ -n "$ONLY_STEP" ]; then
+  if [[ " ${STEPS[*]} " != *" $ONLY_STEP "* ]]; then
+    err "Unknown step: $ONLY_STEP (valid: ${STEPS[*]})"
+    exit 1
+  fi
+  "step_$ONLY_STEP"
+  ok "Step $ONLY_STEP done."
+  exit 0
+fi
 
+for step in "${STEPS[@]}"; do
+  "step_$step"
+done
+ok "Setup completed successfully!"
@@ -0,0 +1,16 @@
+"""
+Env test: BASE_DIR sementara + token dummy.
+
+Di-set sebelum modul `bot.*` di-import, karena bot.config membaca env
+saat import. Butuh dependency bot (bot/requirements.txt) terpasang.
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ["BASE_DIR"] = tempfile.mkdtemp(prefix="fusion-test-")
+os.environ["BOT_TOKEN"] = "123456:TEST-TOKEN"
+os.environ["AGENT_TOKEN"] = "agent-test-token"
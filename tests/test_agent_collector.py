@@ -0,0 +1,141 @@
+"""
+Agent → collector end-to-end, tanpa VPS.
+
+`agent/fusion_agent.py` dijalankan sebagai proses lokal (pengganti VPS)
+terhadap log sementara, lalu push-nya diterima collector sungguhan di
+127.0.0.1 dan disimpan ke DB.
+"""
+import os
+import sys
+import json
+import threading
+import subprocess
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from bot import collector
+from bot.db import load_db, transaction, add_host
+from bot.models import VPSRecord
+
+AGENT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                     "agent", "fusion_agent.py")
+
+PEER = "Qm" + "x" * 44
+
+LOG = [
+    f"[INFO] Peer ID: {PEER}",
+    "[INFO] round 1 score: 12.5 reward: 0.25 points: 40",
+    "[ERROR] Traceback (most recent call last):",
+    "[INFO] round 2 score: 13.0 reward: 0.5 points: 42",
+]
+
+
+def run_agent(tmp_path, *extra):
+    summary = tmp_path / "summary.json"
+    subprocess.run(
+        [sys.executable, AGENT, "--once",
+         "--log", str(tmp_path / "swarm_launcher.log"),
+         "--summary", str(summary),
+         "--service", "fusion-test-missing.service",
+         *extra],
+        check=True, timeout=30
+    )
+    return json.loads(summary.read_text())
+
+
+def write_log(tmp_path, lines, mode="w"):
+    with open(tmp_path / "swarm_launcher.log", mode) as f:
+        f.write("".join(line + "\n" for line in lines))
+
+
+def register(ip):
+    with transaction(("users", "42"), ("index",)) as db:
+        if ip not in db["users"].get("42", {}).get("vps", {}):
+            add_host(db, 42, ip, VPSRecord("root", "pw"))
+
+
+@pytest.fixture
+def collector_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), collector.AgentHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}{collector.COLLECTOR_PATH}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_agent_writes_summary(tmp_path):
+    write_log(tmp_path, LOG)
+    summary = run_agent(tmp_path)
+
+    assert summary["peer"] == PEER
+    assert (summary["score"], summary["reward"], summary["points"]) == ("13.0", "0.5", "42")
+    assert summary["errors"] == 1
+    assert summary["last_error"].startswith("[ERROR] Traceback")
+    assert summary["status"] == "offline"
+    assert summary["offset"] == (tmp_path / "swarm_launcher.log").stat().st_size
+
+    # Run berikutnya hanya membaca baris baru dari offset
+    write_log(tmp_path, ["[INFO] round 3 score: 14.0 reward: 0.75 points: 44"], mode="a")
+    summary = run_agent(tmp_path)
+    assert summary["score"] == "14.0"
+    assert summary["errors"] == 1
+    assert summary["offset"] == (tmp_path / "swarm_launcher.log").stat().st_size
+
+
+def test_collector_stores_push(tmp_path, collector_url):
+    ip = "10.0.0.7"
+    register(ip)
+    write_log(tmp_path, LOG)
+
+    run_agent(tmp_path, "--collector", collector_url, "--token", collector.agent_token(ip), "--host", ip)
+
+    state = load_db()["vps"][ip]["agent"]
+    assert state["source"] == "push"
+    assert state["peer"] == PEER
+    assert (state["score"], state["reward"], state["points"]) == ("13.0", "0.5", "42")
+    assert state["errors"] == 1
+
+
+def test_collector_rejects_bad_token_and_unknown_host(tmp_path, collector_url):
+    ip = "10.0.0.8"
+    register(ip)
+    write_log(tmp_path, LOG)
+
+    run_agent(tmp_path, "--collector", collector_url, "--token", "wrong", "--host", ip)
+    run_agent(tmp_path, "--collector", collector_url,
+              "--token", collector.agent_token("10.0.0.99"), "--host", "10.0.0.99")
+
+    vps = load_db().get("vps", {})
+    assert "agent" not in vps.get(ip, {})
+    assert "10.0.0.99" not in vps
+
+
+def push(url, token, payload):
+    req = urllib.request.Request(
+        url, data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json", "X-Fusion-Agent-Token": token},
+        method="POST"
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=5) as resp:
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def test_collector_rejects_token_of_other_host(collector_url):
+    host_a, host_b = "10.0.0.10", "10.0.0.11"
+    register(host_a)
+    register(host_b)
+
+    # Tenant host A membaca token dari VPS-nya lalu mengaku sebagai host B
+    assert push(collector_url, collector.agent_token(host_a),
+                {"host": host_b, "status": "online", "score": "999"}) == 403
+    assert "agent" not in load_db()["vps"].get(host_b, {})
+
+    assert push(collector_url, collector.agent_token(host_a),
+                {"host": host_a, "status": "online", "score": "1"}) == 204
+    assert load_db()["vps"][host_a]["agent"]["score"] == "1"
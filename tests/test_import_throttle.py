@@ -0,0 +1,57 @@
+"""
+Upload file import ditagih sesuai jumlah host di file, bukan IMPORT_MAX_HOSTS.
+"""
+import asyncio
+from types import SimpleNamespace
+
+from bot import importer, throttle
+from bot.config import RATE_LIMIT_BURST
+
+
+class FakeMessage:
+    def __init__(self):
+        self.sent = []
+
+    async def reply_text(self, text, **kwargs):
+        self.sent.append(text)
+
+
+def _update(user_id):
+    message = FakeMessage()
+    return SimpleNamespace(
+        message=message, effective_message=message,
+        effective_user=SimpleNamespace(id=user_id),
+    )
+
+
+def _hosts(n):
+    return "\n".join(f"10.9.0.{i} root pw" for i in range(1, n + 1))
+
+
+def test_import_charges_per_host(monkeypatch):
+    monkeypatch.setattr(importer, "validate_hosts", lambda entries, c: [(False, "tes")] * len(entries))
+    update = _update(4601)
+
+    async def upload(text):
+        async with throttle.admit(update, 1, 0) as allowed:
+            assert allowed
+            await importer.import_hosts(update, text, prepaid=1)
+
+    asyncio.run(upload(_hosts(3)))
+    bucket = throttle.limiter._buckets[4601]
+    assert RATE_LIMIT_BURST - 3 <= bucket.tokens < RATE_LIMIT_BURST - 2
+
+    # File kecil berikutnya masih lolos, bucket tidak dikuras
+    asyncio.run(upload(_hosts(1)))
+    assert "Import selesai" in update.message.sent[-1]
+
+
+def test_import_rejected_when_bucket_empty(monkeypatch):
+    calls = []
+    monkeypatch.setattr(importer, "validate_hosts", lambda entries, c: calls.append(entries) or [])
+    update = _update(4602)
+    throttle.limiter.check(4602, RATE_LIMIT_BURST)
+
+    asyncio.run(importer.import_hosts(update, _hosts(5), prepaid=1))
+    assert not calls
+    assert update.message.sent[-1].startswith("⛔")
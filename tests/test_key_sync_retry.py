@@ -0,0 +1,148 @@
+"""
+Upload key (file_receiver.sync_keys_to_all_vps) di-retry lewat KEY_SYNC.
+
+paramiko diganti objek palsu: koneksi SFTP pertama ke satu host timeout,
+percobaan berikutnya sukses. Host lain tidak boleh diulang.
+"""
+import asyncio
+
+import paramiko
+
+from bot import retry, file_receiver
+from bot.db import transaction, add_host
+from bot.models import VPSRecord
+
+USER = "77"
+FLAKY, STABLE = "10.1.0.1", "10.1.0.2"
+
+
+class FakeSSH:
+    """paramiko.SSHClient untuk `mkdir -p` (selalu sukses, output kosong)."""
+
+    class _Stream:
+        def read(self):
+            return b""
+
+    def set_missing_host_key_policy(self, policy):
+        pass
+
+    def connect(self, host, **kwargs):
+        pass
+
+    def exec_command(self, command, timeout=None):
+        return None, self._Stream(), self._Stream()
+
+    def close(self):
+        pass
+
+
+class FakeNet:
+    """Transport / SFTP palsu yang mencatat upload per host."""
+
+    def __init__(self, flaky_host, failures):
+        self.flaky_host = flaky_host
+        self.failures = failures
+        self.connects = {}
+        self.uploads = []
+        net = self
+
+        class Transport:
+            def __init__(self, addr):
+                self.host = addr[0]
+
+            def connect(self, **kwargs):
+                net.connects[self.host] = net.connects.get(self.host, 0) + 1
+                if self.host == net.flaky_host and net.failures:
+                    net.failures -= 1
+                    raise TimeoutError("timed out")
+
+            def close(self):
+                pass
+
+        class SFTP:
+            def __init__(self, host):
+                self.host = host
+
+            @classmethod
+            def from_transport(cls, transport):
+                return cls(transport.host)
+
+            def mkdir(self, path):
+                raise OSError("exists")
+
+            def put(self, local, remote):
+                net.uploads.append((self.host, remote))
+
+            def close(self):
+                pass
+
+        self.Transport = Transport
+        self.SFTPClient = SFTP
+
+
+class FakeMessage:
+    def __init__(self):
+        self.replies = []
+
+    async def reply_text(self, text, **kwargs):
+        self.replies.append(text)
+
+
+class FakeUpdate:
+    def __init__(self):
+        self.message = FakeMessage()
+        self.effective_user = type("User", (), {"id": int(USER)})()
+
+
+def test_key_upload_retries_transient_connect_failure(tmp_path, monkeypatch):
+    with transaction(("users", USER), ("index",)) as db:
+        for ip in (FLAKY, STABLE):
+            if ip not in db["users"].get(USER, {}).get("vps", {}):
+                add_host(db, USER, ip, VPSRecord("root", "pw"))
+
+    net = FakeNet(FLAKY, failures=1)
+    monkeypatch.setattr(paramiko, "SSHClient", FakeSSH)
+    monkeypatch.setattr(paramiko, "AutoAddPolicy", object, raising=False)
+    monkeypatch.setattr(paramiko, "Transport", net.Transport, raising=False)
+    monkeypatch.setattr(paramiko, "SFTPClient", net.SFTPClient, raising=False)
+    monkeypatch.setattr(retry, "backoff", lambda attempt: 0)
+
+    key = tmp_path / "swarm.pem"
+    key.write_text("key")
+    update = FakeUpdate()
+
+    synced = asyncio.run(file_receiver.sync_keys_to_all_vps(update, None, "swarm.pem", str(key)))
+
+    assert sorted(synced) == [FLAKY, STABLE]
+    assert net.connects == {FLAKY: 2, STABLE: 1}
+    remote = file_receiver.REMOTE_PATHS["swarm.pem"]
+    assert sorted(net.uploads) == [(FLAKY, remote), (STABLE, remote)]
+    assert any(FLAKY in r and "percobaan ke-2" in r for r in update.message.replies)
+
+
+def test_key_upload_auth_failure_not_retried(tmp_path, monkeypatch):
+    with transaction(("users", USER), ("index",)) as db:
+        if FLAKY not in db["users"].get(USER, {}).get("vps", {}):
+            add_host(db, USER, FLAKY, VPSRecord("root", "pw"))
+
+    net = FakeNet(FLAKY, failures=0)
+    auth_error = getattr(paramiko, "AuthenticationException")
+
+    def refuse(self, **kwargs):
+        net.connects[self.host] = net.connects.get(self.host, 0) + 1
+        raise auth_error("bad password")
+
+    monkeypatch.setattr(net.Transport, "connect", refuse)
+    monkeypatch.setattr(paramiko, "SSHClient", FakeSSH)
+    monkeypatch.setattr(paramiko, "AutoAddPolicy", object, raising=False)
+    monkeypatch.setattr(paramiko, "Transport", net.Transport, raising=False)
+    monkeypatch.setattr(paramiko, "SFTPClient", net.SFTPClient, raising=False)
+    monkeypatch.setattr(retry, "backoff", lambda attempt: 0)
+
+    key = tmp_path / "swarm.pem"
+    key.write_text("key")
+
+    synced = asyncio.run(file_receiver.sync_keys_to_all_vps(FakeUpdate(), None, "swarm.pem", str(key)))
+
+    assert FLAKY not in synced
+    assert net.connects[FLAKY] == 1
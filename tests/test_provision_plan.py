@@ -0,0 +1,41 @@
+"""
+Hash + rencana step provision (tanpa SSH).
+"""
+from bot import provision
+
+MOVE = provision.PIPELINES["move"][1]
+
+
+def _marked(hashes):
+    # Marker seperti yang ditulis wave_command: hanya step dengan hash
+    return {name: h for name, h in hashes.items() if h is not None}
+
+
+def test_launch_always_runs():
+    hashes = provision.step_hashes("move", "50G", inputs={"keys": "aaaa"})
+    assert hashes["launch"] is None
+
+    skipped, waves = provision.plan(MOVE, hashes, _marked(hashes))
+    assert skipped == ["swap", "optimize", "deps", "keys"]
+    assert waves == [["launch"]]
+
+
+def test_key_files_change_reruns_keys():
+    old = provision.step_hashes("move", "50G", inputs={"keys": "aaaa"})
+    new = provision.step_hashes("move", "50G", inputs={"keys": "bbbb"})
+    assert old["keys"] != new["keys"]
+    assert old["swap"] == new["swap"]
+
+    skipped, waves = provision.plan(MOVE, new, _marked(old))
+    assert "keys" not in skipped
+    assert waves == [["keys"], ["launch"]]
+
+
+def test_shared_helper_change_reruns_steps():
+    text = provision.load_script("setup")
+    edited = text.replace("ok(){", "ok() {", 1)
+    assert edited != text
+
+    old = provision.step_hashes("setup", "50G", text)
+    new = provision.step_hashes("setup", "50G", edited)
+    assert all(old[n] != new[n] for n in old if old[n] is not None)
@@ -0,0 +1,70 @@
+"""
+Worker shard yang crash tidak boleh membuat host-nya "hilang".
+
+Host dari shard gagal dikembalikan sebagai tidak ter-probe, dan alert
+yang masih aktif untuk host tsb tidak dianggap pulih.
+"""
+import os
+
+# Modul ini di-import ulang di worker spawn (untuk _probe); import bot.*
+# sengaja di dalam test supaya worker tidak ikut memuat sys.path induk
+# yang sudah diubah modul lain (bot/actions.py menyisipkan bot/)
+
+CRASH = "10.0.0.99"
+
+
+def _probe(hosts):
+    # Top-level supaya bisa di-pickle ke worker spawn
+    if CRASH in hosts:
+        os._exit(1)
+    return sorted(hosts)
+
+
+def test_crashed_worker_hosts_are_marked_failed():
+    from monitor import shard
+
+    hosts = {f"10.0.0.{i}": object() for i in range(1, 30)}
+    hosts[CRASH] = object()
+
+    results, failed = shard.run_sharded(_probe, hosts, 3)
+
+    assert CRASH in failed
+    probed = {ip for r in results for ip in r}
+    # Shard lain tetap jalan, dan tiap host ada di tepat satu sisi
+    assert probed
+    assert probed.isdisjoint(failed)
+    assert probed | set(failed) == set(hosts)
+
+
+def test_raising_single_shard_is_marked_failed():
+    from monitor import shard
+
+    def boom(hosts):
+        raise RuntimeError("ssh pool rusak")
+
+    results, failed = shard.run_sharded(boom, {"10.0.0.1": None}, 1)
+    assert results == []
+    assert set(failed) == {"10.0.0.1"}
+
+
+def test_skipped_host_alert_is_not_resolved():
+    from bot.db import transaction
+    from monitor import alerts
+
+    fp = alerts.fingerprint("10.0.0.1", alerts.OFFLINE)
+    with transaction(("alerts",)) as db:
+        db["alerts"] = {fp: {
+            "ip": "10.0.0.1", "label": 1, "class": alerts.OFFLINE,
+            "active": True, "notified": True, "first_seen": 0,
+            "last_seen": 0, "last_sent": 0, "count": 1, "misses": 0,
+        }}
+
+    engine = alerts.AlertEngine(now=100)
+    firing, resolved = engine.evaluate({}, skipped={"10.0.0.1"})
+    assert not resolved
+    assert engine.state[fp]["active"]
+    assert engine.state[fp]["misses"] == 0
+
+    # Siklus berikutnya host ter-probe dan kondisinya hilang → baru pulih
+    firing, resolved = engine.evaluate({})
+    assert resolved[alerts.OFFLINE][0]["ip"] == "10.0.0.1"
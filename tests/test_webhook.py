@@ -0,0 +1,150 @@
+"""
+Mode webhook (`run_application`) lewat HTTP lokal, tanpa Telegram.
+
+Bot API diganti FakeRequest (getMe / setWebhook dijawab lokal), lalu
+update kalengan di-POST ke server webhook dengan secret token benar dan
+salah. Hanya yang benar boleh sampai ke handler.
+"""
+import json
+import socket
+import asyncio
+import threading
+import urllib.error
+import urllib.request
+
+from telegram import Update
+from telegram.ext import ApplicationBuilder, TypeHandler
+from telegram.request import BaseRequest
+
+from bot.bot import run_application
+from bot.config import WEBHOOK_PATH
+
+SECRET = "webhook-test-secret"
+
+
+class FakeRequest(BaseRequest):
+    """Bot API palsu: catat method yang dipanggil, jawab sukses."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url, method, request_data=None, **kwargs):
+        name = url.rsplit("/", 1)[-1]
+        self.calls.append((name, request_data.parameters if request_data else {}))
+        if name == "getMe":
+            result = {"id": 123456, "is_bot": True, "first_name": "Fusion", "username": "fusion_test_bot"}
+        else:
+            result = True
+        return 200, json.dumps({"ok": True, "result": result}).encode("utf-8")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def post(port: int, update_id: int, secret: str) -> int:
+    body = {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id, "date": 0, "text": "/start",
+            "chat": {"id": 42, "type": "private"},
+            "from": {"id": 42, "is_bot": False, "first_name": "Test"},
+        },
+    }
+    req = urllib.request.Request(
+        f"http://127.0.0.1:{port}{WEBHOOK_PATH}",
+        data=json.dumps(body).encode("utf-8"),
+        headers={"Content-Type": "application/json", "X-Telegram-Bot-Api-Secret-Token": secret},
+        method="POST"
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=5) as resp:
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def wait_listening(port: int, timeout: float = 10):
+    for _ in range(int(timeout / 0.05)):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            threading.Event().wait(0.05)
+    raise TimeoutError(f"webhook tidak listen di port {port}")
+
+
+def test_webhook_dispatches_only_valid_secret():
+    port = free_port()
+    request = FakeRequest()
+    dispatched = []
+    got_update = threading.Event()
+    loop = []
+
+    async def record(update, context):
+        dispatched.append(update.update_id)
+        got_update.set()
+
+    async def post_init(app):
+        loop.append(asyncio.get_running_loop())
+
+    app = (
+        ApplicationBuilder()
+        .token("123456:TEST-TOKEN")
+        .request(request)
+        .get_updates_request(FakeRequest())
+        .post_init(post_init)
+        .build()
+    )
+    app.add_handler(TypeHandler(Update, record))
+
+    statuses = {}
+    errors = []
+
+    def client():
+        try:
+            wait_listening(port)
+            statuses["ok"] = post(port, 1, SECRET)
+            statuses["bad"] = post(port, 2, "wrong-secret")
+            got_update.wait(5)
+            # Beri waktu update kedua seandainya ikut diproses
+            threading.Event().wait(0.3)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            loop[0].call_soon_threadsafe(app.stop_running)
+
+    # run_webhook memakai event loop thread utama (asyncio.run di test lain menghapusnya)
+    event_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(event_loop)
+
+    thread = threading.Thread(target=client, daemon=True)
+    thread.start()
+    try:
+        run_application(
+            app, "webhook",
+            webhook_url="https://bot.example.invalid",
+            listen="127.0.0.1",
+            port=port,
+            secret_token=SECRET,
+        )
+    finally:
+        thread.join(10)
+        asyncio.set_event_loop(None)
+        event_loop.close()
+
+    assert not errors
+    assert statuses == {"ok": 200, "bad": 403}
+    assert dispatched == [1]
+
+    set_webhook = [params for name, params in request.calls if name == "setWebhook"]
+    assert set_webhook and set_webhook[0]["url"] == f"https://bot.example.invalid{WEBHOOK_PATH}"
+    assert set_webhook[0]["secret_token"] == SECRET